@@ -1,14 +1,22 @@
 """Batch PDF operation APIs using frappe.enqueue()."""
 import json
+import os
 import frappe
 
+# Background job timeout per operation; office conversion and numbering
+# runs over thousands of pages need far longer than the default
+BATCH_TIMEOUT = 600
+BATCH_TIMEOUTS = {"convert": 4 * 60 * 60, "stamp": 4 * 60 * 60}
+
 
 @frappe.whitelist()
 def start_batch(operation, file_urls, options=None):
     """Start a batch PDF operation as a background job.
 
     Args:
-        operation: Operation type (merge, split, compress, watermark, ocr)
+        operation: Operation type (merge, split, compress, watermark, ocr,
+            convert — office documents to PDF, stamp — page/Bates numbers
+            continuing across the files)
         file_urls: JSON list of file URLs to process
         options: JSON dict of operation-specific options
     """
@@ -18,7 +26,7 @@ def start_batch(operation, file_urls, options=None):
         if isinstance(options, str) and options:
             options = json.loads(options)
 
-        valid_operations = ["merge", "split", "compress", "watermark", "ocr", "convert"]
+        valid_operations = ["merge", "split", "compress", "watermark", "ocr", "convert", "stamp"]
         if operation not in valid_operations:
             return {"success": False, "error": f"Invalid operation: {operation}"}
 
@@ -41,7 +49,7 @@ def start_batch(operation, file_urls, options=None):
             "pdf_suite.api.batch.process_batch",
             batch_name=batch_doc.name,
             queue="long",
-            timeout=600,
+            timeout=BATCH_TIMEOUTS.get(operation, BATCH_TIMEOUT),
         )
 
         return {
@@ -107,6 +115,12 @@ def process_batch(batch_name):
             result = merge_pdfs(file_urls, options.get("output_filename"))
             results.append(result)
             doc.processed_files = len(file_urls)
+        elif operation == "convert":
+            # Convert hands whole chunks to LibreOffice instead of file by file
+            results = _batch_convert(doc, file_urls, options)
+        elif operation == "stamp":
+            # Numbering runs on across files, so they are stamped together
+            results = _batch_stamp(doc, file_urls, options)
         elif operation in handlers:
             handler = handlers[operation]
             for i, url in enumerate(file_urls):
@@ -142,14 +156,173 @@ def _batch_compress(file_url, options):
 
 
 def _batch_watermark(file_url, options):
-    from pdf_suite.api.watermark import add_text_watermark
+    # Same options for every file, so the watermark is rendered once per page size
+    from pdf_suite.api.watermark import add_image_watermark, add_text_watermark
+    if options.get("image_url"):
+        return add_image_watermark(
+            file_url,
+            options["image_url"],
+            opacity=options.get("opacity", 0.2),
+            position=options.get("position", "center"),
+        )
     return add_text_watermark(
         file_url,
         text=options.get("text", "CONFIDENTIAL"),
+        font_size=options.get("font_size", 60),
         opacity=options.get("opacity", 0.15),
+        rotation=options.get("rotation", 45),
+        color=options.get("color", "#888888"),
     )
 
 
 def _batch_ocr(file_url, options):
     from pdf_suite.api.ocr import ocr_pdf
     return ocr_pdf(file_url, language=options.get("language", "eng"))
+
+
+def _batch_convert(doc, file_urls, options):
+    """Convert office documents to PDF in chunks across a LibreOffice pool.
+
+    Each chunk's PDFs are registered as Files together with the progress
+    update, in one commit per chunk. The pool belongs to this job: RQ ends
+    work-horses with os._exit, so atexit cleanup of the shared pool would
+    never stop its soffice processes.
+    """
+    import shutil
+    from pdf_suite.api.convert import CONVERTIBLE_EXTENSIONS, _office_pool_size
+    from pdf_suite.utils.file_utils import get_file_path, get_temp_dir, save_file_to_frappe
+    from pdf_suite.utils.office_pool import OfficePool
+
+    results = [None] * len(file_urls)
+    inputs = []
+    for i, url in enumerate(file_urls):
+        extension = os.path.splitext(url)[1].lower().lstrip(".")
+        if extension not in CONVERTIBLE_EXTENSIONS:
+            results[i] = {"success": False, "error": f"Unsupported file type: {extension or url}", "source": url}
+            continue
+        try:
+            inputs.append((i, get_file_path(url)))
+        except Exception as e:
+            results[i] = {"success": False, "error": str(e), "source": url}
+
+    doc.processed_files = len(file_urls) - len(inputs)
+    temp_dir = get_temp_dir()
+
+    def on_chunk(indexes, chunk_results):
+        for j, (output_path, error) in zip(indexes, chunk_results):
+            i = inputs[j][0]
+            url = file_urls[i]
+            if error:
+                results[i] = {"success": False, "error": error, "source": url}
+                continue
+            filename = os.path.splitext(os.path.basename(url))[0] + ".pdf"
+            with open(output_path, "rb") as f:
+                file_url = save_file_to_frappe(f.read(), filename, commit=False)
+            os.remove(output_path)
+            results[i] = {"success": True, "data": {"file_url": file_url, "filename": filename}, "source": url}
+
+        doc.processed_files += len(indexes)
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+
+    pool = OfficePool(max(1, int(_office_pool_size()))) if inputs else None
+    try:
+        if pool:
+            pool.convert_many(
+                [path for _, path in inputs],
+                temp_dir,
+                chunk_size=options.get("chunk_size"),
+                on_chunk=on_chunk,
+            )
+    finally:
+        if pool:
+            pool.shutdown()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return results
+
+
+def _batch_stamp(doc, file_urls, options):
+    """Stamp page/Bates numbers that continue from one file to the next.
+
+    Page counts are read first so every file knows its first number; the
+    files are then stamped in parallel worker processes and saved in file
+    order, one commit per file.
+    """
+    import multiprocessing
+    import shutil
+    from concurrent.futures import ProcessPoolExecutor
+    from pdf_suite.utils.file_utils import get_file_path, get_temp_dir, save_file_to_frappe
+    from pdf_suite.utils.pdf_utils import count_pages, get_workers
+    from pdf_suite.utils.stamping import check_template, stamp_numbers, text_style
+
+    template = options.get("template") or "{bates}"
+    check_template(template)
+    style = text_style(
+        options.get("position", "bottom-right"),
+        options.get("font_size", 10),
+        options.get("margin", 28),
+        options.get("color", "#000000"),
+    )
+
+    results = [None] * len(file_urls)
+    jobs = []
+    number = int(options.get("bates_start", 1))
+    for i, url in enumerate(file_urls):
+        try:
+            path = get_file_path(url)
+            pages = count_pages(path)
+        except Exception as e:
+            results[i] = {"success": False, "error": str(e), "source": url}
+            continue
+        jobs.append((i, path, number))
+        number += pages
+
+    doc.processed_files = len(file_urls) - len(jobs)
+    temp_dir = get_temp_dir()
+    workers = min(get_workers(options.get("workers")), max(1, len(jobs)))
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    stamp_numbers,
+                    path,
+                    os.path.join(temp_dir, f"{i}.pdf"),
+                    template=template,
+                    bates_start=first,
+                    bates_prefix=options.get("bates_prefix", ""),
+                    bates_digits=int(options.get("bates_digits", 6)),
+                    **style,
+                )
+                for i, path, first in jobs
+            ]
+            for (i, path, first), future in zip(jobs, futures):
+                url = file_urls[i]
+                try:
+                    pages = future.result()
+                    output_path = os.path.join(temp_dir, f"{i}.pdf")
+                    filename = os.path.splitext(os.path.basename(url))[0] + "_stamped.pdf"
+                    with open(output_path, "rb") as f:
+                        file_url = save_file_to_frappe(f.read(), filename, commit=False)
+                    os.remove(output_path)
+                    results[i] = {
+                        "success": True,
+                        "data": {
+                            "file_url": file_url,
+                            "filename": filename,
+                            "first_number": first,
+                            "last_number": first + pages - 1,
+                        },
+                        "source": url,
+                    }
+                except Exception as e:
+                    results[i] = {"success": False, "error": str(e), "source": url}
+
+                doc.processed_files += 1
+                doc.save(ignore_permissions=True)
+                frappe.db.commit()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return results
@@ -1,76 +1,128 @@
 """PDF conversion APIs — PDF to DOCX, DOCX to PDF, HTML to PDF."""
 import os
+import shutil
 import frappe
-from pdf_suite.utils.file_utils import get_file_path, save_file_to_frappe, get_temp_path, cleanup_temp
+from pdf_suite.utils.file_utils import (
+    get_file_path, save_file_to_frappe, get_temp_dir, site_url_policy,
+)
+from pdf_suite.utils.html_renderer import HTML_TO_PDF_CSS, has_weasyprint, render_pdf
+from pdf_suite.utils.office_pool import ConversionError, convert_to_pdf
+from pdf_suite.utils.pdf_utils import count_pages, get_workers, valid_pages
+
+# Smallest page share worth a separate pdf2docx process
+DOCX_PAGES_PER_WORKER = 5
+
+DOCX_TIMEOUT = 1800
+
+# Child process errors that mean it ran out of its address space limit
+MEMORY_ERRORS = ("MemoryError", "Cannot allocate memory", "failed to map segment")
+
+# Office formats LibreOffice converts to PDF (also used by batch "convert")
+CONVERTIBLE_EXTENSIONS = {
+    "doc", "docx", "odt", "rtf", "txt",
+    "xls", "xlsx", "ods", "csv",
+    "ppt", "pptx", "odp",
+}
 
 
 @frappe.whitelist()
-def pdf_to_docx(file_url, output_filename=None):
-    """Convert PDF to DOCX using pdf2docx."""
-    try:
-        from pdf2docx import Converter
+def pdf_to_docx(file_url, output_filename=None, page_numbers=None, start_page=None, end_page=None, workers=None):
+    """Convert PDF to DOCX using pdf2docx.
+
+    The conversion runs in a child process with a memory limit
+    (pdf_suite_docx_memory_mb site config, per request, default 4096). A
+    continuous page range is split across worker processes.
+
+    Args:
+        file_url: Source PDF file URL
+        output_filename: Name for the DOCX
+        page_numbers: Optional pages, e.g. "1-3,7" or a list of page numbers
+        start_page: First page to convert (1-based; alternative to page_numbers)
+        end_page: Last page to convert (inclusive)
+        workers: Processes to use (default: CPU count, capped by the
+            pdf_suite_max_workers site config and by the page count)
+    """
+    import subprocess
 
+    try:
         path = get_file_path(file_url)
         output_filename = output_filename or "converted.docx"
         if not output_filename.endswith(".docx"):
             output_filename += ".docx"
 
-        temp_path = get_temp_path(suffix=".docx")
+        if not page_numbers and (start_page or end_page):
+            page_numbers = f"{start_page or 1}-{end_page or count_pages(path)}"
+        pages = valid_pages(path, page_numbers)
+        if not pages:
+            frappe.throw("No pages selected")
+
+        workers = min(get_workers(workers), max(1, len(pages) // DOCX_PAGES_PER_WORKER))
+        if pages == list(range(pages[0], pages[-1] + 1)):
+            selection = {"start": pages[0], "end": pages[-1] + 1}
+        else:
+            # pdf2docx only splits continuous ranges across processes
+            selection = {"pages": pages}
+            workers = 1
+
+        temp_dir = get_temp_dir()
         try:
-            cv = Converter(path)
-            cv.convert(temp_path)
-            cv.close()
+            output_path = os.path.join(temp_dir, "converted.docx")
+            _run_pdf2docx(
+                {"path": path, "output": output_path, "workers": workers, **selection},
+                temp_dir,
+                memory_mb=frappe.utils.cint(frappe.conf.get("pdf_suite_docx_memory_mb")) or 4096,
+            )
 
-            with open(temp_path, "rb") as f:
+            with open(output_path, "rb") as f:
                 content = f.read()
 
             url = save_file_to_frappe(content, output_filename)
             return {
                 "success": True,
-                "data": {"file_url": url, "filename": output_filename},
+                "data": {"file_url": url, "filename": output_filename, "pages": len(pages)},
             }
         finally:
-            cleanup_temp(temp_path)
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
+    except subprocess.TimeoutExpired:
+        return {"success": False, "error": f"Conversion timed out ({DOCX_TIMEOUT}s limit)"}
     except Exception as e:
         frappe.log_error(f"pdf_to_docx error: {e}")
         return {"success": False, "error": str(e)}
 
 
+def _run_pdf2docx(options, work_dir, memory_mb):
+    """Run pdf2docx_runner in `work_dir`, killing it if it uses more than memory_mb in total."""
+    from pdf_suite.utils.pdf2docx_runner import MemoryLimitExceeded, run_process
+
+    try:
+        returncode, stderr = run_process(options, work_dir, memory_mb, DOCX_TIMEOUT)
+    except MemoryLimitExceeded:
+        frappe.throw(f"Conversion exceeded the memory limit ({memory_mb} MB); try fewer pages or workers")
+
+    if returncode != 0 or not os.path.exists(options["output"]):
+        detail = stderr.strip().splitlines()
+        if any(marker in line for line in detail for marker in MEMORY_ERRORS):
+            frappe.throw(f"Conversion exceeded the memory limit ({memory_mb} MB); try fewer pages or workers")
+        frappe.throw(f"Conversion failed: {detail[-1] if detail else 'no output generated'}")
+
+
 @frappe.whitelist()
 def docx_to_pdf(file_url, output_filename=None):
-    """Convert DOCX to PDF using LibreOffice."""
-    try:
-        import subprocess
+    """Convert DOCX (or another office document) to PDF using LibreOffice.
 
+    Conversions go through a pool of warm LibreOffice instances (see
+    utils.office_pool); the pool size is set by the pdf_suite_office_pool_size
+    site config (default 2).
+    """
+    try:
         path = get_file_path(file_url)
         output_filename = output_filename or "converted.pdf"
 
-        temp_dir = get_temp_path(suffix="")
-        os.makedirs(temp_dir, exist_ok=True)
-
+        temp_dir = get_temp_dir()
         try:
-            result = subprocess.run(
-                [
-                    "libreoffice",
-                    "--headless",
-                    "--convert-to",
-                    "pdf",
-                    "--outdir",
-                    temp_dir,
-                    path,
-                ],
-                check=True,
-                capture_output=True,
-                timeout=120,
-            )
+            output_path = convert_to_pdf(path, temp_dir, pool_size=_office_pool_size())
 
-            # Find the output PDF
-            pdf_files = [f for f in os.listdir(temp_dir) if f.endswith(".pdf")]
-            if not pdf_files:
-                return {"success": False, "error": "Conversion failed — no output PDF generated"}
-
-            output_path = os.path.join(temp_dir, pdf_files[0])
             with open(output_path, "rb") as f:
                 content = f.read()
 
@@ -80,46 +132,46 @@ def docx_to_pdf(file_url, output_filename=None):
                 "data": {"file_url": url, "filename": output_filename},
             }
         finally:
-            import shutil
             shutil.rmtree(temp_dir, ignore_errors=True)
 
-    except subprocess.TimeoutExpired:
-        return {"success": False, "error": "Conversion timed out (120s limit)"}
+    except ConversionError as e:
+        return {"success": False, "error": str(e)}
     except Exception as e:
         frappe.log_error(f"docx_to_pdf error: {e}")
         return {"success": False, "error": str(e)}
 
 
-@frappe.whitelist()
-def html_to_pdf(html_content, output_filename=None):
-    """Convert HTML string to PDF using reportlab/fpdf2."""
-    try:
-        from fpdf import FPDF
-
-        output_filename = output_filename or "generated.pdf"
+def _office_pool_size():
+    return frappe.conf.get("pdf_suite_office_pool_size") or 2
 
-        # Simple HTML to PDF using fpdf2
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Helvetica", size=12)
 
-        # fpdf2 supports basic HTML
-        pdf.write_html(html_content)
+@frappe.whitelist()
+def html_to_pdf(html_content, output_filename=None):
+    """Convert HTML string to PDF using WeasyPrint.
 
-        temp_path = get_temp_path()
-        try:
-            pdf.output(temp_path)
+    Relative URLs in the HTML resolve against the site URL. Images and
+    stylesheets load only from data: URLs and the site's public files
+    (plus remote http(s) URLs with the pdf_suite_html_remote_urls site
+    config); other URLs, such as file://, are skipped.
+    """
+    if not has_weasyprint():
+        return {"success": False, "error": "WeasyPrint is not installed on this server"}
 
-            with open(temp_path, "rb") as f:
-                content = f.read()
+    try:
+        output_filename = output_filename or "generated.pdf"
 
-            url = save_file_to_frappe(content, output_filename)
-            return {
-                "success": True,
-                "data": {"file_url": url, "filename": output_filename},
-            }
-        finally:
-            cleanup_temp(temp_path)
+        content = render_pdf(
+            html_content,
+            stylesheets=[HTML_TO_PDF_CSS],
+            base_url=frappe.utils.get_url(),
+            url_policy=site_url_policy(),
+        )
+
+        url = save_file_to_frappe(content, output_filename)
+        return {
+            "success": True,
+            "data": {"file_url": url, "filename": output_filename},
+        }
 
     except Exception as e:
         frappe.log_error(f"html_to_pdf error: {e}")
@@ -1,7 +1,40 @@
 """PDF extraction APIs — text, tables, images, metadata."""
+import base64
+import json
 import frappe
-from pdf_suite.utils.file_utils import get_file_path
-from pdf_suite.utils.pdf_utils import get_pdf_metadata
+from pdf_suite.utils import table_export
+from pdf_suite.utils.extract_cache import get_extract_cache, get_page_results
+from pdf_suite.utils.file_utils import (
+    get_file_path, get_content_hash, save_file_to_frappe, get_temp_path, cleanup_temp,
+)
+from pdf_suite.utils.pdf_images import export_image, image_info, iter_page_images
+from pdf_suite.utils.pdf_utils import count_pages, get_pdf_metadata, get_workers, valid_pages
+from pdf_suite.utils.streaming import iter_zip, ndjson_response, zip_response
+
+# Text extraction modes -> extract_cache kinds: pdfplumber layout analysis,
+# or raw content streams
+TEXT_MODES = {
+    "layout": "text",
+    "fast": "text_fast",
+}
+
+# Table engines -> extract_cache kinds: pdfplumber's table finder, or the
+# NumPy ruling-line detector for bordered tables
+TABLE_ENGINES = {
+    "pdfplumber": "tables",
+    "lines": "tables_lines",
+}
+
+# Fast mode costs ~1 ms per page, so only very large jobs are worth a pool
+FAST_MODE_CHUNK_SIZE = 500
+
+# Pages extracted per window when streaming or exporting
+STREAM_WINDOW = 25
+
+MAX_PAGE_SIZE = 500
+
+# CSV exports up to this size are returned inline instead of as a File
+INLINE_EXPORT_BYTES = 256 * 1024
 
 
 @frappe.whitelist()
@@ -16,110 +49,433 @@ def get_pdf_info(file_url):
 
 
 @frappe.whitelist()
-def extract_text(file_url, page_numbers=None):
-    """Extract text from PDF pages using pdfplumber."""
+def extract_text(
+    file_url,
+    page_numbers=None,
+    mode="layout",
+    workers=None,
+    chunk_size=None,
+    page_size=None,
+    cursor=None,
+):
+    """Extract text from PDF pages.
+
+    Per-page results are cached by file content, and extracted text is also
+    added to the full-text search index.
+
+    Args:
+        file_url: Source PDF file URL
+        page_numbers: Optional pages, e.g. "1-3,7" or a list of page numbers
+        mode: "layout" (pdfplumber, reading order) or "fast" (content
+            streams only; much quicker, for indexing and search)
+        workers: Processes to spread pages across (default: CPU count,
+            capped by the pdf_suite_max_workers site config)
+        chunk_size: Pages handled per worker task
+        page_size: Return at most this many pages plus a `next_cursor`
+        cursor: `next_cursor` from the previous call, to continue paging
+    """
     try:
-        import pdfplumber
+        from pdf_suite.api.search import index_text
 
+        kind = _text_kind(mode)
         path = get_file_path(file_url)
-        result = []
-
-        with pdfplumber.open(path) as pdf:
-            pages = _parse_page_numbers(page_numbers, len(pdf.pages))
+        pages, page_info = _page_window(path, page_numbers, page_size, cursor)
 
-            for page_num in pages:
-                if 0 <= page_num < len(pdf.pages):
-                    page = pdf.pages[page_num]
-                    text = page.extract_text() or ""
-                    result.append({
-                        "page": page_num + 1,
-                        "text": text,
-                    })
+        if mode == "fast":
+            chunk_size = chunk_size or FAST_MODE_CHUNK_SIZE
+        result = get_page_results(path, kind, pages, get_workers(workers), chunk_size)
+        complete = len({r["page"] for r in result}) == count_pages(path)
+        index_text(file_url, path, result, source="extract", complete=complete)
 
-        return {"success": True, "data": {"pages": result}}
+        return {"success": True, "data": {"pages": result, **page_info}}
     except Exception as e:
         frappe.log_error(f"extract_text error: {e}")
         return {"success": False, "error": str(e)}
 
 
 @frappe.whitelist()
-def extract_tables(file_url, page_numbers=None):
-    """Extract tables from PDF pages using pdfplumber."""
-    try:
-        import pdfplumber
+def extract_tables(
+    file_url,
+    page_numbers=None,
+    workers=None,
+    chunk_size=None,
+    page_size=None,
+    cursor=None,
+    engine="pdfplumber",
+):
+    """Extract tables from PDF pages using pdfplumber.
+
+    Per-page results are cached, so repeated calls on a file only analyse
+    pages not seen before.
 
+    Args:
+        file_url: Source PDF file URL
+        page_numbers: Optional pages, e.g. "1-3,7" or a list of page numbers
+        workers: Processes to spread pages across (see extract_text)
+        chunk_size: Pages handled per worker task
+        page_size: Scan at most this many pages plus return a `next_cursor`
+        cursor: `next_cursor` from the previous call, to continue paging
+        engine: "pdfplumber" (any table) or "lines" (bordered tables only;
+            much faster on pages drawn with many line segments)
+    """
+    try:
+        kind = _table_kind(engine)
         path = get_file_path(file_url)
-        result = []
-
-        with pdfplumber.open(path) as pdf:
-            pages = _parse_page_numbers(page_numbers, len(pdf.pages))
-
-            for page_num in pages:
-                if 0 <= page_num < len(pdf.pages):
-                    page = pdf.pages[page_num]
-                    tables = page.extract_tables() or []
-                    for i, table in enumerate(tables):
-                        result.append({
-                            "page": page_num + 1,
-                            "table_index": i,
-                            "rows": table,
-                        })
+        pages, page_info = _page_window(path, page_numbers, page_size, cursor)
+        items = get_page_results(path, kind, pages, get_workers(workers), chunk_size)
+        result = _flatten("tables", items)
 
-        return {"success": True, "data": {"tables": result, "count": len(result)}}
+        return {"success": True, "data": {"tables": result, "count": len(result), **page_info}}
     except Exception as e:
         frappe.log_error(f"extract_tables error: {e}")
         return {"success": False, "error": str(e)}
 
 
 @frappe.whitelist()
-def extract_images(file_url, page_numbers=None):
-    """Extract image metadata from PDF pages."""
+def export_tables(
+    file_url,
+    page_numbers=None,
+    format="csv",
+    workers=None,
+    output_filename=None,
+    engine="pdfplumber",
+):
+    """Export tables as typed, columnar files — one per logical table.
+
+    Header rows are detected and tables continuing onto the next page are
+    joined. Columns are typed as int, float, date or string, and every table
+    gets a leading `page` column. Rows are written page by page.
+
+    Args:
+        file_url: Source PDF file URL
+        page_numbers: Optional pages, e.g. "1-3,7"
+        format: "csv", "parquet" or "arrow" (Arrow IPC file); the last two
+            need pyarrow
+        workers: Processes to spread extraction across (see extract_text)
+        output_filename: Base name for the exported files
+        engine: Table engine (see extract_tables)
+
+    Small CSV exports are returned inline as `content`; everything else is
+    saved as a File and returned as `file_url`.
+    """
     try:
-        import pikepdf
+        kind = _table_kind(engine)
+        if format not in table_export.FORMATS:
+            frappe.throw(f"Invalid table export format: {format}")
+        if format != "csv":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                frappe.throw(f"{format} export requires the pyarrow package")
+
+        path = get_file_path(file_url)
+        pages = valid_pages(path, page_numbers)
+        workers = get_workers(workers)
+
+        planner = table_export.TablePlanner()
+        for items in _page_windows(path, kind, pages, workers):
+            for item in items:
+                planner.add_page(item)
+        tables = planner.finish()
+
+        temp_paths = {table["index"]: get_temp_path(f".{table_export.FORMATS[format]}") for table in tables}
+        try:
+            # Writers open at a table's first page and close after its last,
+            # so only tables spanning the current page hold a file open
+            writers = {}
+            try:
+                for items in _page_windows(path, kind, pages, workers):
+                    for item in items:
+                        for table, rows in planner.rows_for_page(item):
+                            index = table["index"]
+                            if index not in writers:
+                                writers[index] = table_export.open_writer(format, temp_paths[index], table)
+                            writers[index].write_rows(rows)
+                            if item["page"] == table["pages"][-1]:
+                                writers.pop(index).close()
+            finally:
+                for writer in writers.values():
+                    writer.close()
+
+            base = output_filename or file_url.split("/")[-1].rsplit(".", 1)[0]
+            result = [
+                _export_table_output(table, temp_paths[table["index"]], format, base)
+                for table in tables
+            ]
+        finally:
+            for temp_path in temp_paths.values():
+                cleanup_temp(temp_path)
+
+        return {"success": True, "data": {"tables": result, "count": len(result)}}
+    except Exception as e:
+        frappe.log_error(f"export_tables error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def _export_table_output(table, path, format, base):
+    output = {
+        "table_index": table["index"],
+        "pages": sorted(set(table["pages"])),
+        "rows": table["row_count"],
+        "columns": [
+            {"name": name, "type": column_type}
+            for name, column_type in zip(table["columns"], ["int"] + table["types"])
+        ],
+    }
+    with open(path, "rb") as f:
+        content = f.read()
+
+    if format == "csv" and len(content) <= INLINE_EXPORT_BYTES:
+        output["content"] = content.decode("utf-8")
+    else:
+        filename = f"{base}_table{table['index'] + 1}.{table_export.FORMATS[format]}"
+        output["file_url"] = save_file_to_frappe(content, filename)
+    return output
 
+
+@frappe.whitelist()
+def extract_images(file_url, page_numbers=None, page_size=None, cursor=None):
+    """Extract image metadata from PDF pages.
+
+    Args:
+        file_url: Source PDF file URL
+        page_numbers: Optional pages, e.g. "1-3,7" or a list of page numbers
+        page_size: Scan at most this many pages plus return a `next_cursor`
+        cursor: `next_cursor` from the previous call, to continue paging
+    """
+    try:
         path = get_file_path(file_url)
-        result = []
-
-        with pikepdf.open(path) as pdf:
-            pages = _parse_page_numbers(page_numbers, len(pdf.pages))
-
-            for page_num in pages:
-                if 0 <= page_num < len(pdf.pages):
-                    page = pdf.pages[page_num]
-                    resources = page.get("/Resources", {})
-                    xobjects = resources.get("/XObject", {})
-
-                    for name, obj in xobjects.items():
-                        if obj.get("/Subtype") == "/Image":
-                            result.append({
-                                "page": page_num + 1,
-                                "name": str(name),
-                                "width": int(obj.get("/Width", 0)),
-                                "height": int(obj.get("/Height", 0)),
-                                "color_space": str(obj.get("/ColorSpace", "")),
-                            })
-
-        return {"success": True, "data": {"images": result, "count": len(result)}}
+        pages, page_info = _page_window(path, page_numbers, page_size, cursor)
+        result = _flatten("images", get_page_results(path, "images", pages))
+
+        return {"success": True, "data": {"images": result, "count": len(result), **page_info}}
     except Exception as e:
         frappe.log_error(f"extract_images error: {e}")
         return {"success": False, "error": str(e)}
 
 
-def _parse_page_numbers(page_numbers, total_pages):
-    """Parse page numbers string into list of 0-indexed page numbers."""
-    if not page_numbers:
-        return list(range(total_pages))
+@frappe.whitelist()
+def export_images(file_url, page_numbers=None, save=0, output_filename=None):
+    """Export the images in a PDF as a ZIP of image files.
+
+    JPEG and JPEG 2000 images are written out as stored in the PDF; other
+    images are decoded to PNG/TIFF. Images inside Form XObjects are included
+    and an image shared by several pages is exported once. The archive also
+    holds a manifest.json describing each image.
+
+    Args:
+        file_url: Source PDF file URL
+        page_numbers: Optional pages, e.g. "1-3,7"
+        save: 1 to store the ZIP as a File and return its URL instead of
+            downloading it
+        output_filename: Name for the ZIP
+    """
+    try:
+        path = get_file_path(file_url)
+        pages = valid_pages(path, page_numbers)
+        filename = output_filename or "images.zip"
+
+        if not frappe.utils.cint(save):
+            return zip_response(_image_entries(path, pages), filename)
+
+        zip_path = get_temp_path(".zip")
+        try:
+            with open(zip_path, "wb") as f:
+                for chunk in iter_zip(_image_entries(path, pages)):
+                    f.write(chunk)
+            with open(zip_path, "rb") as f:
+                result_url = save_file_to_frappe(f.read(), filename)
+        finally:
+            cleanup_temp(zip_path)
+
+        return {"success": True, "data": {"file_url": result_url}}
+    except Exception as e:
+        frappe.log_error(f"export_images error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def _image_entries(path, pages):
+    """Yield (zip name, bytes) for each distinct image, then the manifest."""
+    import pikepdf
+
+    manifest = []
+    visited = set()
+    with pikepdf.open(path) as pdf:
+        for page_num in pages:
+            # Nested forms often reuse resource names (/Im0), so number images per page
+            images = iter_page_images(pdf.pages[page_num], visited)
+            for index, (name, xobject) in enumerate(images, 1):
+                info = {"page": page_num + 1, **image_info(name, xobject)}
+                try:
+                    extension, data = export_image(xobject)
+                except Exception as e:
+                    manifest.append({**info, "error": str(e)})
+                    continue
+
+                info["file"] = f"page{page_num + 1:04d}_{index:03d}_{name.lstrip('/')}.{extension}"
+                manifest.append(info)
+                yield info["file"], data
+
+    yield "manifest.json", json.dumps(manifest, indent=1).encode()
+
+
+@frappe.whitelist()
+def stream_extraction(file_url, kind="text", page_numbers=None, mode="layout", workers=None):
+    """Download extraction results as NDJSON, produced page window by page window.
+
+    Args:
+        file_url: Source PDF file URL
+        kind: "text", "tables" or "images" — one JSON line per page, table
+            or image respectively
+        page_numbers: Optional pages, e.g. "1-3,7"
+        mode: Text mode for kind="text" ("layout" or "fast")
+        workers: Processes to spread each window across
+
+    Server memory stays bounded by one window of pages.
+    """
+    try:
+        if kind == "text":
+            cache_kind = _text_kind(mode)
+        elif kind in ("tables", "images"):
+            cache_kind = kind
+        else:
+            frappe.throw(f"Invalid extraction kind: {kind}")
+
+        path = get_file_path(file_url)
+        pages = valid_pages(path, page_numbers)
+        records = _stream_records(
+            path, kind, cache_kind, pages, get_workers(workers), get_extract_cache()
+        )
+        return ndjson_response(records, filename=f"{kind}.ndjson")
+    except Exception as e:
+        frappe.log_error(f"stream_extraction error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def benchmark_tables(file_urls=None, limit=20, max_pages=50):
+    """Compare the "pdfplumber" and "lines" table engines on stored PDFs.
+
+    Run from the command line, e.g.:
+        bench --site <site> execute pdf_suite.api.extract.benchmark_tables --kwargs "{'limit': 50}"
+
+    Args:
+        file_urls: PDF file URLs to test (default: the `limit` newest PDF Files)
+        limit: Number of Files to sample when file_urls is not given
+        max_pages: Pages tested per file
+    """
+    from pdf_suite.utils.ruled_tables import compare_engines
+
+    if isinstance(file_urls, str):
+        file_urls = json.loads(file_urls)
+    if not file_urls:
+        file_urls = frappe.get_all(
+            "File",
+            filters={"is_folder": 0, "file_name": ["like", "%.pdf"]},
+            order_by="creation desc",
+            limit=frappe.utils.cint(limit),
+            pluck="file_url",
+        )
+
+    files, totals = [], {}
+    for file_url in file_urls:
+        try:
+            stats = compare_engines(get_file_path(file_url), frappe.utils.cint(max_pages) or None)
+        except Exception as e:
+            files.append({"file_url": file_url, "error": str(e)})
+            continue
+        files.append({"file_url": file_url, **stats})
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    totals = {key: round(value, 1) for key, value in totals.items()}
+    if totals.get("lines_ms"):
+        totals["speedup"] = round(totals["pdfplumber_ms"] / totals["lines_ms"], 1)
+    return {"files": files, "totals": totals}
 
-    if isinstance(page_numbers, list):
-        return [int(p) - 1 for p in page_numbers]
 
-    pages = []
-    for part in str(page_numbers).split(","):
-        part = part.strip()
-        if "-" in part:
-            start, end = part.split("-", 1)
-            pages.extend(range(int(start) - 1, int(end)))
+def _stream_records(path, kind, cache_kind, pages, workers, cache):
+    # Runs while the response is sent: no frappe calls in here
+    for items in _page_windows(path, cache_kind, pages, workers, cache):
+        if kind == "text":
+            yield from items
         else:
-            pages.append(int(part) - 1)
+            yield from _flatten(kind, items)
+
+
+def _page_windows(path, kind, pages, workers, cache=None):
+    """Yield cached extraction results STREAM_WINDOW pages at a time."""
+    for start in range(0, len(pages), STREAM_WINDOW):
+        window = pages[start : start + STREAM_WINDOW]
+        yield get_page_results(path, kind, window, workers, cache=cache)
+
+
+def _flatten(kind, items):
+    """Turn per-page cache entries into one record per table or image."""
+    result = []
+    for item in items:
+        for i, entry in enumerate(item[kind]):
+            if kind == "tables":
+                result.append({"page": item["page"], "table_index": i, "rows": entry})
+            else:
+                result.append({"page": item["page"], **entry})
+    return result
+
+
+def _extract_text_pages(path, page_numbers=None, workers=None, chunk_size=None, mode="layout"):
+    """Return [{page, text}] for the requested pages of a PDF."""
+    kind = _text_kind(mode)
+    if mode == "fast":
+        chunk_size = chunk_size or FAST_MODE_CHUNK_SIZE
+
+    pages = valid_pages(path, page_numbers)
+    return get_page_results(path, kind, pages, get_workers(workers), chunk_size)
+
+
+def _text_kind(mode):
+    if mode not in TEXT_MODES:
+        frappe.throw(f"Invalid text extraction mode: {mode}")
+    return TEXT_MODES[mode]
+
+
+def _table_kind(engine):
+    if engine not in TABLE_ENGINES:
+        frappe.throw(f"Invalid table engine: {engine}")
+    return TABLE_ENGINES[engine]
+
+
+def _page_window(path, page_numbers, page_size=None, cursor=None):
+    """Select the pages for this call, honouring cursor pagination.
+
+    Returns (pages, page_info) where page_info is empty for unpaginated calls
+    and otherwise holds total_pages and next_cursor (None on the last window).
+    """
+    pages = valid_pages(path, page_numbers)
+    if not page_size and not cursor:
+        return pages, {}
+
+    content_hash = get_content_hash(path)
+    offset = _decode_cursor(cursor, content_hash) if cursor else 0
+    page_size = min(max(1, frappe.utils.cint(page_size) or 50), MAX_PAGE_SIZE)
+
+    window = pages[offset : offset + page_size]
+    next_offset = offset + len(window)
+    next_cursor = _encode_cursor(next_offset, content_hash) if next_offset < len(pages) else None
+
+    return window, {"total_pages": len(pages), "next_cursor": next_cursor}
+
+
+def _encode_cursor(offset, content_hash):
+    token = json.dumps({"o": offset, "h": content_hash[:16]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor, content_hash):
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset, cursor_hash = int(token["o"]), token["h"]
+    except (ValueError, KeyError, TypeError):
+        frappe.throw("Invalid cursor")
 
-    return sorted(set(pages))
+    if cursor_hash != content_hash[:16]:
+        frappe.throw("The file has changed since this cursor was issued; start again without a cursor")
+    return max(0, offset)
@@ -90,8 +90,8 @@ def merge_pdfs_with_options(file_configs, output_filename=None):
                 src = pikepdf.open(path)
 
                 if page_range:
-                    from pdf_suite.api.extract import _parse_page_numbers
-                    page_nums = _parse_page_numbers(page_range, len(src.pages))
+                    from pdf_suite.utils.pdf_utils import parse_page_numbers
+                    page_nums = parse_page_numbers(page_range, len(src.pages))
                     pages = [src.pages[i] for i in page_nums if i < len(src.pages)]
                 else:
                     pages = list(src.pages)
@@ -1,116 +1,199 @@
-"""PDF OCR APIs using pytesseract."""
+"""PDF OCR APIs using Tesseract (tesserocr engine pool, pytesseract fallback)."""
 import os
-import io
+import json
 import frappe
-from pdf_suite.utils.file_utils import get_file_path, save_file_to_frappe, get_temp_path, cleanup_temp
+from pdf_suite.utils.file_utils import (
+    get_file_path,
+    save_file_to_frappe,
+    get_temp_path,
+    get_temp_dir,
+    cleanup_temp,
+)
+from pdf_suite.utils.cache import get_disk_cache, hash_key
+from pdf_suite.utils.ocr_engine import engine_name, normalize_language, recognize
+from pdf_suite.utils import ocr_preprocess
+
+# Bump when the stored OCR result format changes
+OCR_CACHE_VERSION = 1
+
+# Pages rasterized per pdftoppm call
+RASTER_CHUNK_PAGES = 8
+
+# Background jobs: RQ timeout and how long per-page text stays pollable
+OCR_JOB_TIMEOUT = 4 * 60 * 60
+OCR_JOB_TEXT_TTL = 24 * 60 * 60
+
+# Unicode TTF used for the invisible text layer (Helvetica cannot encode Arabic)
+TEXT_LAYER_FONTS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+]
+
+_text_layer_font = None
 
 
 @frappe.whitelist()
-def ocr_pdf(file_url, language="eng", output_filename=None):
+def ocr_pdf(
+    file_url,
+    language="eng",
+    output_filename=None,
+    dpi=300,
+    use_cache=1,
+    preprocess=0,
+    background=0,
+):
     """OCR a scanned PDF and create a searchable PDF.
 
     Args:
         file_url: Source PDF file URL
         language: Tesseract language code (eng, ara, eng+ara)
         output_filename: Optional output filename
+        dpi: Rasterization resolution for OCR
+        use_cache: Reuse OCR results for pages already recognized
+        preprocess: 1 to clean up scans before OCR, or JSON dict of
+            preprocessing options (see utils.ocr_preprocess.DEFAULT_OPTIONS)
+        background: 1 to run as a background job and return its job id;
+            poll get_ocr_job or listen for "pdf_suite_ocr_progress" events
     """
     try:
-        import pytesseract
-        from PIL import Image
-        from reportlab.pdfgen import canvas as rl_canvas
-        from reportlab.lib.pagesizes import A4
-        import pikepdf
-        import subprocess
+        options = {
+            "language": language,
+            "output_filename": output_filename,
+            "dpi": int(dpi),
+            "use_cache": frappe.utils.cint(use_cache),
+            "preprocess": ocr_preprocess.normalize_options(preprocess),
+        }
 
-        path = get_file_path(file_url)
-        output_filename = output_filename or "ocr_output.pdf"
+        if frappe.utils.cint(background):
+            return _enqueue_ocr_job(file_url, options)
 
-        # Convert PDF pages to images using poppler (pdftoppm)
-        temp_dir = get_temp_path(suffix="")
-        os.makedirs(temp_dir, exist_ok=True)
+        data = _ocr_document(get_file_path(file_url), index_url=file_url, **options)
+        return {"success": True, "data": data}
 
-        try:
-            # Use pdftoppm to convert PDF to images
-            subprocess.run(
-                ["pdftoppm", "-png", "-r", "300", path, os.path.join(temp_dir, "page")],
-                check=True,
-                capture_output=True,
-            )
+    except Exception as e:
+        frappe.log_error(f"ocr_pdf error: {e}")
+        return {"success": False, "error": str(e)}
 
-            # Find all generated page images
-            images = sorted(
-                [f for f in os.listdir(temp_dir) if f.startswith("page") and f.endswith(".png")]
-            )
 
-            if not images:
-                return {"success": False, "error": "Failed to convert PDF to images"}
+@frappe.whitelist()
+def get_ocr_job(job_id, from_page=1):
+    """Get progress of a background OCR job.
 
-            # OCR each page and create searchable PDF
-            all_text = []
-            pdf_pages = []
+    Args:
+        job_id: Job id returned by ocr_pdf(background=1)
+        from_page: First page whose recognized text should be returned, so
+            clients can poll incrementally as pages finish
+    """
+    try:
+        doc = frappe.get_doc("PDF Batch Job", job_id)
+        doc.check_permission("read")
 
-            for img_file in images:
-                img_path = os.path.join(temp_dir, img_file)
-                img = Image.open(img_path)
-
-                # Extract text
-                text = pytesseract.image_to_string(img, lang=language)
-                all_text.append(text)
-
-                # Create searchable PDF page
-                pdf_bytes = pytesseract.image_to_pdf_or_hocr(img, lang=language, extension="pdf")
-                pdf_pages.append(pdf_bytes)
-
-            # Merge all OCR'd pages
-            merged = pikepdf.Pdf.new()
-            for page_bytes in pdf_pages:
-                page_pdf = pikepdf.open(io.BytesIO(page_bytes))
-                merged.pages.extend(page_pdf.pages)
-
-            temp_output = get_temp_path()
-            merged.save(temp_output)
-            merged.close()
-
-            with open(temp_output, "rb") as f:
-                content = f.read()
-
-            url = save_file_to_frappe(content, output_filename)
-            cleanup_temp(temp_output)
-
-            return {
-                "success": True,
-                "data": {
-                    "file_url": url,
-                    "filename": output_filename,
-                    "pages_processed": len(images),
-                    "text_preview": all_text[0][:500] if all_text else "",
-                },
-            }
-        finally:
-            # Clean up temp directory
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        from_page = max(1, frappe.utils.cint(from_page))
+        pages = []
+        for page in range(from_page, (doc.processed_pages or 0) + 1):
+            text = frappe.cache.get_value(_page_text_key(doc.name, page))
+            if text is None:
+                break
+            pages.append({"page": page, "text": text})
 
+        results = json.loads(doc.results or "[]")
+        return {
+            "success": True,
+            "data": {
+                "job_id": doc.name,
+                "status": doc.status,
+                "total_pages": doc.total_pages or 0,
+                "processed_pages": doc.processed_pages or 0,
+                "pages": pages,
+                "result": results[0] if results else None,
+                "error": doc.error_message or "",
+            },
+        }
+    except frappe.DoesNotExistError:
+        return {"success": False, "error": "OCR job not found"}
     except Exception as e:
-        frappe.log_error(f"ocr_pdf error: {e}")
         return {"success": False, "error": str(e)}
 
 
+def run_ocr_job(job_id):
+    """Run a background OCR job (called via frappe.enqueue)."""
+    doc = frappe.get_doc("PDF Batch Job", job_id)
+    try:
+        doc.status = "Processing"
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+
+        file_url = json.loads(doc.file_urls)[0]
+        options = json.loads(doc.options or "{}")
+
+        def on_page(page, total_pages, text):
+            frappe.cache.set_value(_page_text_key(job_id, page), text, expires_in_sec=OCR_JOB_TEXT_TTL)
+            frappe.db.set_value(
+                "PDF Batch Job",
+                job_id,
+                {"processed_pages": page, "total_pages": total_pages},
+                update_modified=False,
+            )
+            frappe.db.commit()
+            frappe.publish_realtime(
+                "pdf_suite_ocr_progress",
+                {"job_id": job_id, "page": page, "total_pages": total_pages, "text": text},
+                user=doc.owner,
+            )
+
+        data = _ocr_document(get_file_path(file_url), on_page=on_page, index_url=file_url, **options)
+
+        doc.reload()
+        doc.status = "Completed"
+        doc.processed_files = 1
+        doc.results = json.dumps([{"success": True, "data": data}])
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+        frappe.publish_realtime(
+            "pdf_suite_ocr_progress",
+            {"job_id": job_id, "status": "Completed", "data": data},
+            user=doc.owner,
+        )
+
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(f"run_ocr_job error: {e}")
+        doc.reload()
+        doc.status = "Failed"
+        doc.error_message = str(e)
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+        frappe.publish_realtime(
+            "pdf_suite_ocr_progress",
+            {"job_id": job_id, "status": "Failed", "error": str(e)},
+            user=doc.owner,
+        )
+
+
 @frappe.whitelist()
-def ocr_image_to_text(file_url, language="eng"):
+def ocr_image_to_text(file_url, language="eng", use_cache=1, preprocess=0):
     """OCR an image file and return extracted text.
 
     Args:
         file_url: Image file URL (PNG, JPG, TIFF)
         language: Tesseract language code
+        use_cache: Reuse the OCR result if this image was recognized before
+        preprocess: 1 or JSON dict of preprocessing options, as for ocr_pdf
     """
     try:
-        import pytesseract
         from PIL import Image
 
         path = get_file_path(file_url)
-        img = Image.open(path)
-        text = pytesseract.image_to_string(img, lang=language)
+        with Image.open(path) as img:
+            result, _hit = _recognize_page(
+                img,
+                language,
+                img.info.get("dpi"),
+                ocr_preprocess.normalize_options(preprocess),
+                frappe.utils.cint(use_cache),
+            )
+            text = result["text"]
 
         return {
             "success": True,
@@ -119,3 +202,220 @@ def ocr_image_to_text(file_url, language="eng"):
     except Exception as e:
         frappe.log_error(f"ocr_image_to_text error: {e}")
         return {"success": False, "error": str(e)}
+
+
+def _enqueue_ocr_job(file_url, options):
+    get_file_path(file_url)
+
+    doc = frappe.get_doc({
+        "doctype": "PDF Batch Job",
+        "operation": "ocr",
+        "status": "Queued",
+        "total_files": 1,
+        "processed_files": 0,
+        "file_urls": json.dumps([file_url]),
+        "options": json.dumps(options),
+        "owner": frappe.session.user,
+    })
+    doc.insert(ignore_permissions=True)
+    frappe.db.commit()
+
+    frappe.enqueue(
+        "pdf_suite.api.ocr.run_ocr_job",
+        job_id=doc.name,
+        queue="long",
+        timeout=OCR_JOB_TIMEOUT,
+    )
+
+    return {
+        "success": True,
+        "data": {"job_id": doc.name, "status": "Queued", "message": "OCR job started"},
+    }
+
+
+def _ocr_document(
+    path,
+    language="eng",
+    output_filename=None,
+    dpi=300,
+    use_cache=1,
+    preprocess=None,
+    on_page=None,
+    index_url=None,
+):
+    """OCR every page of a PDF into a searchable PDF saved as a Frappe File.
+
+    Pages are rasterized a few at a time so disk use stays bounded and
+    `on_page(page, total_pages, text)` can report progress as each page finishes.
+    When `index_url` is given, the recognized text is added to the search
+    index under that file URL.
+    """
+    from PIL import Image
+    from reportlab.pdfgen import canvas as rl_canvas
+    import pikepdf
+    import shutil
+    import subprocess
+
+    output_filename = output_filename or "ocr_output.pdf"
+
+    with pikepdf.open(path) as pdf:
+        total_pages = len(pdf.pages)
+    if not total_pages:
+        frappe.throw("PDF has no pages")
+
+    all_text = []
+    cache_hits = 0
+    timings = {}
+    temp_dir = get_temp_dir()
+    temp_output = get_temp_path()
+
+    try:
+        c = rl_canvas.Canvas(temp_output)
+
+        for first in range(1, total_pages + 1, RASTER_CHUNK_PAGES):
+            last = min(first + RASTER_CHUNK_PAGES - 1, total_pages)
+
+            # Use pdftoppm to convert this chunk of pages to images
+            subprocess.run(
+                [
+                    "pdftoppm", "-png", "-r", str(dpi), "-f", str(first), "-l", str(last),
+                    path, os.path.join(temp_dir, "page"),
+                ],
+                check=True,
+                capture_output=True,
+            )
+
+            images = sorted(
+                [f for f in os.listdir(temp_dir) if f.startswith("page") and f.endswith(".png")]
+            )
+            if not images:
+                frappe.throw("Failed to convert PDF to images")
+
+            # OCR each page and draw it with an invisible text layer
+            for img_file in images:
+                img_path = os.path.join(temp_dir, img_file)
+                with Image.open(img_path) as img:
+                    result, hit = _recognize_page(img, language, dpi, preprocess, use_cache, timings)
+                    cache_hits += hit
+
+                all_text.append(result["text"])
+                _draw_searchable_page(c, img_path, result, dpi)
+                os.remove(img_path)
+
+                if on_page:
+                    on_page(len(all_text), total_pages, result["text"])
+
+        c.save()
+
+        with open(temp_output, "rb") as f:
+            content = f.read()
+
+        url = save_file_to_frappe(content, output_filename)
+
+        if index_url:
+            from pdf_suite.api.search import index_text
+
+            pages = [{"page": i + 1, "text": text} for i, text in enumerate(all_text)]
+            index_text(index_url, path, pages, source="ocr", complete=True)
+
+        return {
+            "file_url": url,
+            "filename": output_filename,
+            "pages_processed": len(all_text),
+            "cache_hits": cache_hits,
+            "preprocess_timings": timings,
+            "text_preview": all_text[0][:500] if all_text else "",
+        }
+    finally:
+        cleanup_temp(temp_output)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _page_text_key(job_id, page):
+    return f"pdf_suite:ocr_job:{job_id}:{page}"
+
+
+def _recognize_page(img, language, dpi, preprocess_options=None, use_cache=True, timings=None):
+    """OCR one page image with optional preprocessing, reusing cached results.
+
+    Word boxes are always returned in `img` pixels. Returns (result, 1 if it
+    came from the cache else 0).
+    """
+    key = None
+    if use_cache:
+        cache = get_disk_cache("ocr", max_mb=512)
+        key = hash_key(
+            "ocr",
+            OCR_CACHE_VERSION,
+            engine_name(),
+            normalize_language(language),
+            dpi,
+            json.dumps(preprocess_options, sort_keys=True) if preprocess_options else "",
+            img.mode,
+            img.size,
+            img.tobytes(),
+        )
+        result = cache.get_json(key)
+        if result is not None:
+            return result, 1
+
+    if preprocess_options:
+        prepared, transform, step_timings = ocr_preprocess.preprocess(img, preprocess_options)
+        result = recognize(prepared, language)
+        result["words"] = ocr_preprocess.map_words_to_source(result["words"], transform)
+        result["width"], result["height"] = img.size
+        if timings is not None:
+            for step, ms in step_timings.items():
+                timings[step] = round(timings.get(step, 0) + ms, 2)
+    else:
+        result = recognize(img, language)
+
+    if key:
+        cache.set_json(key, result)
+    return result, 0
+
+
+def _draw_searchable_page(c, img_path, result, dpi):
+    """Draw a page image plus its OCR words as invisible, selectable text."""
+    from reportlab.pdfbase import pdfmetrics
+
+    scale = 72.0 / dpi
+    page_width = result["width"] * scale
+    page_height = result["height"] * scale
+    font = _get_text_layer_font()
+
+    c.setPageSize((page_width, page_height))
+    c.drawImage(img_path, 0, 0, width=page_width, height=page_height)
+
+    text = c.beginText()
+    text.setTextRenderMode(3)
+    for word in result["words"]:
+        box_width = (word["x1"] - word["x0"]) * scale
+        box_height = (word["bottom"] - word["top"]) * scale
+        if box_width <= 0 or box_height <= 0:
+            continue
+
+        # Stretch each word horizontally so selection matches the scanned glyphs
+        natural_width = pdfmetrics.stringWidth(word["text"], font, box_height)
+        text.setFont(font, box_height)
+        text.setHorizScale(100.0 * box_width / natural_width if natural_width else 100.0)
+        text.setTextOrigin(word["x0"] * scale, page_height - word["bottom"] * scale)
+        text.textOut(word["text"])
+
+    c.drawText(text)
+    c.showPage()
+
+
+def _get_text_layer_font():
+    global _text_layer_font
+    if _text_layer_font is None:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        _text_layer_font = "Helvetica"
+        for font_path in TEXT_LAYER_FONTS:
+            if os.path.exists(font_path):
+                pdfmetrics.registerFont(TTFont("PdfSuiteOCR", font_path))
+                _text_layer_font = "PdfSuiteOCR"
+                break
+    return _text_layer_font
@@ -0,0 +1,93 @@
+"""Page thumbnail and preview image APIs for the PDF studio."""
+import frappe
+from werkzeug.wrappers import Response
+from pdf_suite.utils.file_utils import get_file_path, get_content_hash
+from pdf_suite.utils.page_render import ZOOM_LEVELS, get_page_image, render_pages
+from pdf_suite.utils.pdf_utils import count_pages
+
+IMAGE_URL = "/api/method/pdf_suite.api.preview.page_image"
+
+# Responses for URLs carrying the file's version never change
+IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+
+
+@frappe.whitelist()
+def get_previews(file_url, level="thumb"):
+    """List image URLs for every page of a PDF at a zoom level.
+
+    The URLs include the file's content version, so browsers can cache the
+    images indefinitely and a changed file gets new URLs.
+
+    Args:
+        file_url: Source PDF file URL
+        level: Zoom level: "thumb", "small", "preview" or "large"
+    """
+    try:
+        _check_level(level)
+        path = get_file_path(file_url)
+        version = _version(path)
+        total = count_pages(path)
+
+        urls = [
+            f"{IMAGE_URL}?{_query(file_url=file_url, page=page, level=level, v=version)}"
+            for page in range(1, total + 1)
+        ]
+        return {
+            "success": True,
+            "data": {"total_pages": total, "version": version, "levels": list(ZOOM_LEVELS), "urls": urls},
+        }
+    except Exception as e:
+        frappe.log_error(f"get_previews error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def page_image(file_url, page=1, level="thumb", v=None):
+    """Return a PNG of one page, rendered once per zoom level and cached.
+
+    Args:
+        file_url: Source PDF file URL
+        page: Page number (1-based)
+        level: Zoom level (see get_previews)
+        v: File version from get_previews; when it matches, the response is
+            cacheable for a year
+    """
+    try:
+        _check_level(level)
+        path = get_file_path(file_url)
+        page = frappe.utils.cint(page)
+        if page < 1 or page > count_pages(path):
+            frappe.throw(f"Page {page} does not exist")
+
+        version = _version(path)
+        response = Response(get_page_image(path, page, level), mimetype="image/png")
+        if v == version:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE
+        else:
+            response.headers["Cache-Control"] = "private, no-cache"
+        response.set_etag(f"{version}-{page}-{level}")
+        return response.make_conditional(frappe.request)
+    except Exception as e:
+        frappe.log_error(f"page_image error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def prerender_thumbnails(file_url, max_pages=200):
+    """Render thumbnails for the first `max_pages` pages (background job)."""
+    path = get_file_path(file_url)
+    render_pages(path, list(range(1, min(count_pages(path), max_pages) + 1)), "thumb")
+
+
+def _check_level(level):
+    if level not in ZOOM_LEVELS:
+        frappe.throw(f"Invalid zoom level: {level}")
+
+
+def _version(path):
+    return get_content_hash(path)[:16]
+
+
+def _query(**params):
+    from urllib.parse import urlencode
+
+    return urlencode(params)
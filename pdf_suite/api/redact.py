@@ -1,20 +1,24 @@
 """PDF redaction APIs — client marks areas, server removes content."""
-import io
 import frappe
 import pikepdf
-from reportlab.pdfgen import canvas
-from reportlab.lib.colors import white
 from pdf_suite.utils.file_utils import get_file_path, save_file_to_frappe, get_temp_path, cleanup_temp
+from pdf_suite.utils.content_redact import remove_content
+from pdf_suite.utils.pdf_utils import paint_rectangles
+
+# "cover" paints boxes over content; "remove" also strips what is under them
+REDACTION_MODES = ("cover", "remove")
 
 
 @frappe.whitelist()
-def redact_areas(file_url, redactions, output_filename=None):
-    """Redact specified areas by overlaying white rectangles and flattening.
+def redact_areas(file_url, redactions, output_filename=None, mode="cover"):
+    """Redact specified areas by painting white rectangles over the page content.
 
     Args:
         file_url: Source PDF file URL
         redactions: JSON list of {page, x, y, width, height} (coordinates in PDF points)
         output_filename: Optional output filename
+        mode: "cover" paints the boxes only; "remove" also deletes the text
+            and image pixels under them from the page content
     """
     try:
         if isinstance(redactions, str):
@@ -23,6 +27,8 @@ def redact_areas(file_url, redactions, output_filename=None):
 
         if not redactions:
             return {"success": False, "error": "No redaction areas specified"}
+        if mode not in REDACTION_MODES:
+            return {"success": False, "error": f"Unknown redaction mode: {mode}"}
 
         path = get_file_path(file_url)
         output_filename = output_filename or "redacted.pdf"
@@ -33,41 +39,15 @@ def redact_areas(file_url, redactions, output_filename=None):
                 # Group redactions by page
                 by_page = {}
                 for r in redactions:
-                    page_num = int(r["page"]) - 1
-                    if page_num not in by_page:
-                        by_page[page_num] = []
-                    by_page[page_num].append(r)
-
-                for page_num, page_redactions in by_page.items():
-                    if page_num >= len(pdf.pages):
-                        continue
-
-                    page = pdf.pages[page_num]
-                    box = page.mediabox
-                    page_width = float(box[2] - box[0])
-                    page_height = float(box[3] - box[1])
-
-                    # Create overlay PDF with white rectangles
-                    overlay_buf = io.BytesIO()
-                    c = canvas.Canvas(overlay_buf, pagesize=(page_width, page_height))
-                    c.setFillColor(white)
-                    c.setStrokeColor(white)
-
-                    for r in page_redactions:
-                        x = float(r["x"])
-                        y = float(r["y"])
-                        w = float(r["width"])
-                        h = float(r["height"])
-                        c.rect(x, y, w, h, fill=1, stroke=1)
-
-                    c.save()
-                    overlay_buf.seek(0)
-
-                    overlay_pdf = pikepdf.open(overlay_buf)
-                    overlay_page = overlay_pdf.pages[0]
-                    page.add_overlay(overlay_page)
-                    overlay_pdf.close()
-
+                    by_page.setdefault(int(r["page"]) - 1, []).append((
+                        float(r["x"]),
+                        float(r["y"]),
+                        float(r["width"]),
+                        float(r["height"]),
+                    ))
+
+                removed = remove_content(pdf, by_page) if mode == "remove" else None
+                paint_rectangles(pdf, by_page)
                 pdf.save(temp_path)
 
             with open(temp_path, "rb") as f:
@@ -80,6 +60,8 @@ def redact_areas(file_url, redactions, output_filename=None):
                     "file_url": url,
                     "filename": output_filename,
                     "redacted_areas": len(redactions),
+                    "mode": mode,
+                    "removed": removed,
                 },
             }
         finally:
@@ -91,44 +73,80 @@ def redact_areas(file_url, redactions, output_filename=None):
 
 
 @frappe.whitelist()
-def redact_text(file_url, search_text, output_filename=None):
+def redact_text(file_url, search_text, output_filename=None, mode="cover"):
     """Find and redact all occurrences of text in a PDF.
 
-    Uses pdfplumber to find text positions, then overlays white rectangles.
+    A single-term redact_patterns call: the term may span several words.
+    """
+    if not search_text:
+        return {"success": False, "error": "Search text required"}
+    return redact_patterns(file_url, terms=[search_text], output_filename=output_filename, mode=mode)
+
+
+@frappe.whitelist()
+def redact_patterns(file_url, terms=None, patterns=None, case_sensitive=0, page_numbers=None,
+                    apply=1, output_filename=None, workers=None, mode="cover"):
+    """Find many literal terms and regular expressions, and redact every match.
+
+    Page text comes from the shared extraction cache ("chars" kind, run in
+    parallel over uncached pages); all terms are matched in one scan per
+    page and the boxes are applied in a single pass over the PDF.
+
+    Args:
+        file_url: Source PDF file URL
+        terms: JSON list of literal strings (may span words and lines)
+        patterns: JSON list of regular expressions (Python syntax; up to
+            200 characters, without nested variable-length repeats, and
+            given 10 seconds of matching in total)
+        case_sensitive: 1 to match case exactly (default: ignore case)
+        page_numbers: Optional pages to search, e.g. "1-3,7"
+        apply: 0 to only return the match boxes, without writing a PDF
+        output_filename: Optional output filename
+        workers: Worker processes for extraction (default: CPU count, capped
+            by the pdf_suite_max_workers site config)
+        mode: "cover" or "remove" (see redact_areas)
     """
     try:
-        import pdfplumber
+        import json
+        from pdf_suite.utils.pdf_utils import get_workers, valid_pages
+        from pdf_suite.utils.extract_cache import get_page_results
+        from pdf_suite.utils.text_search import PatternMatcher, match_boxes
 
-        if not search_text:
-            return {"success": False, "error": "Search text required"}
+        if isinstance(terms, str):
+            terms = json.loads(terms)
+        if isinstance(patterns, str):
+            patterns = json.loads(patterns)
+        matcher = PatternMatcher(terms or [], patterns or [], frappe.utils.cint(case_sensitive))
 
         path = get_file_path(file_url)
-        output_filename = output_filename or "redacted.pdf"
+        pages = valid_pages(path, page_numbers)
 
         redactions = []
-        with pdfplumber.open(path) as plumber:
-            for i, page in enumerate(plumber.pages):
-                words = page.extract_words()
-                # Simple word-level search
-                search_lower = search_text.lower()
-                for word in words:
-                    if search_lower in word["text"].lower():
-                        redactions.append({
-                            "page": i + 1,
-                            "x": word["x0"],
-                            "y": page.height - word["top"] - (word["bottom"] - word["top"]),
-                            "width": word["x1"] - word["x0"],
-                            "height": word["bottom"] - word["top"],
-                        })
+        counts = {}
+        for page in get_page_results(path, "chars", pages, get_workers(workers)):
+            boxes, page_counts = match_boxes(page, matcher)
+            for x, y, width, height in boxes:
+                redactions.append({"page": page["page"], "x": x, "y": y, "width": width, "height": height})
+            for label, count in page_counts.items():
+                counts[label] = counts.get(label, 0) + count
 
         if not redactions:
             return {
                 "success": True,
-                "data": {"message": "No matches found", "redacted_areas": 0},
+                "data": {"message": "No matches found", "redacted_areas": 0, "matches": {}},
+            }
+
+        if not frappe.utils.cint(apply):
+            return {
+                "success": True,
+                "data": {"redactions": redactions, "redacted_areas": len(redactions), "matches": counts},
             }
 
-        return redact_areas(file_url, redactions, output_filename)
+        result = redact_areas(file_url, redactions, output_filename, mode)
+        if result["success"]:
+            result["data"]["matches"] = counts
+        return result
 
     except Exception as e:
-        frappe.log_error(f"redact_text error: {e}")
+        frappe.log_error(f"redact_patterns error: {e}")
         return {"success": False, "error": str(e)}
@@ -0,0 +1,91 @@
+"""Full-text search APIs over indexed PDF page text."""
+import frappe
+from pdf_suite.utils import search_index
+from pdf_suite.utils.file_utils import get_file_path, get_content_hash
+
+# Index rows fetched per round when skipping files the user cannot read
+SEARCH_BATCH = 100
+
+
+@frappe.whitelist()
+def search_pdfs(query, limit=20, offset=0):
+    """Search indexed PDF text.
+
+    Args:
+        query: Search terms (all must match; end a term with * for prefix search)
+        limit: Maximum results (up to 200)
+        offset: Results to skip, for paging
+
+    Returns matching pages with file URL, page number and a highlighted snippet.
+    """
+    try:
+        limit = min(max(1, frappe.utils.cint(limit)), 200)
+        results = _search_permitted(query, limit, max(0, frappe.utils.cint(offset)))
+        return {"success": True, "data": {"results": results, "count": len(results)}}
+    except Exception as e:
+        frappe.log_error(f"search_pdfs error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def index_pdf(file_url, force=0):
+    """Extract a PDF's text and add it to the search index.
+
+    Skipped when every page is already indexed at the file's current
+    content, unless `force` is set; a file indexed only in part (e.g. by
+    extract_text on a page range) gets its missing pages added.
+    """
+    try:
+        from pdf_suite.api.extract import _extract_text_pages
+
+        path = get_file_path(file_url)
+        if not frappe.utils.cint(force) and search_index.is_indexed(file_url, get_content_hash(path)):
+            return {"success": True, "data": {"file_url": file_url, "indexed": False, "message": "Already indexed"}}
+
+        pages = _extract_text_pages(path)
+        search_index.index_document(file_url, path, pages, source="extract", complete=True)
+        return {
+            "success": True,
+            "data": {"file_url": file_url, "indexed": True, "pages": len(pages)},
+        }
+    except Exception as e:
+        frappe.log_error(f"index_pdf error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def index_text(file_url, path, pages, source, complete=False):
+    """Index page text produced by another API without failing that API.
+
+    Pass complete=True only when `pages` covers the whole file.
+    """
+    try:
+        search_index.index_document(file_url, path, pages, source=source, complete=complete)
+    except Exception as e:
+        frappe.log_error(f"search index update error: {e}")
+
+
+def _search_permitted(query, limit, offset):
+    """Search in batches, filtering each by permission, until `limit` results past `offset`."""
+    wanted = offset + limit
+    batch_size = max(SEARCH_BATCH, wanted)
+    results = []
+    index_offset = 0
+    while len(results) < wanted:
+        batch = search_index.search(query, batch_size, index_offset)
+        results.extend(_filter_permitted(batch))
+        if len(batch) < batch_size:
+            break
+        index_offset += batch_size
+    return results[offset:wanted]
+
+
+def _filter_permitted(results):
+    """Drop results for files the current user cannot read."""
+    if not results or frappe.session.user == "Administrator":
+        return results
+
+    file_urls = list({r["file_url"] for r in results})
+    permitted = set(
+        frappe.get_list("File", filters={"file_url": ["in", file_urls]}, pluck="file_url")
+    )
+    return [r for r in results if r["file_url"] in permitted]
@@ -119,13 +119,13 @@ def split_pdf_every_n(file_url, n=1):
 def extract_pages(file_url, page_numbers, output_filename=None):
     """Extract specific pages from a PDF into a new file."""
     try:
-        from pdf_suite.api.extract import _parse_page_numbers
+        from pdf_suite.utils.pdf_utils import parse_page_numbers
 
         path = get_file_path(file_url)
         output_filename = output_filename or "extracted.pdf"
 
         with pikepdf.open(path) as src:
-            pages = _parse_page_numbers(page_numbers, len(src.pages))
+            pages = parse_page_numbers(page_numbers, len(src.pages))
 
             temp_path = get_temp_path()
             try:
@@ -1,6 +1,15 @@
 """PDF Template CRUD + generation APIs."""
 import json
 import frappe
+from pdf_suite.utils.html_template import compile_template, template_cache
+
+# Output modes of bulk generation
+MAIL_MERGE_OUTPUTS = ("zip", "combined", "files")
+
+# Records rendered per worker task
+MAIL_MERGE_CHUNK = 50
+
+MAIL_MERGE_TIMEOUT = 4 * 60 * 60
 
 
 @frappe.whitelist()
@@ -39,6 +48,7 @@ def save_template(name, schema, base_pdf=None, description=None):
             doc.insert(ignore_permissions=True)
 
         frappe.db.commit()
+        template_cache.invalidate(frappe.local.site, doc.name)
 
         return {
             "success": True,
@@ -104,94 +114,292 @@ def generate_html_pdf(template_name, variable_data, output_filename=None):
         variable_data: JSON string of {variable_name: value} pairs
         output_filename: Optional filename (without .pdf)
     """
-    import re
-    try:
-        from weasyprint import HTML
-    except ImportError:
+    from pdf_suite.utils.file_utils import save_file_to_frappe, site_url_policy
+    from pdf_suite.utils.html_renderer import TEMPLATE_CSS, has_weasyprint, render_pdf
+
+    if not has_weasyprint():
         return {"success": False, "error": "WeasyPrint is not installed on this server"}
 
     try:
-        doc = frappe.get_doc("PDF Template", template_name)
-        schema = json.loads(doc.schema or "{}")
-
-        if schema.get("type") != "tiptap":
-            return {"success": False, "error": "Template is not a TipTap template"}
+        compiled = _compiled_template(template_name)
 
-        html_content = schema.get("html", "")
         if isinstance(variable_data, str):
             variable_data = json.loads(variable_data)
+        full_html = compiled.fill(variable_data)
 
-        # Replace <span data-variable="name" ...>{{name}}</span> with actual values
-        def replace_chip(match):
-            var_name = match.group(1)
-            return str(variable_data.get(var_name, ""))
-
-        html_content = re.sub(
-            r'<span[^>]+data-variable="([^"]+)"[^>]*>.*?</span>',
-            replace_chip,
-            html_content,
-            flags=re.DOTALL,
-        )
-
-        # Background image inline style
-        bg_style = ""
-        if schema.get("background_image"):
-            bg_url = schema["background_image"]
-            if not bg_url.startswith("data:"):
-                bg_url = frappe.utils.get_url() + bg_url
-            bg_style = 'background-image: url("' + bg_url + '"); background-size: cover; background-position: center;'
-
-        full_html = """<!DOCTYPE html>
-<html>
-<head>
-<meta charset="utf-8">
-<style>
-@page { size: A4; margin: 0; }
-body { margin: 0; font-family: Arial, sans-serif; font-size: 12pt; color: #111827; }
-.page { width: 210mm; min-height: 297mm; padding: 25mm; box-sizing: border-box; """ + bg_style + """ }
-.variable-chip { display: inline; }
-h1 { font-size: 24pt; font-weight: 700; margin: 12pt 0 6pt; }
-h2 { font-size: 18pt; font-weight: 700; margin: 10pt 0 5pt; }
-h3 { font-size: 14pt; font-weight: 600; margin: 8pt 0 4pt; }
-p { margin: 0 0 6pt; line-height: 1.6; }
-ul { list-style: disc; padding-left: 18pt; margin: 6pt 0; }
-ol { list-style: decimal; padding-left: 18pt; margin: 6pt 0; }
-table { border-collapse: collapse; width: 100%; margin: 8pt 0; }
-th, td { border: 1px solid #d1d5db; padding: 5pt 8pt; text-align: left; }
-th { background: #f9fafb; font-weight: 600; }
-strong { font-weight: 700; }
-em { font-style: italic; }
-u { text-decoration: underline; }
-s { text-decoration: line-through; }
-</style>
-</head>
-<body>
-<div class="page">""" + html_content + """</div>
-</body>
-</html>"""
-
-        pdf_bytes = HTML(string=full_html).write_pdf()
+        pdf_bytes = render_pdf(full_html, stylesheets=[TEMPLATE_CSS], url_policy=site_url_policy())
 
         ts = frappe.utils.now_datetime().strftime("%Y%m%d_%H%M%S")
         base_name = (output_filename or template_name).replace(" ", "_").lower()
         filename = base_name + "_" + ts + ".pdf"
 
-        file_doc = frappe.get_doc({
-            "doctype": "File",
-            "file_name": filename,
-            "content": pdf_bytes,
-            "is_private": 0,
+        file_url = save_file_to_frappe(pdf_bytes, filename, is_private=0)
+        return {"success": True, "data": {"file_url": file_url, "filename": filename}}
+
+    except Exception as e:
+        frappe.log_error("generate_html_pdf error: " + str(e))
+        return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def generate_html_pdf_bulk(template_name, records=None, report_name=None, filters=None, output="zip",
+                           output_filename=None, name_field=None):
+    """Generate one PDF per record from a TipTap template as a background job.
+
+    Records are rendered in chunks across a pool of worker processes. Poll
+    batch.get_batch_status with the returned job id, or listen for
+    "pdf_suite_mail_merge_progress" events.
+
+    Args:
+        template_name: Name of the PDF Template document
+        records: JSON list of {variable_name: value} dicts
+        report_name: Alternative to records: a Report whose rows (by
+            fieldname) are the records
+        filters: JSON filters for the report
+        output: "zip" (one ZIP of PDFs), "combined" (one PDF with all
+            records in order) or "files" (one File per record)
+        output_filename: Optional base filename (without extension)
+        name_field: Optional variable whose value names each record's PDF
+    """
+    try:
+        if output not in MAIL_MERGE_OUTPUTS:
+            return {"success": False, "error": f"Invalid output: {output}"}
+
+        _compiled_template(template_name)
+
+        if isinstance(records, str):
+            records = json.loads(records)
+        if isinstance(filters, str):
+            filters = json.loads(filters)
+        if report_name:
+            report = frappe.get_doc("Report", report_name)
+            report.check_permission("read")
+            _columns, records = report.get_data(filters=filters or {}, as_dict=True)
+        if not records:
+            return {"success": False, "error": "No records to generate"}
+
+        doc = frappe.get_doc({
+            "doctype": "PDF Batch Job",
+            "operation": "mail_merge",
+            "status": "Queued",
+            "total_files": len(records),
+            "processed_files": 0,
+            "file_urls": "[]",
+            "options": json.dumps({
+                "template_name": template_name,
+                "records": [dict(record) for record in records],
+                "output": output,
+                "output_filename": output_filename,
+                "name_field": name_field,
+            }, default=str),
+            "owner": frappe.session.user,
         })
-        file_doc.insert(ignore_permissions=True)
+        doc.insert(ignore_permissions=True)
         frappe.db.commit()
 
-        return {"success": True, "data": {"file_url": file_doc.file_url, "filename": filename}}
+        frappe.enqueue(
+            "pdf_suite.api.template.run_mail_merge_job",
+            job_id=doc.name,
+            queue="long",
+            timeout=MAIL_MERGE_TIMEOUT,
+        )
+
+        return {
+            "success": True,
+            "data": {"job_id": doc.name, "status": "Queued", "total": len(records)},
+        }
 
     except Exception as e:
-        frappe.log_error("generate_html_pdf error: " + str(e))
+        frappe.log_error(f"generate_html_pdf_bulk error: {e}")
         return {"success": False, "error": str(e)}
 
 
+def run_mail_merge_job(job_id):
+    """Run a bulk template generation job (called via frappe.enqueue)."""
+    doc = frappe.get_doc("PDF Batch Job", job_id)
+    try:
+        doc.status = "Processing"
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+
+        options = json.loads(doc.options or "{}")
+        template_name = options["template_name"]
+        compiled = _compiled_template(template_name)
+
+        def on_chunk(processed):
+            frappe.db.set_value("PDF Batch Job", job_id, "processed_files", processed, update_modified=False)
+            frappe.db.commit()
+            frappe.publish_realtime(
+                "pdf_suite_mail_merge_progress",
+                {"job_id": job_id, "processed": processed, "total": len(options["records"])},
+                user=doc.owner,
+            )
+
+        results = _mail_merge(
+            compiled,
+            options["records"],
+            options.get("output", "zip"),
+            (options.get("output_filename") or template_name).replace(" ", "_").lower(),
+            options.get("name_field"),
+            on_chunk,
+        )
+
+        doc.reload()
+        doc.status = "Completed"
+        doc.results = json.dumps(results)
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+        frappe.publish_realtime(
+            "pdf_suite_mail_merge_progress",
+            {"job_id": job_id, "status": "Completed", "results": results},
+            user=doc.owner,
+        )
+
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(f"run_mail_merge_job error: {e}")
+        doc.reload()
+        doc.status = "Failed"
+        doc.error_message = str(e)
+        doc.save(ignore_permissions=True)
+        frappe.db.commit()
+        frappe.publish_realtime(
+            "pdf_suite_mail_merge_progress",
+            {"job_id": job_id, "status": "Failed", "error": str(e)},
+            user=doc.owner,
+        )
+
+
+def _mail_merge(compiled, records, output, base_name, name_field, on_chunk):
+    """Render records in worker processes and register the output Files.
+
+    Chunks come back in order; "files" output commits its Files once per
+    chunk, "zip" and "combined" build one file on disk and register it at
+    the end.
+    """
+    import multiprocessing
+    import os
+    import shutil
+    import zipfile
+    from concurrent.futures import ProcessPoolExecutor
+    import pikepdf
+    from pdf_suite.utils.pdf_utils import get_workers
+    from pdf_suite.utils.file_utils import get_temp_dir, save_file_to_frappe, site_url_policy
+    from pdf_suite.utils.html_renderer import TEMPLATE_CSS, has_weasyprint, render_many
+
+    if not has_weasyprint():
+        frappe.throw("WeasyPrint is not installed on this server")
+
+    chunks = [records[i : i + MAIL_MERGE_CHUNK] for i in range(0, len(records), MAIL_MERGE_CHUNK)]
+    combine = output == "combined"
+    names = _record_filenames(records, base_name, name_field)
+    url_policy = site_url_policy()
+    results = []
+    temp_dir = get_temp_dir()
+    try:
+        archive = zipfile.ZipFile(os.path.join(temp_dir, "out.zip"), "w") if output == "zip" else None
+        parts = []
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(get_workers(None), len(chunks)), mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    render_many,
+                    [compiled.fill(record) for record in chunk],
+                    [TEMPLATE_CSS],
+                    None,
+                    combine,
+                    url_policy,
+                )
+                for chunk in chunks
+            ]
+            processed = 0
+            for chunk, future in zip(chunks, futures):
+                rendered = future.result()
+                if combine:
+                    part = os.path.join(temp_dir, f"part{len(parts)}.pdf")
+                    with open(part, "wb") as f:
+                        f.write(rendered)
+                    parts.append(part)
+                elif archive is not None:
+                    for i, pdf_bytes in enumerate(rendered, processed):
+                        archive.writestr(names[i], pdf_bytes)
+                else:
+                    for i, pdf_bytes in enumerate(rendered, processed):
+                        url = save_file_to_frappe(pdf_bytes, names[i], is_private=0, commit=False)
+                        results.append({"file_url": url, "filename": names[i]})
+                processed += len(chunk)
+                # on_chunk commits, registering this chunk's Files with the progress
+                on_chunk(processed)
+
+        if archive is not None:
+            archive.close()
+            filename = base_name + ".zip"
+            with open(archive.filename, "rb") as f:
+                url = save_file_to_frappe(f.read(), filename, is_private=0)
+            results = [{"file_url": url, "filename": filename, "documents": len(records)}]
+        elif combine:
+            combined = pikepdf.new()
+            sources = [pikepdf.open(part) for part in parts]
+            for source in sources:
+                combined.pages.extend(source.pages)
+            filename = base_name + ".pdf"
+            output_path = os.path.join(temp_dir, filename)
+            combined.save(output_path)
+            for source in sources:
+                source.close()
+            with open(output_path, "rb") as f:
+                url = save_file_to_frappe(f.read(), filename, is_private=0)
+            results = [{"file_url": url, "filename": filename, "documents": len(records)}]
+        return results
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _record_filenames(records, base_name, name_field):
+    """Unique PDF filename per record."""
+    import re
+
+    names = []
+    seen = set()
+    width = len(str(len(records)))
+    for i, record in enumerate(records, 1):
+        stem = f"{base_name}_{i:0{width}d}"
+        if name_field and record.get(name_field):
+            stem = re.sub(r"[^\w.-]+", "_", str(record[name_field])).strip("_") or stem
+        name = stem
+        n = 2
+        while name in seen:
+            name = f"{stem}_{n}"
+            n += 1
+        seen.add(name)
+        names.append(name + ".pdf")
+    return names
+
+
+def _compiled_template(template_name):
+    """Compiled TipTap template, from the per-process cache when unchanged.
+
+    Raises plain exceptions (no msgprint); callers return them as the error.
+    """
+    modified = frappe.db.get_value("PDF Template", template_name, "modified")
+    if modified is None:
+        raise frappe.DoesNotExistError(f"PDF Template {template_name} not found")
+
+    key = (frappe.local.site, template_name, str(modified))
+    compiled = template_cache.get(key)
+    if compiled is None:
+        schema = json.loads(frappe.db.get_value("PDF Template", template_name, "schema") or "{}")
+        if schema.get("type") != "tiptap":
+            raise ValueError("Template is not a TipTap template")
+
+        bg_url = schema.get("background_image")
+        if bg_url and not bg_url.startswith("data:"):
+            bg_url = frappe.utils.get_url() + bg_url
+        compiled = compile_template(schema.get("html", ""), bg_url)
+        template_cache.set(key, compiled)
+    return compiled
+
+
 @frappe.whitelist()
 def generate_from_template(template_name, input_data, output_filename=None):
     """Generate a PDF from a pdfme template with input data.
@@ -1,11 +1,14 @@
 """PDF watermark APIs."""
-import io
+from functools import partial
 import frappe
 import pikepdf
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.colors import Color
-from pdf_suite.utils.file_utils import get_file_path, save_file_to_frappe, get_temp_path, cleanup_temp
+from pdf_suite.utils.file_utils import (
+    get_file_path, get_content_hash, save_file_to_frappe, get_temp_path, cleanup_temp,
+)
+from pdf_suite.utils.stamping import (
+    cached_render, check_template, hex_to_rgb, render_image_stamp, render_text_stamp, stamp_numbers,
+    stamp_pages, text_style,
+)
 
 
 @frappe.whitelist()
@@ -18,53 +21,25 @@ def add_text_watermark(
     color="#888888",
     output_filename=None,
 ):
-    """Add a text watermark to all pages of a PDF."""
+    """Add a text watermark to all pages of a PDF.
+
+    The watermark is rendered once per distinct page size and orientation
+    and shared by all pages of that size; rendered watermarks are cached
+    per worker, so repeat calls with the same options skip rendering.
+    """
     try:
         path = get_file_path(file_url)
         output_filename = output_filename or "watermarked.pdf"
 
-        # Create watermark PDF using reportlab
-        watermark_buf = io.BytesIO()
-        c = canvas.Canvas(watermark_buf, pagesize=A4)
-        width, height = A4
-
-        # Parse color
-        r, g, b = _hex_to_rgb(color)
-        c.setFillColor(Color(r, g, b, alpha=float(opacity)))
-        c.setFont("Helvetica-Bold", int(font_size))
-
-        c.saveState()
-        c.translate(width / 2, height / 2)
-        c.rotate(int(rotation))
-        c.drawCentredString(0, 0, text)
-        c.restoreState()
-        c.save()
-
-        watermark_buf.seek(0)
-
-        temp_path = get_temp_path()
-        try:
-            watermark_pdf = pikepdf.open(watermark_buf)
-            watermark_page = watermark_pdf.pages[0]
-
-            with pikepdf.open(path) as pdf:
-                for page in pdf.pages:
-                    page.add_underlay(watermark_page)
-
-                pdf.save(temp_path)
-
-            watermark_pdf.close()
-
-            with open(temp_path, "rb") as f:
-                content = f.read()
-
-            url = save_file_to_frappe(content, output_filename)
-            return {
-                "success": True,
-                "data": {"file_url": url, "filename": output_filename},
-            }
-        finally:
-            cleanup_temp(temp_path)
+        options = {
+            "text": text,
+            "font_size": int(font_size),
+            "opacity": round(float(opacity), 3),
+            "rotation": int(rotation) % 360,
+            "color": tuple(round(c, 3) for c in hex_to_rgb(color)),
+        }
+        render = cached_render(("text", *options.values()), partial(render_text_stamp, **options))
+        return _watermark(path, render, output_filename)
 
     except Exception as e:
         frappe.log_error(f"add_text_watermark error: {e}")
@@ -79,47 +54,64 @@ def add_image_watermark(file_url, image_url, opacity=0.2, position="center", out
         image_path = get_file_path(image_url)
         output_filename = output_filename or "watermarked.pdf"
 
-        from PIL import Image as PILImage
-
-        img = PILImage.open(image_path)
-        img_width, img_height = img.size
-
-        # Create watermark PDF with the image
-        watermark_buf = io.BytesIO()
-        c = canvas.Canvas(watermark_buf, pagesize=A4)
-        page_width, page_height = A4
+        options = {"opacity": round(float(opacity), 3), "position": position or "center"}
+        render = cached_render(
+            ("image", get_content_hash(image_path), *options.values()),
+            partial(render_image_stamp, image=image_path, **options),
+        )
+        return _watermark(path, render, output_filename)
 
-        c.setFillAlpha(float(opacity))
+    except Exception as e:
+        frappe.log_error(f"add_image_watermark error: {e}")
+        return {"success": False, "error": str(e)}
 
-        # Position image
-        if position == "center":
-            x = (page_width - img_width / 2) / 2
-            y = (page_height - img_height / 2) / 2
-        elif position == "top-right":
-            x = page_width - img_width / 2 - 40
-            y = page_height - img_height / 2 - 40
-        elif position == "bottom-left":
-            x = 40
-            y = 40
-        else:
-            x = (page_width - img_width / 2) / 2
-            y = (page_height - img_height / 2) / 2
 
-        c.drawImage(image_path, x, y, width=img_width / 2, height=img_height / 2, mask="auto")
-        c.save()
-        watermark_buf.seek(0)
+@frappe.whitelist()
+def add_page_numbers(
+    file_url,
+    template="Page {page} of {total}",
+    position="bottom-center",
+    font_size=10,
+    margin=28,
+    color="#000000",
+    bates_start=1,
+    bates_prefix="",
+    bates_digits=6,
+    output_filename=None,
+):
+    """Stamp page numbers, Bates numbers or other per-page text on every page.
+
+    Args:
+        file_url: Source PDF file URL
+        template: Text per page; fields {page}, {total}, {number} (Bates
+            number) and {bates} (prefix + zero-padded number), e.g.
+            "ACME{number:07d}" or "{bates} - Page {page} of {total}"
+        position: top-left, top-center, top-right, bottom-left,
+            bottom-center or bottom-right
+        font_size: Text size in points
+        margin: Distance from the page edges in points
+        color: Hex text color
+        bates_start: First Bates number
+        bates_prefix: Text before the Bates number in {bates}
+        bates_digits: Zero-padded width of the Bates number in {bates}
+        output_filename: Optional output filename
+    """
+    try:
+        path = get_file_path(file_url)
+        output_filename = output_filename or "numbered.pdf"
+        check_template(template)
 
         temp_path = get_temp_path()
         try:
-            watermark_pdf = pikepdf.open(watermark_buf)
-            watermark_page = watermark_pdf.pages[0]
-
-            with pikepdf.open(path) as pdf:
-                for page in pdf.pages:
-                    page.add_underlay(watermark_page)
-                pdf.save(temp_path)
-
-            watermark_pdf.close()
+            pages = stamp_numbers(
+                path,
+                temp_path,
+                template=template,
+                bates_start=int(bates_start),
+                bates_prefix=bates_prefix or "",
+                bates_digits=int(bates_digits),
+                **text_style(position, font_size, margin, color),
+            )
 
             with open(temp_path, "rb") as f:
                 content = f.read()
@@ -127,16 +119,37 @@ def add_image_watermark(file_url, image_url, opacity=0.2, position="center", out
             url = save_file_to_frappe(content, output_filename)
             return {
                 "success": True,
-                "data": {"file_url": url, "filename": output_filename},
+                "data": {
+                    "file_url": url,
+                    "filename": output_filename,
+                    "pages": pages,
+                    "last_number": int(bates_start) + pages - 1,
+                },
             }
         finally:
             cleanup_temp(temp_path)
 
     except Exception as e:
-        frappe.log_error(f"add_image_watermark error: {e}")
+        frappe.log_error(f"add_page_numbers error: {e}")
         return {"success": False, "error": str(e)}
 
 
-def _hex_to_rgb(hex_color):
-    hex_color = hex_color.lstrip("#")
-    return tuple(int(hex_color[i : i + 2], 16) / 255 for i in (0, 2, 4))
+def _watermark(path, render, output_filename):
+    """Stamp every page of `path` under its content and save the result as a File."""
+    temp_path = get_temp_path()
+    try:
+        with pikepdf.open(path) as pdf:
+            variants = stamp_pages(pdf, render)
+            pdf.save(temp_path)
+
+        with open(temp_path, "rb") as f:
+            content = f.read()
+
+        url = save_file_to_frappe(content, output_filename)
+        return {
+            "success": True,
+            "data": {"file_url": url, "filename": output_filename, "variants": variants},
+        }
+    finally:
+        cleanup_temp(temp_path)
+
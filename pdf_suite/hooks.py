@@ -35,6 +35,16 @@ website_route_rules = [
 # --------
 # fixtures = []
 
+# Document Events
+# ---------------
+doc_events = {
+    "File": {
+        "after_insert": "pdf_suite.utils.page_render.on_file_insert",
+        "on_update": "pdf_suite.utils.search_index.on_file_update",
+        "on_trash": "pdf_suite.utils.search_index.on_file_trash",
+    },
+}
+
 # Scheduled Tasks
 # ---------------
 # scheduler_events = {
@@ -1,7 +1,12 @@
 """PDF Template — pdfme template storage."""
 import frappe
 from frappe.model.document import Document
+from pdf_suite.utils.html_template import template_cache
 
 
 class PDFTemplate(Document):
-    pass
+    def on_update(self):
+        template_cache.invalidate(frappe.local.site, self.name)
+
+    def on_trash(self):
+        template_cache.invalidate(frappe.local.site, self.name)
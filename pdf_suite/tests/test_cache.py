@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from pdf_suite.utils.cache import DiskCache, hash_key
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self.dir.name, max_bytes=1000)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _age(self, key, mtime):
+        path = self.cache._entry_path(key)
+        os.utime(path, (mtime, mtime))
+
+    def test_set_get_delete(self):
+        self.assertIsNone(self.cache.get("missing"))
+        self.cache.set("a", b"data")
+        self.assertEqual(self.cache.get("a"), b"data")
+        self.assertTrue(self.cache.contains("a"))
+        self.cache.delete("a")
+        self.assertFalse(self.cache.contains("a"))
+
+    def test_json(self):
+        self.cache.set_json("j", {"pages": [1, 2]})
+        self.assertEqual(self.cache.get_json("j"), {"pages": [1, 2]})
+        self.assertIsNone(self.cache.get_json("other"))
+
+    def test_evicts_least_recently_used(self):
+        # Write under a larger cap so set() does not evict on its own
+        self.cache.max_bytes = 10000
+        for i, key in enumerate(("old", "used", "new")):
+            self.cache.set(key, b"x" * 400)
+            self._age(key, 1000 + i)
+        self.cache.max_bytes = 1000
+        # Reading refreshes the entry, so "old" is now the least recently used
+        self.cache.get("used")
+        self.cache.evict()
+        self.assertFalse(self.cache.contains("old"))
+        self.assertTrue(self.cache.contains("used"))
+        self.assertTrue(self.cache.contains("new"))
+
+    def test_set_evicts_once_over_cap(self):
+        for i in range(4):
+            self.cache.set(f"k{i}", b"x" * 400)
+        total = sum(os.path.getsize(self.cache._entry_path(f"k{i}")) for i in range(4) if self.cache.contains(f"k{i}"))
+        self.assertLessEqual(total, 1000)
+
+    def test_no_eviction_under_cap(self):
+        self.cache.set("a", b"x" * 400)
+        self.cache.set("b", b"x" * 400)
+        self.cache.evict()
+        self.assertTrue(self.cache.contains("a") and self.cache.contains("b"))
+
+
+class TestHashKey(unittest.TestCase):
+    def test_parts_are_length_prefixed(self):
+        self.assertNotEqual(hash_key("ab", "c"), hash_key("a", "bc"))
+        self.assertEqual(hash_key(b"ab", 1), hash_key("ab", "1"))
@@ -0,0 +1,123 @@
+import io
+import unittest
+import zlib
+
+import pikepdf
+
+from pdf_suite.utils.content_redact import RectIndex, remove_content
+from pdf_suite.utils.fast_text import extract_page_text
+
+PIXELS = bytes([0xAB, 0xCD, 0xEF]) * 100
+
+
+class TestRectIndex(unittest.TestCase):
+    def test_query_and_intersects(self):
+        index = RectIndex([(0, 0, 10, 10), (200, 200, 150, 150), (500, 20, 520, 40)], cell=64)
+        self.assertEqual(index.query(5, 5, 20, 20), [(0, 0, 10, 10)])
+        self.assertEqual(index.query(160, 160, 170, 170), [(150, 150, 200, 200)])
+        self.assertEqual(sorted(index.query(-10, -10, 600, 600)), sorted(index.rects))
+        self.assertTrue(index.intersects(505, 25, 506, 26))
+        self.assertFalse(index.intersects(100, 100, 120, 120))
+
+    def test_touching_edges_do_not_overlap(self):
+        index = RectIndex([(0, 0, 10, 10)])
+        self.assertFalse(index.intersects(10, 0, 20, 10))
+        self.assertEqual(index.query(0, 10, 10, 20), [])
+
+    def test_empty(self):
+        index = RectIndex([])
+        self.assertEqual(index.query(0, 0, 10, 10), [])
+        self.assertFalse(index.intersects(0, 0, 10, 10))
+
+
+def _text_pdf():
+    pdf = pikepdf.new()
+    pdf.add_blank_page(page_size=(400, 400))
+    page = pdf.pages[0]
+    font = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Font,
+        Subtype=pikepdf.Name.Type1,
+        BaseFont=pikepdf.Name.Helvetica,
+        Encoding=pikepdf.Name.WinAnsiEncoding,
+    ))
+    page.obj.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+    page.obj.Contents = pdf.make_stream(b"BT /F1 20 Tf 50 300 Td (Hello World) Tj ET")
+    return pdf
+
+
+def _image(pdf):
+    image = pikepdf.Stream(pdf, zlib.compress(PIXELS))
+    image.Type = pikepdf.Name.XObject
+    image.Subtype = pikepdf.Name.Image
+    image.Width = 10
+    image.Height = 10
+    image.ColorSpace = pikepdf.Name.DeviceRGB
+    image.BitsPerComponent = 8
+    image.Filter = pikepdf.Name.FlateDecode
+    return image
+
+
+def _saved_images(pdf):
+    out = io.BytesIO()
+    pdf.save(out)
+    out.seek(0)
+    saved = pikepdf.open(out)
+    return [
+        obj.read_bytes() for obj in saved.objects
+        if isinstance(obj, pikepdf.Stream) and obj.get("/Subtype") == "/Image"
+    ]
+
+
+class TestRemoveContent(unittest.TestCase):
+    def test_removes_glyphs_under_rect(self):
+        pdf = _text_pdf()
+        # "Hello " is about 57pt wide at 20pt: cover "World" only
+        stats = remove_content(pdf, {0: [(110, 290, 100, 30)]})
+        self.assertEqual(stats["pages"], 1)
+        self.assertEqual(stats["glyphs"], 5)
+        self.assertEqual(extract_page_text(pdf.pages[0]).strip(), "Hello")
+
+    def test_page_without_overlap_is_untouched(self):
+        pdf = _text_pdf()
+        contents = pdf.pages[0].Contents.read_bytes()
+        stats = remove_content(pdf, {0: [(300, 10, 20, 20)]})
+        self.assertEqual(stats["pages"], 0)
+        self.assertEqual(pdf.pages[0].Contents.read_bytes(), contents)
+
+    def test_replaced_image_is_not_saved(self):
+        pdf = pikepdf.new()
+        pdf.add_blank_page(page_size=(200, 200))
+        page = pdf.pages[0]
+        page.obj.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=_image(pdf)))
+        page.obj.Contents = pdf.make_stream(b"q 100 0 0 100 0 0 cm /Im0 Do Q")
+
+        stats = remove_content(pdf, {0: [(0, 0, 50, 50)]})
+        self.assertEqual(stats["images"], 1)
+        self.assertEqual(list(page.Resources.XObject.keys()), ["/Im0R1"])
+        self.assertNotIn(PIXELS, _saved_images(pdf))
+
+    def test_image_drawn_elsewhere_is_kept(self):
+        pdf = pikepdf.new()
+        pdf.add_blank_page(page_size=(200, 200))
+        page = pdf.pages[0]
+        page.obj.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=_image(pdf)))
+        page.obj.Contents = pdf.make_stream(b"q 100 0 0 100 0 0 cm /Im0 Do Q q 40 0 0 40 150 150 cm /Im0 Do Q")
+
+        remove_content(pdf, {0: [(0, 0, 50, 50)]})
+        self.assertEqual(sorted(page.Resources.XObject.keys()), ["/Im0", "/Im0R1"])
+        self.assertIn(PIXELS, _saved_images(pdf))
+
+    def test_image_in_inheriting_form_is_not_saved(self):
+        pdf = pikepdf.new()
+        pdf.add_blank_page(page_size=(200, 200))
+        page = pdf.pages[0]
+        form = pdf.make_stream(b"q 100 0 0 100 0 0 cm /Im0 Do Q")
+        form.Type = pikepdf.Name.XObject
+        form.Subtype = pikepdf.Name.Form
+        form.BBox = [0, 0, 200, 200]
+        page.obj.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=_image(pdf), Fm0=form))
+        page.obj.Contents = pdf.make_stream(b"/Fm0 Do")
+
+        remove_content(pdf, {0: [(0, 0, 50, 50)]})
+        self.assertEqual(list(page.Resources.XObject.keys()), ["/Fm0R1"])
+        self.assertNotIn(PIXELS, _saved_images(pdf))
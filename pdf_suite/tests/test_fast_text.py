@@ -0,0 +1,108 @@
+import unittest
+
+import pikepdf
+
+from pdf_suite.utils.fast_text import UndecodableFont, _cmap_decoder, extract_page_text
+
+CMAP = b"""/CIDInit /ProcSet findresource begin
+begincmap
+1 begincodespacerange <0000> <FFFF> endcodespacerange
+2 beginbfchar
+<0001> <0048>
+<0002> <0069>
+endbfchar
+1 beginbfrange
+<0010> <0012> <0061>
+endbfrange
+endcmap
+end"""
+
+
+def _helvetica(pdf):
+    return pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Font,
+        Subtype=pikepdf.Name.Type1,
+        BaseFont=pikepdf.Name.Helvetica,
+        Encoding=pikepdf.Name.WinAnsiEncoding,
+    ))
+
+
+def _form(pdf, content, resources):
+    form = pdf.make_stream(content)
+    form.Type = pikepdf.Name.XObject
+    form.Subtype = pikepdf.Name.Form
+    form.BBox = [0, 0, 100, 100]
+    form.Resources = resources
+    return form
+
+
+def _page(pdf, content, fonts=None, xobjects=None):
+    pdf.add_blank_page()
+    page = pdf.pages[-1]
+    page.obj.Resources = pikepdf.Dictionary(
+        Font=pikepdf.Dictionary(fonts or {}),
+        XObject=pikepdf.Dictionary(xobjects or {}),
+    )
+    page.obj.Contents = pdf.make_stream(content)
+    return page
+
+
+class TestFastText(unittest.TestCase):
+    def test_simple_font_lines(self):
+        pdf = pikepdf.new()
+        page = _page(pdf, b"BT /F1 12 Tf 72 700 Td (Hello) Tj 0 -14 Td (World) Tj ET", {"/F1": _helvetica(pdf)})
+        self.assertEqual(extract_page_text(page), "Hello\nWorld")
+
+    def test_form_drawn_twice_contributes_text_twice(self):
+        pdf = pikepdf.new()
+        font = _helvetica(pdf)
+        label = _form(pdf, b"BT /F1 12 Tf (Label) Tj ET", pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font)))
+        page = _page(pdf, b"q 1 0 0 1 0 100 cm /Fm0 Do Q q 1 0 0 1 0 300 cm /Fm0 Do Q", xobjects={"/Fm0": label})
+        self.assertEqual(extract_page_text(page).split(), ["Label", "Label"])
+
+    def test_self_referencing_form_stops(self):
+        pdf = pikepdf.new()
+        font = _helvetica(pdf)
+        form = _form(pdf, b"BT /F1 12 Tf (Loop) Tj ET /Fm0 Do", pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font)))
+        form.Resources.XObject = pikepdf.Dictionary(Fm0=form)
+        page = _page(pdf, b"/Fm0 Do", xobjects={"/Fm0": form})
+        self.assertEqual(extract_page_text(page), "Loop")
+
+    def test_to_unicode_cmap(self):
+        decode = _cmap_decoder(CMAP)
+        self.assertEqual(decode(b"\x00\x01\x00\x02\x00\x10\x00\x12"), "Hiac")
+        self.assertEqual(decode(b"\x00\x99"), "")
+
+    def test_type0_font_with_to_unicode(self):
+        pdf = pikepdf.new()
+        font = pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Font,
+            Subtype=pikepdf.Name.Type0,
+            BaseFont=pikepdf.Name.Test,
+            Encoding=pikepdf.Name("/Identity-H"),
+            ToUnicode=pdf.make_stream(CMAP),
+        ))
+        page = _page(pdf, b"BT /F1 12 Tf <00010002> Tj ET", {"/F1": font})
+        self.assertEqual(extract_page_text(page), "Hi")
+
+    def test_type0_font_without_to_unicode_raises(self):
+        pdf = pikepdf.new()
+        font = pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Font,
+            Subtype=pikepdf.Name.Type0,
+            BaseFont=pikepdf.Name.Test,
+            Encoding=pikepdf.Name("/Identity-H"),
+        ))
+        page = _page(pdf, b"BT /F1 12 Tf <00010002> Tj ET", {"/F1": font})
+        with self.assertRaises(UndecodableFont):
+            extract_page_text(page)
+
+    def test_differences_override_base_encoding(self):
+        pdf = pikepdf.new()
+        font = _helvetica(pdf)
+        font.Encoding = pikepdf.Dictionary(
+            BaseEncoding=pikepdf.Name.WinAnsiEncoding,
+            Differences=[65, pikepdf.Name.quoteright, pikepdf.Name.uni00E9],
+        )
+        page = _page(pdf, b"BT /F1 12 Tf (ABC) Tj ET", {"/F1": font})
+        self.assertEqual(extract_page_text(page), "’éC")
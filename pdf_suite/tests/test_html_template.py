@@ -0,0 +1,49 @@
+import unittest
+
+from pdf_suite.utils.html_template import TemplateCache, compile_template
+
+BODY = (
+    '<p>Dear <span data-variable="name" class="variable-chip">{{name}}</span>,</p>'
+    '<p>Total: <span data-variable="total">{{total}}</span> for '
+    '<span data-variable="name">{{name}}</span></p>'
+)
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_slots_and_variables(self):
+        compiled = compile_template(BODY)
+        self.assertEqual(compiled.slots, ("name", "total", "name"))
+        self.assertEqual(compiled.variables, ["name", "total"])
+
+    def test_fill(self):
+        html = compile_template(BODY).fill({"name": "Ann", "total": 12})
+        self.assertIn("<p>Dear Ann,</p><p>Total: 12 for Ann</p>", html)
+        self.assertTrue(html.startswith("<!DOCTYPE html>"))
+        self.assertIn('<div class="page">', html)
+
+    def test_missing_values_are_blank(self):
+        self.assertIn("<p>Dear ,</p>", compile_template(BODY).fill({}))
+
+    def test_values_are_escaped(self):
+        html = compile_template(BODY).fill({"name": '<img src="file:///etc/passwd">', "total": "a & b"})
+        self.assertNotIn("<img", html)
+        self.assertIn("&lt;img src=&quot;file:///etc/passwd&quot;&gt;", html)
+        self.assertIn("a &amp; b", html)
+
+    def test_background_url_is_escaped(self):
+        html = compile_template("<p>x</p>", "https://example.com/bg.png');color:red;'").fill({})
+        self.assertIn("url('https://example.com/bg.png&#x27;);color:red;&#x27;')", html)
+
+
+class TestTemplateCache(unittest.TestCase):
+    def test_invalidate_drops_every_version(self):
+        cache = TemplateCache(max_items=8)
+        cache.set(("site", "A", "1"), "a1")
+        cache.set(("site", "A", "2"), "a2")
+        cache.set(("site", "B", "1"), "b1")
+        cache.set(("other", "A", "1"), "x")
+        cache.invalidate("site", "A")
+        self.assertIsNone(cache.get(("site", "A", "1")))
+        self.assertIsNone(cache.get(("site", "A", "2")))
+        self.assertEqual(cache.get(("site", "B", "1")), "b1")
+        self.assertEqual(cache.get(("other", "A", "1")), "x")
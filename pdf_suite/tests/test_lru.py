@@ -0,0 +1,41 @@
+import unittest
+
+from pdf_suite.utils.lru import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_drops_least_recently_used(self):
+        cache = LRUCache(max_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_byte_cap(self):
+        cache = LRUCache(max_items=10, max_bytes=10)
+        cache.set("a", b"xxxx")
+        cache.set("b", b"xxxx")
+        cache.set("c", b"xxxx")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache._bytes, 8)
+        # Replacing a value does not count the old one
+        cache.set("c", b"xx")
+        self.assertEqual(cache._bytes, 6)
+        # A value over the cap is not kept
+        cache.set("d", b"x" * 11)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache._bytes, 0)
+
+    def test_discard_if_and_clear(self):
+        cache = LRUCache(max_items=10, max_bytes=100)
+        for key in ("a1", "a2", "b1"):
+            cache.set(key, b"xx")
+        cache.discard_if(lambda key: key.startswith("a"))
+        self.assertEqual(list(cache._items), ["b1"])
+        self.assertEqual(cache._bytes, 2)
+        cache.clear()
+        self.assertIsNone(cache.get("b1"))
+        self.assertEqual(cache._bytes, 0)
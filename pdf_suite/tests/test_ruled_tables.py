@@ -0,0 +1,95 @@
+import io
+import unittest
+
+import numpy as np
+
+from pdf_suite.utils.ruled_tables import _cluster_means, _components, _merge, extract_tables
+
+
+def _table_pdf(draw):
+    """One-page PDF drawn by draw(canvas), opened with pdfplumber."""
+    import pdfplumber
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(400, 400))
+    draw(c)
+    c.save()
+    buffer.seek(0)
+    return pdfplumber.open(buffer)
+
+
+def _grid(c, xs, ys, cells):
+    for y in ys:
+        c.line(xs[0], y, xs[-1], y)
+    for x in xs:
+        c.line(x, ys[0], x, ys[-1])
+    for (row, col), text in cells.items():
+        c.drawString(xs[col] + 4, ys[row] - 14, text)
+
+
+class TestRulingHelpers(unittest.TestCase):
+    def test_cluster_means(self):
+        values = np.array([10.0, 11.0, 12.0, 50.0, 51.0])
+        np.testing.assert_allclose(_cluster_means(values), [11, 11, 11, 50.5, 50.5])
+
+    def test_merge_joins_collinear_segments(self):
+        segments = np.array([
+            [100.0, 0.0, 50.0],
+            [100.0, 52.0, 90.0],   # within JOIN_TOLERANCE of the first
+            [100.0, 120.0, 150.0],  # separate segment on the same line
+            [200.0, 10.0, 20.0],
+        ])
+        np.testing.assert_allclose(_merge(segments, 0), [[100, 0, 90], [100, 120, 150], [200, 10, 20]])
+
+    def test_components(self):
+        touches = np.array([
+            [True, False, False],
+            [True, False, False],
+            [False, True, True],
+        ])
+        groups = [(list(h), list(v)) for h, v in _components(touches)]
+        self.assertEqual(sorted(groups), [([0, 1], [0]), ([2], [1, 2])])
+
+
+class TestExtractTables(unittest.TestCase):
+    def test_bordered_grid(self):
+        def draw(c):
+            _grid(c, [50, 150, 250], [350, 320, 290], {(0, 0): "Name", (0, 1): "Qty", (1, 0): "Pen", (1, 1): "2"})
+
+        with _table_pdf(draw) as pdf:
+            page = pdf.pages[0]
+            self.assertEqual(extract_tables(page), [[["Name", "Qty"], ["Pen", "2"]]])
+            self.assertEqual(extract_tables(page), page.extract_tables())
+
+    def test_two_tables_in_reading_order(self):
+        def draw(c):
+            _grid(c, [50, 150, 250], [150, 120, 90], {(0, 0): "second"})
+            _grid(c, [50, 150, 250], [350, 320, 290], {(0, 0): "first"})
+
+        with _table_pdf(draw) as pdf:
+            tables = extract_tables(pdf.pages[0])
+        self.assertEqual([table[0][0] for table in tables], ["first", "second"])
+
+    def test_merged_cell_is_none(self):
+        def draw(c):
+            xs, ys = [50, 150, 250], [350, 320, 290]
+            c.line(xs[0], ys[0], xs[-1], ys[0])
+            c.line(xs[0], ys[1], xs[-1], ys[1])
+            c.line(xs[0], ys[2], xs[-1], ys[2])
+            c.line(xs[0], ys[0], xs[0], ys[2])
+            c.line(xs[2], ys[0], xs[2], ys[2])
+            # Middle border only on the second row: the first row is one cell
+            c.line(xs[1], ys[1], xs[1], ys[2])
+            c.drawString(54, 336, "Title")
+            c.drawString(54, 306, "a")
+            c.drawString(154, 306, "b")
+
+        with _table_pdf(draw) as pdf:
+            page = pdf.pages[0]
+            self.assertEqual(extract_tables(page), [[["Title", None], ["a", "b"]]])
+            self.assertEqual(extract_tables(page), page.extract_tables())
+
+    def test_no_rulings(self):
+        with _table_pdf(lambda c: c.drawString(50, 350, "plain text")) as pdf:
+            self.assertEqual(extract_tables(pdf.pages[0]), [])
@@ -0,0 +1,119 @@
+import io
+import os
+import tempfile
+import unittest
+
+import pikepdf
+
+from pdf_suite.utils.stamping import _placement, _visible_size, check_template, hex_to_rgb, stamp_numbers, stamp_pages
+
+
+def _apply(matrix, x, y):
+    a, b, c, d, e, f = matrix
+    return (round(a * x + c * y + e, 3), round(b * x + d * y + f, 3))
+
+
+def _render(width, height):
+    """A one-page PDF of the given size, as a stamp."""
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+    c.drawString(10, 10, "stamp")
+    c.save()
+    return buffer.getvalue()
+
+
+class TestPlacement(unittest.TestCase):
+    box = (10, 20, 310, 520)
+
+    def test_visible_corners_cover_the_box(self):
+        x0, y0, x1, y1 = self.box
+        for rotate in (0, 90, 180, 270):
+            width, height = _visible_size(self.box, rotate)
+            matrix = _placement(self.box, rotate)
+            corners = {_apply(matrix, x, y) for x in (0, width) for y in (0, height)}
+            self.assertEqual(corners, {(x0, y0), (x0, y1), (x1, y0), (x1, y1)}, rotate)
+
+    def test_visible_size_swaps_for_quarter_turns(self):
+        self.assertEqual(_visible_size(self.box, 0), (300, 500))
+        self.assertEqual(_visible_size(self.box, 90), (500, 300))
+        self.assertEqual(_visible_size(self.box, 270), (500, 300))
+
+    def test_visible_origin_follows_rotation(self):
+        # /Rotate turns the page clockwise for display, so the visible
+        # bottom-left corner is a different corner of the box each time
+        origins = {rotate: _apply(_placement(self.box, rotate), 0, 0) for rotate in (0, 90, 180, 270)}
+        self.assertEqual(origins, {0: (10, 20), 90: (310, 20), 180: (310, 520), 270: (10, 520)})
+
+
+class TestStampPages(unittest.TestCase):
+    def test_one_form_per_page_size(self):
+        pdf = pikepdf.new()
+        pdf.add_blank_page(page_size=(200, 300))
+        pdf.add_blank_page(page_size=(200, 300))
+        pdf.add_blank_page(page_size=(300, 200))
+        rendered = []
+
+        def render(width, height):
+            rendered.append((width, height))
+            return _render(width, height)
+
+        self.assertEqual(stamp_pages(pdf, render), 2)
+        self.assertEqual(sorted(rendered), [(200, 300), (300, 200)])
+        forms = [{form.objgen for form in page.Resources.XObject.values()} for page in pdf.pages]
+        self.assertEqual(forms[0], forms[1])
+        self.assertNotEqual(forms[0], forms[2])
+
+
+class TestCheckTemplate(unittest.TestCase):
+    def test_accepts_known_fields(self):
+        for template in ("Page {page} of {total}", "ACME{number:07d}", "{bates}", "{number:5d}", "{{page}}", "plain"):
+            check_template(template)
+
+    def test_rejects_other_fields_and_specs(self):
+        for template in (
+            "{page:>50000000}",
+            "{number:100d}",
+            "{page:{total}}",
+            "{bates:05d}",
+            "{bates.__class__.__mro__}",
+            "{page[0]}",
+            "{page!r}",
+            "{name}",
+            "{}",
+            "{0}",
+            "{page",
+        ):
+            with self.assertRaises(ValueError, msg=template):
+                check_template(template)
+
+
+class TestStampNumbers(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.dir.name, "in.pdf")
+        self.output = os.path.join(self.dir.name, "out.pdf")
+        pdf = pikepdf.new()
+        for _ in range(3):
+            pdf.add_blank_page(page_size=(200, 300))
+        pdf.save(self.source)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_numbers_each_page(self):
+        pages = stamp_numbers(self.source, self.output, "{bates} {page}/{total}", bates_start=41,
+                              bates_prefix="AB", bates_digits=4, color=hex_to_rgb("#ff0000"))
+        self.assertEqual(pages, 3)
+        with pikepdf.open(self.output) as pdf:
+            contents = [b"".join(c.read_bytes() for c in page.obj.Contents) for page in pdf.pages]
+        self.assertIn(b"(AB0041 1/3)", contents[0])
+        self.assertIn(b"(AB0043 3/3)", contents[2])
+        self.assertIn(b"1 0 0 rg", contents[0])
+
+    def test_rejects_bad_template_and_digits(self):
+        with self.assertRaises(ValueError):
+            stamp_numbers(self.source, self.output, "{page:>999}")
+        with self.assertRaises(ValueError):
+            stamp_numbers(self.source, self.output, "{bates}", bates_digits=1000)
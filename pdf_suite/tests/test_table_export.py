@@ -0,0 +1,97 @@
+import unittest
+from datetime import date
+
+from pdf_suite.utils.table_export import TablePlanner, _parse_number, convert_value, parse_value
+
+
+class TestParseNumber(unittest.TestCase):
+    def test_numbers(self):
+        cases = {
+            "42": 42,
+            "-42": -42,
+            "1,234,567": 1234567,
+            "3.50": 3.5,
+            "$1,200.00": 1200.0,
+            "-$5": -5,
+            "$-5": -5,
+            "(120)": -120,
+            "120-": -120,
+            "€ 7": 7,
+        }
+        for text, expected in cases.items():
+            self.assertEqual(_parse_number(text), expected, text)
+
+    def test_not_numbers(self):
+        for text in ("", "abc", "1,23", "007", "--5", "(-5)", "+-5", "$", "1.2.3", "1234567890123456789"):
+            self.assertIsNone(_parse_number(text), text)
+
+    def test_parse_and_convert(self):
+        self.assertEqual(parse_value("2024-03-01"), ("date", date(2024, 3, 1)))
+        self.assertEqual(parse_value("12"), ("int", 12))
+        self.assertEqual(parse_value("n/a"), ("string", "n/a"))
+        self.assertEqual(convert_value("12", "float"), 12.0)
+        self.assertIsNone(convert_value("", "int"))
+
+
+class TestTablePlanner(unittest.TestCase):
+    def _plan(self, pages):
+        planner = TablePlanner()
+        for item in pages:
+            planner.add_page(item)
+        tables = planner.finish()
+        rows = [
+            (table["index"], row)
+            for item in pages
+            for table, page_rows in planner.rows_for_page(item)
+            for row in page_rows
+        ]
+        return tables, rows
+
+    def test_header_and_types(self):
+        tables, rows = self._plan([
+            {"page": 1, "tables": [[["Item", "Qty", "Price"], ["Pen", "2", "1.50"], ["Ink", "10", "3"]]]},
+        ])
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(tables[0]["columns"], ["page", "Item", "Qty", "Price"])
+        self.assertEqual(tables[0]["types"], ["string", "int", "float"])
+        self.assertEqual(rows, [(0, [1, "Pen", 2, 1.5]), (0, [1, "Ink", 10, 3.0])])
+
+    def test_table_continues_with_repeated_header(self):
+        header = ["Item", "Qty"]
+        tables, rows = self._plan([
+            {"page": 1, "tables": [[header, ["Pen", "2"]]]},
+            {"page": 2, "tables": [[header, ["Ink", "3"]]]},
+        ])
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(tables[0]["pages"], [1, 2])
+        self.assertEqual(tables[0]["row_count"], 2)
+        self.assertEqual([row for _index, row in rows], [[1, "Pen", 2], [2, "Ink", 3]])
+
+    def test_table_continues_without_header(self):
+        tables, rows = self._plan([
+            {"page": 1, "tables": [[["Item", "Qty"], ["Pen", "2"]]]},
+            {"page": 2, "tables": [[["Ink", "3"]]]},
+        ])
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(rows[-1], (0, [2, "Ink", 3]))
+
+    def test_different_width_or_gap_starts_new_table(self):
+        tables, _rows = self._plan([
+            {"page": 1, "tables": [[["Item", "Qty"], ["Pen", "2"]]]},
+            {"page": 2, "tables": [[["a", "b", "c"]]]},
+            {"page": 4, "tables": [[["x", "y", "z"]]]},
+        ])
+        self.assertEqual([t["pages"] for t in tables], [[1], [2], [4]])
+
+    def test_text_only_table_has_no_header(self):
+        tables, rows = self._plan([{"page": 1, "tables": [[["Name", "City"], ["Ann", "Oslo"]]]}])
+        self.assertFalse(tables[0]["has_header"])
+        self.assertEqual(tables[0]["columns"], ["page", "column_1", "column_2"])
+        self.assertEqual(len(rows), 2)
+
+    def test_mixed_column_falls_back_to_string(self):
+        tables, rows = self._plan([
+            {"page": 1, "tables": [[["Ref", "Amount"], ["A", "1"], ["B", "n/a"], ["C", "2"]]]},
+        ])
+        self.assertFalse(tables[0]["has_header"])
+        self.assertEqual(tables[0]["types"], ["string", "string"])
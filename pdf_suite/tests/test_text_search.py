@@ -0,0 +1,74 @@
+import sys
+import unittest
+from unittest import mock
+
+from pdf_suite.utils import text_search
+from pdf_suite.utils.text_search import PatternMatcher, _compile_literals, compile_pattern, match_boxes
+
+
+class TestCompilePattern(unittest.TestCase):
+    def test_accepts_ordinary_patterns(self):
+        for pattern in (r"\d{3}-\d{2}-\d{4}", r"[A-Z]{2}\d+", r"(foo|bar)baz", r"\w+@\w+\.com"):
+            self.assertTrue(compile_pattern(pattern).search("x AB12 123-45-6789 a@b.com foobaz"))
+
+    def test_rejects_nested_repeats(self):
+        for pattern in (r"(a+)+", r"(\w*)*x", r"((ab)+c?)*"):
+            with self.assertRaises(ValueError):
+                compile_pattern(pattern)
+
+    def test_rejects_invalid_and_long_patterns(self):
+        with self.assertRaises(ValueError):
+            compile_pattern("(unclosed")
+        with self.assertRaises(ValueError):
+            compile_pattern("a" * (text_search.MAX_PATTERN_LENGTH + 1))
+
+
+class TestPatternMatcher(unittest.TestCase):
+    def test_terms_and_patterns(self):
+        matcher = PatternMatcher(["secret"], [r"\d{3}-\d{2}-\d{4}"])
+        self.assertEqual(
+            list(matcher.find("my Secret is 123-45-6789")),
+            [(3, 9, "secret"), (13, 24, r"\d{3}-\d{2}-\d{4}")],
+        )
+
+    def test_case_sensitive(self):
+        matcher = PatternMatcher(["Secret"], case_sensitive=True)
+        self.assertEqual(list(matcher.find("secret Secret")), [(7, 13, "Secret")])
+
+    def test_term_whitespace_matches_any_whitespace(self):
+        matcher = PatternMatcher(["John Smith"])
+        self.assertEqual(list(matcher.find("John\nSmith")), [(0, 10, "John Smith")])
+
+    def test_requires_something_to_match(self):
+        with self.assertRaises(ValueError):
+            PatternMatcher(["  "], [""])
+
+    def test_slow_pattern_exhausts_time_budget(self):
+        matcher = PatternMatcher(patterns=[r"(a|aa)*$"], time_budget=0.2)
+        with self.assertRaises(ValueError):
+            list(matcher.find("a" * 5000 + "!"))
+
+
+class TestLiterals(unittest.TestCase):
+    def test_leftmost_longest_without_overlaps(self):
+        find = _compile_literals(["he", "hers", "she", "his"])
+        self.assertEqual(list(find("ushers his")), [(1, 4, "she"), (7, 10, "his")])
+        self.assertEqual(list(find("hers")), [(0, 4, "hers")])
+
+    def test_regex_fallback_matches_automaton(self):
+        terms = ["ab", "abc", "bcd", "c"]
+        text = "abcd abc bcd c"
+        with_automaton = list(_compile_literals(terms)(text))
+        with mock.patch.dict(sys.modules, {"ahocorasick": None}):
+            fallback = list(_compile_literals(terms)(text))
+        self.assertEqual(with_automaton, fallback)
+
+
+class TestMatchBoxes(unittest.TestCase):
+    def test_boxes_per_line(self):
+        text = "ab\ncd"
+        boxes = [[10, 10, 15, 20], [15, 10, 20, 20], None, [10, 30, 15, 40], [15, 30, 20, 40]]
+        page = {"text": text, "boxes": boxes, "height": 100}
+        found, counts = match_boxes(page, PatternMatcher(["b c"]))
+        self.assertEqual(found, [(15, 80, 5, 10), (10, 60, 5, 10)])
+        self.assertEqual(counts, {"b c": 1})
@@ -0,0 +1,139 @@
+"""Size-capped on-disk LRU caches for PDF Suite."""
+import hashlib
+import json
+import os
+import tempfile
+import frappe
+
+# Caches live under <site>/private/pdf_suite_cache/<namespace>
+CACHE_DIR = "pdf_suite_cache"
+
+_caches = {}
+
+
+def get_disk_cache(namespace, max_mb=256):
+    """Get the cache for `namespace` on the current site.
+
+    The size cap can be overridden per site with the
+    `pdf_suite_<namespace>_cache_mb` site config key.
+    """
+    key = (frappe.local.site, namespace)
+    if key not in _caches:
+        max_mb = frappe.conf.get(f"pdf_suite_{namespace}_cache_mb") or max_mb
+        path = frappe.get_site_path("private", CACHE_DIR, namespace)
+        _caches[key] = DiskCache(path, int(max_mb) * 1024 * 1024)
+    return _caches[key]
+
+
+def hash_key(*parts):
+    """Build a cache key from arbitrary parts (bytes are hashed as-is)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode()
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class DiskCache:
+    """Key/value store with one file per entry.
+
+    Reads refresh the entry's mtime; once enough new data has been written,
+    the least recently used entries are removed until the cache is back under
+    `max_bytes`. Writes are atomic, so worker processes can share a cache.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._written = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def get(self, key):
+        """Return cached bytes for `key`, or None."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        """Store bytes under `key`."""
+        path = self._entry_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        # Scanning the cache is not free, so only evict every ~5% of capacity
+        self._written += len(data)
+        if self._written >= self.max_bytes // 20:
+            self._written = 0
+            self.evict()
+
+    def get_json(self, key):
+        data = self.get(key)
+        return json.loads(data) if data is not None else None
+
+    def set_json(self, key, value):
+        self.set(key, json.dumps(value, separators=(",", ":")).encode())
+
+    def contains(self, key):
+        """Return True if `key` is cached (without counting as a use)."""
+        return os.path.exists(self._entry_path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Remove least recently used entries until under the size cap."""
+        entries = []
+        total = 0
+        for bucket in os.scandir(self.path):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% so eviction does not run again on the next write
+        target = self.max_bytes * 0.9
+        for _mtime, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _entry_path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.path, digest[:2], digest)
@@ -0,0 +1,641 @@
+"""Remove page content under redaction rectangles.
+
+Each affected page's content stream is tokenized once with pikepdf and
+walked with a minimal graphics/text state (CTM, text matrix, font metrics):
+
+- glyphs whose box intersects a rectangle are dropped from their
+  Tj/TJ/'/" string and replaced by a TJ displacement, so the remaining
+  text keeps its position;
+- image XObjects drawn under a rectangle get those pixels (and their soft
+  mask) blanked in a new image object; inline images and images that
+  cannot be decoded are dropped;
+- Form XObjects under a rectangle are filtered recursively into new,
+  page-private copies.
+
+Only pages whose content changes are rewritten. Replaced images and forms
+are also dropped from the rewritten page's (or form's) resources, so
+nothing references them and the original bytes are not written to the
+output unless another page still draws them.
+Vector paths are left in place (the painted box covers them). No frappe
+imports here.
+"""
+import math
+import zlib
+
+# Grid cell size (points) of the rectangle index
+GRID_CELL = 64
+
+# Glyph box height when the font has no usable descriptor, in text space units
+DEFAULT_ASCENT = 0.8
+DEFAULT_DESCENT = -0.2
+
+# Nested Form XObjects followed before giving up
+MAX_FORM_DEPTH = 12
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+class RectIndex:
+    """Uniform grid over axis-aligned rectangles for fast overlap queries.
+
+    Args:
+        rects: (x0, y0, x1, y1) tuples
+        cell: Grid cell size in points
+    """
+
+    def __init__(self, rects, cell=GRID_CELL):
+        self.cell = cell
+        self.rects = [
+            (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            for x0, y0, x1, y1 in rects
+        ]
+        self.grid = {}
+        for rect in self.rects:
+            for key in self._cells(*rect):
+                self.grid.setdefault(key, []).append(rect)
+        self.bounds = (
+            min(r[0] for r in self.rects), min(r[1] for r in self.rects),
+            max(r[2] for r in self.rects), max(r[3] for r in self.rects),
+        ) if self.rects else None
+
+    def query(self, x0, y0, x1, y1):
+        """Rectangles overlapping the box (touching edges do not count)."""
+        if not self.bounds or not _overlaps((x0, y0, x1, y1), self.bounds):
+            return []
+        found = []
+        for key in self._cells(
+            max(x0, self.bounds[0]), max(y0, self.bounds[1]),
+            min(x1, self.bounds[2]), min(y1, self.bounds[3]),
+        ):
+            for rect in self.grid.get(key, ()):
+                if rect not in found and _overlaps((x0, y0, x1, y1), rect):
+                    found.append(rect)
+        return found
+
+    def intersects(self, x0, y0, x1, y1):
+        if not self.bounds or not _overlaps((x0, y0, x1, y1), self.bounds):
+            return False
+        for key in self._cells(
+            max(x0, self.bounds[0]), max(y0, self.bounds[1]),
+            min(x1, self.bounds[2]), min(y1, self.bounds[3]),
+        ):
+            for rect in self.grid.get(key, ()):
+                if _overlaps((x0, y0, x1, y1), rect):
+                    return True
+        return False
+
+    def _cells(self, x0, y0, x1, y1):
+        c = self.cell
+        for i in range(math.floor(x0 / c), math.floor(x1 / c) + 1):
+            for j in range(math.floor(y0 / c), math.floor(y1 / c) + 1):
+                yield i, j
+
+
+def remove_content(pdf, rects_by_page):
+    """Remove text and image content under rectangles, in place.
+
+    Args:
+        pdf: Open pikepdf.Pdf
+        rects_by_page: {page index (0-based): [(x, y, width, height), ...]}
+            in points from the lower-left corner of the page's MediaBox
+
+    Returns counts: {"pages": rewritten, "glyphs": removed, "images": changed or dropped}.
+    """
+    import pikepdf
+
+    stats = {"pages": 0, "glyphs": 0, "images": 0}
+    font_cache = {}
+    for index, rects in sorted(rects_by_page.items()):
+        if not rects or not 0 <= index < len(pdf.pages):
+            continue
+        page = pdf.pages[index]
+        box = page.mediabox
+        x0, y0 = float(box[0]), float(box[1])
+        rect_index = RectIndex([(x0 + x, y0 + y, x0 + x + w, y0 + y + h) for x, y, w, h in rects])
+
+        walker = _Walker(pdf, rect_index, font_cache, stats)
+        resources = _Resources(pdf, page.obj.get("/Resources"))
+        instructions, changed = walker.filter(page, resources, _GraphicsState(IDENTITY))
+        if changed:
+            page.obj.Contents = pdf.make_stream(pikepdf.unparse_content_stream(instructions))
+            if resources.private is not None:
+                resources.prune(instructions)
+                page.obj.Resources = resources.private
+            stats["pages"] += 1
+    return stats
+
+
+class _GraphicsState:
+    """The parts of the graphics state that position glyphs and images."""
+
+    def __init__(self, ctm):
+        self.ctm = ctm
+        self.font = None
+        self.size = 0.0
+        self.char_spacing = 0.0
+        self.word_spacing = 0.0
+        self.scale = 1.0
+        self.leading = 0.0
+        self.rise = 0.0
+
+    def copy(self):
+        state = _GraphicsState(self.ctm)
+        state.__dict__.update(self.__dict__)
+        return state
+
+
+class _Resources:
+    """A resource dictionary, copied on the first write so shared ones stay intact."""
+
+    def __init__(self, pdf, resources):
+        self.pdf = pdf
+        self.resources = resources
+        self.private = None
+
+    def get(self, category, name):
+        if self.resources is None:
+            return None
+        return self.resources.get(category, {}).get(name)
+
+    def add_xobject(self, name, xobject):
+        """Register `xobject` under a new name derived from `name` and return it."""
+        import pikepdf
+
+        if self.private is None:
+            source = self.resources if self.resources is not None else {}
+            self.private = pikepdf.Dictionary({key: value for key, value in source.items()})
+            self.private.XObject = pikepdf.Dictionary(
+                {key: value for key, value in source.get("/XObject", {}).items()}
+            )
+        xobjects = self.private.XObject
+        n = 1
+        while f"{name}R{n}" in xobjects:
+            n += 1
+        new_name = f"{name}R{n}"
+        xobjects[new_name] = xobject
+        return new_name
+
+    def prune(self, instructions):
+        """Drop XObjects the filtered `instructions` no longer draw from the private copy.
+
+        Replaced originals would otherwise stay reachable from the page and
+        be written to the output with the redacted content intact. Skipped
+        when a drawn Form XObject inherits these resources, since the names
+        it uses are not known here.
+        """
+        import pikepdf
+
+        if self.private is None:
+            return
+        xobjects = self.private.XObject
+        used = set()
+        for instruction in instructions:
+            if isinstance(instruction, pikepdf.ContentStreamInlineImage) or str(instruction.operator) != "Do":
+                continue
+            name = str(instruction.operands[0])
+            used.add(name)
+            target = xobjects.get(name)
+            if target is not None and target.get("/Subtype") == "/Form" and "/Resources" not in target:
+                return
+        for name in list(xobjects.keys()):
+            if name not in used:
+                del xobjects[name]
+
+
+class _Walker:
+    def __init__(self, pdf, rect_index, font_cache, stats):
+        self.pdf = pdf
+        self.index = rect_index
+        self.font_cache = font_cache
+        self.stats = stats
+
+    def filter(self, owner, resources, state, depth=0):
+        """Return (instructions, changed) for a page or Form XObject."""
+        import pikepdf
+
+        out = []
+        changed = False
+        stack = []
+        tm = tlm = IDENTITY
+
+        for instruction in pikepdf.parse_content_stream(owner):
+            if isinstance(instruction, pikepdf.ContentStreamInlineImage):
+                if self.index.intersects(*_bbox(state.ctm, 0, 0, 1, 1)):
+                    self.stats["images"] += 1
+                    changed = True
+                    continue
+                out.append(instruction)
+                continue
+
+            operands, op = instruction.operands, str(instruction.operator)
+
+            if op == "q":
+                stack.append(state.copy())
+            elif op == "Q":
+                if stack:
+                    state = stack.pop()
+            elif op == "cm":
+                state.ctm = _mul(tuple(float(v) for v in operands), state.ctm)
+            elif op == "BT":
+                tm = tlm = IDENTITY
+            elif op in ("Td", "TD"):
+                tx, ty = float(operands[0]), float(operands[1])
+                if op == "TD":
+                    state.leading = -ty
+                tm = tlm = _mul((1, 0, 0, 1, tx, ty), tlm)
+            elif op == "Tm":
+                tm = tlm = tuple(float(v) for v in operands)
+            elif op == "T*":
+                tm = tlm = _mul((1, 0, 0, 1, 0, -state.leading), tlm)
+            elif op == "Tc":
+                state.char_spacing = float(operands[0])
+            elif op == "Tw":
+                state.word_spacing = float(operands[0])
+            elif op == "Tz":
+                state.scale = float(operands[0]) / 100
+            elif op == "TL":
+                state.leading = float(operands[0])
+            elif op == "Ts":
+                state.rise = float(operands[0])
+            elif op == "Tf":
+                state.font = _font_metrics(resources.get("/Font", str(operands[0])), self.font_cache)
+                state.size = float(operands[1])
+            elif op in ("Tj", "TJ", "'", '"'):
+                if op in ("'", '"'):
+                    if op == '"':
+                        state.word_spacing = float(operands[0])
+                        state.char_spacing = float(operands[1])
+                    tm = tlm = _mul((1, 0, 0, 1, 0, -state.leading), tlm)
+                items = list(operands[0]) if op == "TJ" else [operands[-1]]
+                shown, tm = self._show(items, tm, state)
+                if shown is not None:
+                    changed = True
+                    if op == '"':
+                        out.append(_instruction([operands[0]], "Tw"))
+                        out.append(_instruction([operands[1]], "Tc"))
+                    if op in ("'", '"'):
+                        out.append(_instruction([], "T*"))
+                    out.append(_instruction([pikepdf.Array(shown)], "TJ"))
+                    continue
+            elif op == "Do":
+                replacement = self._xobject(str(operands[0]), resources, state, depth)
+                if replacement is not None:
+                    changed = True
+                    if replacement:
+                        out.append(_instruction([pikepdf.Name(replacement)], "Do"))
+                    continue
+
+            out.append(instruction)
+
+        return out, changed
+
+    def _show(self, items, tm, state):
+        """Walk a text-showing operand list.
+
+        Returns (new TJ items or None when nothing was removed, text matrix
+        after the text).
+        """
+        import pikepdf
+
+        font = state.font
+        size = state.size
+        if font is None or not size:
+            return None, tm
+
+        trm_scale = (size * state.scale, 0, 0, size, 0, state.rise)
+        m = _mul(tm, state.ctm)
+        advance = 0.0
+        shown = []
+        kept = b""
+        removed = False
+
+        for item in items:
+            if not isinstance(item, pikepdf.String):
+                adjust = float(item)
+                advance -= adjust / 1000 * size * state.scale
+                if kept:
+                    shown.append(pikepdf.String(kept))
+                    kept = b""
+                shown.append(adjust)
+                continue
+            for code, width, is_space in font.glyphs(bytes(item)):
+                glyph_advance = width * size + state.char_spacing + (state.word_spacing if is_space else 0)
+                glyph_advance *= state.scale
+                glyph_m = _mul(trm_scale, (m[0], m[1], m[2], m[3], m[4] + advance * m[0], m[5] + advance * m[1]))
+                if self.index.intersects(*_bbox(glyph_m, 0, font.descent, max(width, 0.001), font.ascent)):
+                    removed = True
+                    self.stats["glyphs"] += 1
+                    if kept:
+                        shown.append(pikepdf.String(kept))
+                        kept = b""
+                    shown.append(-glyph_advance / (size * state.scale) * 1000)
+                else:
+                    kept += code
+                advance += glyph_advance
+
+        tm = (tm[0], tm[1], tm[2], tm[3], tm[4] + advance * tm[0], tm[5] + advance * tm[1])
+        if not removed:
+            return None, tm
+        if kept:
+            shown.append(pikepdf.String(kept))
+        return _merge_adjustments(shown), tm
+
+    def _xobject(self, name, resources, state, depth):
+        """Handle a Do operator.
+
+        Returns None to keep it, "" to drop it, or the name of a replacement
+        XObject registered in `resources`.
+        """
+        import pikepdf
+
+        xobject = resources.get("/XObject", name)
+        if xobject is None:
+            return None
+        subtype = xobject.get("/Subtype")
+
+        if subtype == "/Image":
+            rects = self.index.query(*_bbox(state.ctm, 0, 0, 1, 1))
+            if not rects:
+                return None
+            self.stats["images"] += 1
+            image = _blank_image(self.pdf, xobject, state.ctm, rects)
+            return resources.add_xobject(name, image) if image is not None else ""
+
+        if subtype == "/Form":
+            matrix = tuple(float(v) for v in xobject.get("/Matrix", IDENTITY))
+            ctm = _mul(matrix, state.ctm)
+            bbox = [float(v) for v in xobject.get("/BBox", [0, 0, 0, 0])]
+            if not self.index.intersects(*_bbox(ctm, *bbox)):
+                return None
+            if depth >= MAX_FORM_DEPTH:
+                return ""
+            form_state = state.copy()
+            form_state.ctm = ctm
+            own_resources = xobject.get("/Resources")
+            form_resources = _Resources(
+                self.pdf, own_resources if own_resources is not None else resources.private or resources.resources
+            )
+            instructions, changed = self.filter(xobject, form_resources, form_state, depth + 1)
+            if not changed:
+                return None
+            form = pikepdf.Stream(self.pdf, pikepdf.unparse_content_stream(instructions))
+            for key, value in xobject.items():
+                if key not in ("/Length", "/Filter", "/DecodeParms"):
+                    form[key] = value
+            if form_resources.private is not None:
+                form_resources.prune(instructions)
+                form.Resources = form_resources.private
+            elif own_resources is None and form_resources.resources is not None:
+                # Pin the inherited resources: the parent's copy may be pruned
+                form.Resources = pikepdf.Dictionary(dict(form_resources.resources.items()))
+            return resources.add_xobject(name, form)
+
+        return None
+
+
+class _FontMetrics:
+    def __init__(self, code_width, widths, default_width, scale, ascent, descent):
+        self.code_width = code_width
+        self.widths = widths
+        self.default_width = default_width
+        self.scale = scale
+        self.ascent = ascent
+        self.descent = descent
+
+    def glyphs(self, raw):
+        """Yield (code bytes, width in text space units, is single-byte space)."""
+        n = self.code_width
+        for i in range(0, len(raw) - n + 1, n):
+            code_bytes = raw[i : i + n]
+            code = int.from_bytes(code_bytes, "big")
+            width = self.widths.get(code, self.default_width) * self.scale
+            yield code_bytes, width, n == 1 and code == 32
+
+
+def _font_metrics(font, font_cache):
+    """Build (and cache per font object) code widths and glyph heights for a font."""
+    if font is None:
+        return None
+    key = font.objgen if font.objgen != (0, 0) else id(font)
+    if key not in font_cache:
+        try:
+            font_cache[key] = _build_font_metrics(font)
+        except Exception:
+            font_cache[key] = _FontMetrics(1, {}, 500, 0.001, DEFAULT_ASCENT, DEFAULT_DESCENT)
+    return font_cache[key]
+
+
+def _build_font_metrics(font):
+    import pikepdf
+
+    subtype = font.get("/Subtype")
+    if subtype == "/Type0":
+        descendant = font.DescendantFonts[0]
+        widths = {}
+        w = list(descendant.get("/W", []))
+        i = 0
+        while i + 1 < len(w):
+            first = int(w[i])
+            if isinstance(w[i + 1], pikepdf.Array):
+                for offset, width in enumerate(w[i + 1]):
+                    widths[first + offset] = float(width)
+                i += 2
+            else:
+                width = float(w[i + 2])
+                for code in range(first, int(w[i + 1]) + 1):
+                    widths[code] = width
+                i += 3
+        ascent, descent = _font_heights(descendant.get("/FontDescriptor"))
+        return _FontMetrics(
+            _cid_code_width(font.get("/Encoding")),
+            widths,
+            float(descendant.get("/DW", 1000)),
+            0.001,
+            ascent,
+            descent,
+        )
+
+    scale = 0.001
+    if subtype == "/Type3":
+        scale = float(font.get("/FontMatrix", [0.001])[0])
+    descriptor = font.get("/FontDescriptor")
+    default_width = 500.0
+    if descriptor is not None:
+        default_width = float(descriptor.get("/MissingWidth", descriptor.get("/AvgWidth", 500)) or 500)
+
+    widths = {}
+    if "/Widths" in font:
+        first = int(font.get("/FirstChar", 0))
+        widths = {first + i: float(width) for i, width in enumerate(font.Widths)}
+    else:
+        widths = _standard_widths(str(font.get("/BaseFont", "")).lstrip("/"))
+
+    if subtype == "/Type3":
+        bbox = [float(v) * scale for v in font.get("/FontBBox", [0, 0, 0, 0])]
+        ascent, descent = (bbox[3], bbox[1]) if bbox[3] > bbox[1] else (DEFAULT_ASCENT, DEFAULT_DESCENT)
+    else:
+        ascent, descent = _font_heights(descriptor)
+    return _FontMetrics(1, widths, default_width, scale, ascent, descent)
+
+
+def _font_heights(descriptor):
+    """(ascent, descent) in text space units from a font descriptor."""
+    if descriptor is None:
+        return DEFAULT_ASCENT, DEFAULT_DESCENT
+    ascent = float(descriptor.get("/Ascent", 0)) / 1000
+    descent = float(descriptor.get("/Descent", 0)) / 1000
+    if ascent <= descent or ascent <= 0:
+        return DEFAULT_ASCENT, DEFAULT_DESCENT
+    return ascent, min(descent, 0.0)
+
+
+def _cid_code_width(encoding):
+    """Code length in bytes for a Type0 font's CMap."""
+    import pikepdf
+    from pdf_suite.utils.fast_text import _CODESPACE, _HEX
+
+    if not isinstance(encoding, pikepdf.Stream):
+        # Identity-H/V and the predefined CJK CMaps use two-byte codes
+        return 2
+    widths = [
+        len(low.replace(b" ", b"")) // 2
+        for block in _CODESPACE.findall(encoding.read_bytes())
+        for low in _HEX.findall(block)[0::2]
+    ]
+    return max(widths) if widths else 2
+
+
+def _standard_widths(base_font):
+    """Widths of a standard 14 font (reportlab's AFM data), keyed by code."""
+    from reportlab.pdfbase import pdfmetrics
+
+    try:
+        widths = pdfmetrics.getFont(base_font).widths
+    except Exception:
+        return {}
+    return dict(enumerate(widths))
+
+
+def _blank_image(pdf, xobject, ctm, rects):
+    """A copy of an image XObject with the pixels under `rects` blanked, or None."""
+    import pikepdf
+    from PIL import ImageDraw
+
+    inverse = _invert(ctm)
+    if inverse is None or xobject.get("/ImageMask"):
+        return None
+    try:
+        image = pikepdf.PdfImage(xobject).as_pil_image()
+    except Exception:
+        return None
+
+    if image.mode not in _COLOR_SPACES:
+        image = image.convert("RGB")
+    regions = [_pixel_region(inverse, rect, image.size) for rect in rects]
+    draw = ImageDraw.Draw(image)
+    for region in filter(None, regions):
+        draw.rectangle(region, fill=_WHITE[image.mode])
+
+    blanked = _image_stream(pdf, image)
+    smask = xobject.get("/SMask")
+    if smask is not None:
+        try:
+            mask = pikepdf.PdfImage(smask).as_pil_image().convert("L")
+        except Exception:
+            return None
+        draw = ImageDraw.Draw(mask)
+        for region in filter(None, (_pixel_region(inverse, rect, mask.size) for rect in rects)):
+            draw.rectangle(region, fill=0)
+        blanked.SMask = _image_stream(pdf, mask)
+    for key in ("/Interpolate", "/Intent"):
+        if key in xobject:
+            blanked[key] = xobject[key]
+    if isinstance(xobject.get("/Mask"), pikepdf.Array):
+        blanked.Mask = xobject.Mask
+    return blanked
+
+
+_COLOR_SPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+_WHITE = {"L": 255, "RGB": (255, 255, 255), "CMYK": (0, 0, 0, 0)}
+
+
+def _image_stream(pdf, image):
+    import pikepdf
+
+    stream = pikepdf.Stream(pdf, zlib.compress(image.tobytes()))
+    stream.Type = pikepdf.Name.XObject
+    stream.Subtype = pikepdf.Name.Image
+    stream.Width = image.width
+    stream.Height = image.height
+    stream.ColorSpace = pikepdf.Name(_COLOR_SPACES[image.mode])
+    stream.BitsPerComponent = 8
+    stream.Filter = pikepdf.Name.FlateDecode
+    return stream
+
+
+def _pixel_region(inverse, rect, size):
+    """Pixel box [x0, y0, x1, y1] (inclusive) of a page rectangle on an image, or None."""
+    width, height = size
+    u0, v0, u1, v1 = _bbox(inverse, *rect)
+    u0, u1 = max(u0, 0.0), min(u1, 1.0)
+    v0, v1 = max(v0, 0.0), min(v1, 1.0)
+    if u0 >= u1 or v0 >= v1:
+        return None
+    # Image space is the unit square with the first row at the top
+    return [
+        math.floor(u0 * width), math.floor((1 - v1) * height),
+        math.ceil(u1 * width) - 1, math.ceil((1 - v0) * height) - 1,
+    ]
+
+
+def _merge_adjustments(items):
+    """Merge adjacent TJ numbers and drop zero ones."""
+    merged = []
+    for item in items:
+        if isinstance(item, float):
+            if merged and isinstance(merged[-1], float):
+                merged[-1] += item
+            else:
+                merged.append(item)
+        else:
+            merged.append(item)
+    return [round(item, 3) if isinstance(item, float) else item for item in merged if item != 0]
+
+
+def _instruction(operands, operator):
+    import pikepdf
+
+    return pikepdf.ContentStreamInstruction(operands, pikepdf.Operator(operator))
+
+
+def _mul(m, n):
+    """Matrix product m × n (PDF row-vector convention: apply m, then n)."""
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = n
+    return (
+        a * A + b * C, a * B + b * D,
+        c * A + d * C, c * B + d * D,
+        e * A + f * C + E, e * B + f * D + F,
+    )
+
+
+def _invert(m):
+    a, b, c, d, e, f = m
+    det = a * d - b * c
+    if abs(det) < 1e-12:
+        return None
+    return (d / det, -b / det, -c / det, a / det, (c * f - d * e) / det, (b * e - a * f) / det)
+
+
+def _bbox(m, x0, y0, x1, y1):
+    """Axis-aligned bounds of a box transformed by matrix m."""
+    xs = []
+    ys = []
+    for x, y in ((x0, y0), (x1, y0), (x0, y1), (x1, y1)):
+        xs.append(m[0] * x + m[2] * y + m[4])
+        ys.append(m[1] * x + m[3] * y + m[5])
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and a[2] > b[0] and a[1] < b[3] and a[3] > b[1]
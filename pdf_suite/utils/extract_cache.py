@@ -0,0 +1,68 @@
+"""Persistent per-page cache of extraction results.
+
+Entries are keyed by file content hash, page, extraction kind and extractor
+version, so a document is analysed once no matter which API asks for it.
+Only uncached pages are sent to the extraction workers.
+"""
+from importlib import metadata
+from pdf_suite.utils import extractors
+from pdf_suite.utils.cache import get_disk_cache
+from pdf_suite.utils.file_utils import get_content_hash
+from pdf_suite.utils.parallel import map_page_chunks
+
+# Bump when the output of any chunk function changes
+EXTRACTOR_VERSION = 2
+
+KINDS = {
+    "text": extractors.text_chunk,
+    "text_fast": extractors.fast_text_chunk,
+    "words": extractors.words_chunk,
+    "chars": extractors.chars_chunk,
+    "tables": extractors.tables_chunk,
+    "tables_lines": extractors.ruled_tables_chunk,
+    "images": extractors.images_chunk,
+}
+
+_version = None
+
+
+def get_extract_cache():
+    return get_disk_cache("extract", max_mb=1024)
+
+
+def get_page_results(path, kind, pages, workers=1, chunk_size=None, cache=None):
+    """Return one extraction result per page in `pages` (0-indexed), in order.
+
+    Pass `cache` (from get_extract_cache) when calling outside a request
+    context, e.g. while a streamed response is being sent.
+    """
+    cache = cache or get_extract_cache()
+    prefix = f"{kind}:{_extractor_version()}:{get_content_hash(path)}"
+
+    results = {}
+    missing = []
+    for page in pages:
+        cached = cache.get_json(f"{prefix}:{page}")
+        if cached is None:
+            missing.append(page)
+        else:
+            results[page] = cached
+
+    if missing:
+        for item in map_page_chunks(KINDS[kind], path, missing, workers, chunk_size):
+            page = item["page"] - 1
+            results[page] = item
+            cache.set_json(f"{prefix}:{page}", item)
+
+    return [results[page] for page in pages]
+
+
+def _extractor_version():
+    global _version
+    if _version is None:
+        try:
+            plumber = metadata.version("pdfplumber")
+        except metadata.PackageNotFoundError:
+            plumber = "unknown"
+        _version = f"{EXTRACTOR_VERSION}-{plumber}"
+    return _version
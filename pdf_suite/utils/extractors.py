@@ -0,0 +1,168 @@
+"""Page-chunk extraction functions run by utils.parallel workers.
+
+Each function takes a PDF path and a list of 0-indexed page numbers and
+returns exactly one result per page, so results can be cached per page.
+No frappe imports here.
+"""
+
+
+def text_chunk(path, pages):
+    """Extract text with pdfplumber's layout analysis."""
+    import pdfplumber
+
+    result = []
+    with pdfplumber.open(path) as pdf:
+        for page_num in pages:
+            page = pdf.pages[page_num]
+            result.append({
+                "page": page_num + 1,
+                "text": page.extract_text() or "",
+            })
+            page.close()
+    return result
+
+
+def fast_text_chunk(path, pages):
+    """Extract text straight from content streams, without layout analysis.
+
+    Pages with text in fonts the content-stream reader cannot decode
+    (composite fonts without ToUnicode) are read with pdfplumber instead.
+    """
+    import pikepdf
+    from pdf_suite.utils.fast_text import UndecodableFont, extract_page_text
+
+    result = []
+    font_cache = {}
+    fallback = []
+    with pikepdf.open(path) as pdf:
+        for page_num in pages:
+            try:
+                text = extract_page_text(pdf.pages[page_num], font_cache)
+            except UndecodableFont:
+                text = None
+                fallback.append(len(result))
+            result.append({"page": page_num + 1, "text": text})
+
+    if fallback:
+        plumber_text = text_chunk(path, [result[i]["page"] - 1 for i in fallback])
+        for i, entry in zip(fallback, plumber_text):
+            result[i]["text"] = entry["text"]
+    return result
+
+
+def words_chunk(path, pages):
+    """Extract word boxes (pdfplumber coordinates: top-left origin)."""
+    import pdfplumber
+
+    result = []
+    with pdfplumber.open(path) as pdf:
+        for page_num in pages:
+            page = pdf.pages[page_num]
+            words = [
+                {
+                    "text": w["text"],
+                    "x0": round(w["x0"], 2),
+                    "x1": round(w["x1"], 2),
+                    "top": round(w["top"], 2),
+                    "bottom": round(w["bottom"], 2),
+                }
+                for w in page.extract_words()
+            ]
+            result.append({
+                "page": page_num + 1,
+                "width": float(page.width),
+                "height": float(page.height),
+                "words": words,
+            })
+            page.close()
+    return result
+
+
+def chars_chunk(path, pages):
+    """Extract page text as one string with a box per character.
+
+    Words are joined by a space, or a newline where the line changes;
+    separators have no box. Boxes are [x0, top, x1, bottom] in pdfplumber
+    coordinates (top-left origin).
+    """
+    import pdfplumber
+
+    result = []
+    with pdfplumber.open(path) as pdf:
+        for page_num in pages:
+            page = pdf.pages[page_num]
+            text = []
+            boxes = []
+            last_top = None
+            for word in page.extract_words(return_chars=True):
+                if last_top is not None:
+                    text.append(" " if abs(word["top"] - last_top) <= 3 else "\n")
+                    boxes.append(None)
+                last_top = word["top"]
+                for char in word["chars"]:
+                    box = [
+                        round(char["x0"], 2),
+                        round(char["top"], 2),
+                        round(char["x1"], 2),
+                        round(char["bottom"], 2),
+                    ]
+                    text.append(char["text"])
+                    boxes.extend([box] * len(char["text"]))
+            result.append({
+                "page": page_num + 1,
+                "width": float(page.width),
+                "height": float(page.height),
+                "text": "".join(text),
+                "boxes": boxes,
+            })
+            page.close()
+    return result
+
+
+def tables_chunk(path, pages):
+    """Extract tables with pdfplumber (one entry per page, possibly empty)."""
+    import pdfplumber
+
+    result = []
+    with pdfplumber.open(path) as pdf:
+        for page_num in pages:
+            page = pdf.pages[page_num]
+            result.append({
+                "page": page_num + 1,
+                "tables": page.extract_tables() or [],
+            })
+            page.close()
+    return result
+
+
+def ruled_tables_chunk(path, pages):
+    """Extract bordered tables with the NumPy ruling-line detector."""
+    import pdfplumber
+    from pdf_suite.utils.ruled_tables import extract_tables
+
+    result = []
+    with pdfplumber.open(path) as pdf:
+        for page_num in pages:
+            page = pdf.pages[page_num]
+            result.append({
+                "page": page_num + 1,
+                "tables": extract_tables(page),
+            })
+            page.close()
+    return result
+
+
+def images_chunk(path, pages):
+    """List image XObjects drawn on each page, including inside Form XObjects."""
+    import pikepdf
+    from pdf_suite.utils.pdf_images import image_info, iter_page_images
+
+    result = []
+    with pikepdf.open(path) as pdf:
+        for page_num in pages:
+            images = [
+                image_info(name, xobject)
+                for name, xobject in iter_page_images(pdf.pages[page_num])
+            ]
+            result.append({"page": page_num + 1, "images": images})
+    return result
@@ -0,0 +1,274 @@
+"""Fast text extraction straight from page content streams.
+
+Walks the text-showing operators of each page with pikepdf's tokenizer and
+decodes strings through the font's ToUnicode CMap (or its simple-font
+encoding). There is no character layout analysis: text comes out in content
+stream order, with line breaks inferred from text positioning operators.
+Use pdfplumber ("layout" mode) when reading order matters.
+
+Composite (Type0) fonts can only be decoded through ToUnicode; pages that
+show text in one without it raise UndecodableFont, so callers can read
+those pages with pdfplumber instead.
+"""
+import re
+
+TEXT_OPERATORS = "ET Tf Td TD Tm T* Tj TJ ' \" Do"
+
+# TJ adjustments (thousandths of an em) wider than this read as a word gap
+TJ_SPACE_THRESHOLD = 200
+
+_HEX = re.compile(rb"<([0-9A-Fa-f\s]*)>")
+_BFCHAR = re.compile(rb"beginbfchar(.*?)endbfchar", re.S)
+_BFRANGE = re.compile(rb"beginbfrange(.*?)endbfrange", re.S)
+_CODESPACE = re.compile(rb"begincodespacerange(.*?)endcodespacerange", re.S)
+_RANGE_ENTRY = re.compile(rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f\s]*>|\[[^\]]*\])")
+
+_SIMPLE_ENCODINGS = {
+    "/WinAnsiEncoding": "cp1252",
+    "/MacRomanEncoding": "mac_roman",
+    # Close to Latin-1 in the printable ASCII range; quotes differ (below)
+    "/StandardEncoding": "latin-1",
+}
+
+# Codes where StandardEncoding differs from Latin-1 in common text
+_STANDARD_DIFFERENCES = {0x27: "’", 0x60: "‘"}
+
+
+class UndecodableFont(Exception):
+    """Text is shown in a composite font that has no ToUnicode map."""
+
+
+def extract_page_text(page, font_cache=None):
+    """Return the text of a pikepdf page.
+
+    Raises UndecodableFont if the page shows text this module cannot decode.
+    """
+    font_cache = {} if font_cache is None else font_cache
+    lines = [[]]
+    _walk(page, page.obj.get("/Resources"), lines, font_cache, set())
+    return "\n".join("".join(line).rstrip() for line in lines).strip("\n")
+
+
+def _walk(content_owner, resources, lines, font_cache, stack):
+    """Append the text of a page or form to `lines`.
+
+    `stack` holds the forms being walked, so a form drawing itself is
+    skipped while a form drawn several times contributes its text each time.
+    """
+    import pikepdf
+
+    fonts = resources.get("/Font", {}) if resources is not None else {}
+    xobjects = resources.get("/XObject", {}) if resources is not None else {}
+
+    decoder = None
+    font_size = 0.0
+    line_y = None
+    y_scale = 1.0
+
+    def newline():
+        if lines[-1]:
+            lines.append([])
+
+    def write(text):
+        if text:
+            lines[-1].append(text)
+
+    for operands, operator in pikepdf.parse_content_stream(content_owner, TEXT_OPERATORS):
+        op = str(operator)
+
+        if op in ("Tj", "'", '"'):
+            if op != "Tj":
+                newline()
+            if decoder:
+                write(decoder(bytes(operands[-1])))
+        elif op == "TJ":
+            if not decoder:
+                continue
+            for item in operands[0]:
+                if isinstance(item, pikepdf.String):
+                    write(decoder(bytes(item)))
+                elif float(item) < -TJ_SPACE_THRESHOLD and not _ends_with_space(lines[-1]):
+                    write(" ")
+        elif op == "Tf":
+            decoder = _get_decoder(fonts.get(str(operands[0])), font_cache)
+            font_size = abs(float(operands[1]))
+        elif op in ("Td", "TD"):
+            tx, ty = float(operands[0]), float(operands[1])
+            if ty:
+                newline()
+                if line_y is not None:
+                    line_y += ty * y_scale
+            elif tx > 0 and not _ends_with_space(lines[-1]):
+                write(" ")
+        elif op == "T*":
+            newline()
+        elif op == "Tm":
+            y_scale = float(operands[3]) or 1.0
+            new_y = float(operands[5])
+            if line_y is not None and abs(new_y - line_y) > max(font_size * abs(y_scale), 1.0) * 0.5:
+                newline()
+            elif lines[-1] and not _ends_with_space(lines[-1]):
+                write(" ")
+            line_y = new_y
+        elif op == "ET":
+            if not _ends_with_space(lines[-1]):
+                write(" ")
+        elif op == "Do":
+            xobject = xobjects.get(str(operands[0]))
+            if xobject is None or xobject.get("/Subtype") != "/Form":
+                continue
+            key = xobject.objgen
+            if key in stack:
+                continue
+            stack.add(key)
+            newline()
+            _walk(xobject, xobject.get("/Resources", resources), lines, font_cache, stack)
+            stack.discard(key)
+            newline()
+
+
+def _ends_with_space(line):
+    return not line or line[-1].endswith((" ", "\n"))
+
+
+def _get_decoder(font, font_cache):
+    """Build (and cache per font object) a bytes -> str decoder for a font."""
+    if font is None:
+        return None
+
+    key = font.objgen if font.objgen != (0, 0) else id(font)
+    if key in font_cache:
+        return font_cache[key]
+
+    decoder = None
+    to_unicode = font.get("/ToUnicode")
+    if to_unicode is not None:
+        try:
+            decoder = _cmap_decoder(to_unicode.read_bytes())
+        except Exception:
+            decoder = None
+
+    if decoder is None:
+        decoder = _undecodable if font.get("/Subtype") == "/Type0" else _simple_font_decoder(font)
+
+    font_cache[key] = decoder
+    return decoder
+
+
+def _undecodable(raw):
+    raise UndecodableFont("Composite font without a ToUnicode map")
+
+
+def _cmap_decoder(data):
+    """Parse a ToUnicode CMap into a decoder function."""
+    mapping = {}
+
+    for block in _BFCHAR.findall(data):
+        codes = _HEX.findall(block)
+        for src, dst in zip(codes[0::2], codes[1::2]):
+            mapping[_code(src)] = _utf16(dst)
+
+    for block in _BFRANGE.findall(data):
+        for start, end, target in _RANGE_ENTRY.findall(block):
+            lo, hi = int(start, 16), int(end, 16)
+            if target.startswith(b"["):
+                for offset, dst in enumerate(_HEX.findall(target)):
+                    mapping[lo + offset] = _utf16(dst)
+            else:
+                base = _utf16(target.strip(b"<>"))
+                if not base:
+                    continue
+                prefix, last = base[:-1], ord(base[-1])
+                for offset in range(hi - lo + 1):
+                    mapping[lo + offset] = prefix + chr(last + offset)
+
+    # Code width in bytes from the codespace ranges (mixed-width CMaps are rare)
+    widths = [
+        len(re.sub(rb"\s", b"", low)) // 2
+        for block in _CODESPACE.findall(data)
+        for low in _HEX.findall(block)[0::2]
+    ]
+    width = max(widths) if widths else (2 if any(code > 0xFF for code in mapping) else 1)
+
+    def decode(raw):
+        out = []
+        for i in range(0, len(raw) - width + 1, width):
+            code = int.from_bytes(raw[i : i + width], "big")
+            out.append(mapping.get(code, ""))
+        return "".join(out)
+
+    return decode
+
+
+def _simple_font_decoder(font):
+    """Decoder for single-byte fonts without a ToUnicode map."""
+    import pikepdf
+
+    encoding = font.get("/Encoding")
+    base_name = None
+    differences = {}
+
+    if isinstance(encoding, pikepdf.Name):
+        base_name = str(encoding)
+    elif isinstance(encoding, pikepdf.Dictionary):
+        base_name = str(encoding.get("/BaseEncoding", "")) or None
+        code = 0
+        for item in encoding.get("/Differences", []):
+            if isinstance(item, pikepdf.Name):
+                char = _glyph_to_char(str(item))
+                if char is not None:
+                    differences[code] = char
+                code += 1
+            else:
+                code = int(item)
+
+    # No encoding means the font's built-in one, usually close to WinAnsi;
+    # other named encodings (e.g. MacExpertEncoding) read as Latin-1
+    base = _SIMPLE_ENCODINGS.get(base_name, "cp1252" if base_name is None else "latin-1")
+    table = [bytes([i]).decode(base, errors="replace") for i in range(256)]
+    if base_name == "/StandardEncoding":
+        for code, char in _STANDARD_DIFFERENCES.items():
+            table[code] = char
+    for code, char in differences.items():
+        if 0 <= code < 256:
+            table[code] = char
+
+    return lambda raw: "".join(table[b] for b in raw)
+
+
+def _glyph_to_char(name):
+    name = name.lstrip("/")
+    if len(name) == 1:
+        return name
+    if name.startswith("uni") and len(name) == 7:
+        try:
+            return chr(int(name[3:], 16))
+        except ValueError:
+            return None
+    return _GLYPH_NAMES.get(name)
+
+
+def _code(hex_bytes):
+    return int(re.sub(rb"\s", b"", hex_bytes) or b"0", 16)
+
+
+def _utf16(hex_bytes):
+    raw = bytes.fromhex(re.sub(rb"\s", b"", hex_bytes).decode())
+    return raw.decode("utf-16-be", errors="ignore")
+
+
+# Common glyph names seen in /Differences arrays
+_GLYPH_NAMES = {
+    "space": " ", "exclam": "!", "quotedbl": '"', "numbersign": "#", "dollar": "$",
+    "percent": "%", "ampersand": "&", "quotesingle": "'", "parenleft": "(",
+    "parenright": ")", "asterisk": "*", "plus": "+", "comma": ",", "hyphen": "-",
+    "period": ".", "slash": "/", "zero": "0", "one": "1", "two": "2", "three": "3",
+    "four": "4", "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "colon": ":", "semicolon": ";", "less": "<", "equal": "=", "greater": ">",
+    "question": "?", "at": "@", "bracketleft": "[", "backslash": "\\",
+    "bracketright": "]", "underscore": "_", "braceleft": "{", "bar": "|",
+    "braceright": "}", "quoteleft": "‘", "quoteright": "’",
+    "quotedblleft": "“", "quotedblright": "”", "endash": "–",
+    "emdash": "—", "bullet": "•", "fi": "fi", "fl": "fl", "ff": "ff",
+    "ffi": "ffi", "ffl": "ffl",
+}
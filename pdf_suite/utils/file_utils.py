@@ -1,8 +1,12 @@
 """Frappe File doctype helpers for PDF Suite."""
+import hashlib
 import os
 import tempfile
 import frappe
 
+# (path, size, mtime_ns) -> content hash, so unchanged files are hashed once
+_content_hashes = {}
+
 
 def get_file_path(file_url):
     """Get absolute file path from Frappe file URL."""
@@ -22,8 +26,26 @@ def get_file_path(file_url):
     return file_path
 
 
-def save_file_to_frappe(content_bytes, filename, folder="Home", is_private=1):
-    """Save bytes as a Frappe File document and return its URL."""
+def get_content_hash(path):
+    """MD5 of a file's content, matching File.content_hash."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _content_hashes:
+        h = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        if len(_content_hashes) > 1024:
+            _content_hashes.clear()
+        _content_hashes[key] = h.hexdigest()
+    return _content_hashes[key]
+
+
+def save_file_to_frappe(content_bytes, filename, folder="Home", is_private=1, commit=True):
+    """Save bytes as a Frappe File document and return its URL.
+
+    Pass commit=False when saving many files, then commit once.
+    """
     file_doc = frappe.get_doc({
         "doctype": "File",
         "file_name": filename,
@@ -31,11 +53,29 @@ def save_file_to_frappe(content_bytes, filename, folder="Home", is_private=1):
         "folder": folder,
         "is_private": is_private,
     })
+    # Our own output, not an upload: File hooks skip thumbnail pre-rendering
+    file_doc.flags.pdf_suite_output = True
     file_doc.save(ignore_permissions=True)
-    frappe.db.commit()
+    if commit:
+        frappe.db.commit()
     return file_doc.file_url
 
 
+def site_url_policy():
+    """UrlPolicy letting rendered HTML load this site's public files.
+
+    Remote http(s) images and stylesheets are allowed only when the
+    pdf_suite_html_remote_urls site config is set.
+    """
+    from pdf_suite.utils.html_renderer import UrlPolicy
+
+    return UrlPolicy(
+        frappe.utils.get_url(),
+        frappe.get_site_path("public", "files"),
+        allow_remote=bool(frappe.conf.get("pdf_suite_html_remote_urls")),
+    )
+
+
 def get_temp_path(suffix=".pdf"):
     """Get a temporary file path."""
     fd, path = tempfile.mkstemp(suffix=suffix)
@@ -43,6 +83,11 @@ def get_temp_path(suffix=".pdf"):
     return path
 
 
+def get_temp_dir():
+    """Create a temporary directory and return its path."""
+    return tempfile.mkdtemp(prefix="pdf_suite_")
+
+
 def cleanup_temp(path):
     """Remove a temporary file if it exists."""
     try:
@@ -0,0 +1,226 @@
+"""HTML to PDF rendering with WeasyPrint, shared by convert and template.
+
+WeasyPrint setup is kept per process: the font configuration, parsed
+stylesheets and fetched images are reused across renders, so small
+documents (receipts, letters, certificates) spend their time on layout.
+
+Rendered HTML comes from users, so resources are loaded under a
+`UrlPolicy`: data: URLs and the site's public files only, plus remote
+http(s) URLs when enabled. Nothing is read from file:// URLs or other
+paths on the server. No frappe imports here.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+from urllib.parse import unquote, urlsplit
+
+# Base stylesheet for convert.html_to_pdf
+HTML_TO_PDF_CSS = """
+@page { size: A4; margin: 20mm; }
+body { font-family: Helvetica, Arial, sans-serif; font-size: 12pt; color: #111827; }
+table { border-collapse: collapse; }
+img { max-width: 100%; }
+"""
+
+# Base stylesheet for TipTap templates (template.generate_html_pdf)
+TEMPLATE_CSS = """
+@page { size: A4; margin: 0; }
+body { margin: 0; font-family: Arial, sans-serif; font-size: 12pt; color: #111827; }
+.page { width: 210mm; min-height: 297mm; padding: 25mm; box-sizing: border-box;
+        background-size: cover; background-position: center; }
+.variable-chip { display: inline; }
+h1 { font-size: 24pt; font-weight: 700; margin: 12pt 0 6pt; }
+h2 { font-size: 18pt; font-weight: 700; margin: 10pt 0 5pt; }
+h3 { font-size: 14pt; font-weight: 600; margin: 8pt 0 4pt; }
+p { margin: 0 0 6pt; line-height: 1.6; }
+ul { list-style: disc; padding-left: 18pt; margin: 6pt 0; }
+ol { list-style: decimal; padding-left: 18pt; margin: 6pt 0; }
+table { border-collapse: collapse; width: 100%; margin: 8pt 0; }
+th, td { border: 1px solid #d1d5db; padding: 5pt 8pt; text-align: left; }
+th { background: #f9fafb; font-weight: 600; }
+strong { font-weight: 700; }
+em { font-style: italic; }
+u { text-decoration: underline; }
+s { text-decoration: line-through; }
+"""
+
+# Parsed stylesheets kept per process
+MAX_STYLESHEETS = 32
+
+# Fetched images (backgrounds, logos) kept per process before the cache is cleared
+MAX_CACHED_IMAGES = 256
+
+_lock = threading.Lock()
+_state = {"pid": None, "font_config": None, "stylesheets": {}, "images": {}, "fetcher_class": None}
+
+
+class UrlPolicy:
+    """Which URLs rendered HTML may load: data: URLs and the site's public files.
+
+    Picklable, so it can be passed to render_many in worker processes.
+
+    Args:
+        site_url: The site's base URL; /files/ URLs under it are read from
+            public_dir instead of over HTTP
+        public_dir: The site's public files directory
+        allow_remote: Also fetch other http(s) URLs (remote images and
+            stylesheets)
+    """
+
+    def __init__(self, site_url=None, public_dir=None, allow_remote=False):
+        self.site_url = (site_url or "").rstrip("/")
+        self.public_dir = os.path.realpath(public_dir) if public_dir else None
+        self.allow_remote = allow_remote
+
+    @property
+    def protocols(self):
+        return ("data", "http", "https") if self.allow_remote else ("data",)
+
+    def check(self, url):
+        """Raise ValueError unless `url` may be fetched over its own protocol."""
+        if urlsplit(url).scheme.lower() not in self.protocols:
+            raise ValueError(f"URL not allowed in rendered HTML: {url[:200]}")
+
+    def public_file(self, url):
+        """Local path of a site /files/ URL, or None."""
+        if not (self.site_url and self.public_dir) or not url.startswith(self.site_url + "/files/"):
+            return None
+        relative = unquote(urlsplit(url).path)[len("/files/"):]
+        path = os.path.realpath(os.path.join(self.public_dir, relative))
+        if not path.startswith(self.public_dir + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+
+def has_weasyprint():
+    try:
+        import weasyprint  # noqa: F401
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def render_pdf(html, stylesheets=(), base_url=None, url_policy=None):
+    """Render one HTML document to PDF bytes.
+
+    Args:
+        html: HTML string (a fragment or a full document)
+        stylesheets: CSS strings applied on top of the document's own styles
+        base_url: Base for relative URLs (images, links) in the HTML
+        url_policy: UrlPolicy for images and stylesheets (default: data:
+            URLs only)
+    """
+    return _render(html, _get_stylesheets(stylesheets), base_url, url_policy).write_pdf()
+
+
+def render_many(htmls, stylesheets=(), base_url=None, combine=False, url_policy=None):
+    """Render several HTML documents with the same stylesheets.
+
+    Returns a list of PDF bytes, one per document, or with combine=True
+    the bytes of a single PDF holding all pages in order.
+    """
+    sheets = _get_stylesheets(stylesheets)
+    if not combine:
+        return [_render(html, sheets, base_url, url_policy).write_pdf() for html in htmls]
+
+    documents = [_render(html, sheets, base_url, url_policy) for html in htmls]
+    if not documents:
+        raise ValueError("No HTML documents to render")
+    pages = [page for document in documents for page in document.pages]
+    return documents[0].copy(pages).write_pdf()
+
+
+def _render(html, sheets, base_url, url_policy):
+    from weasyprint import HTML
+
+    state = _process_state()
+    if len(state["images"]) > MAX_CACHED_IMAGES:
+        state["images"].clear()
+    url_fetcher = _url_fetcher(url_policy or UrlPolicy())
+    return HTML(string=html, base_url=base_url, url_fetcher=url_fetcher).render(
+        stylesheets=sheets,
+        font_config=state["font_config"],
+        cache=state["images"],
+    )
+
+
+def _url_fetcher(policy):
+    """WeasyPrint url_fetcher enforcing `policy`.
+
+    Newer WeasyPrint takes a URLFetcher subclass (its redirects come back
+    through fetch, so they are checked too); older versions take a function
+    returning a dict.
+    """
+    import weasyprint
+
+    if hasattr(weasyprint, "URLFetcher"):
+        return _policy_fetcher_class()(policy)
+
+    def fetch(url, **kwargs):
+        path = policy.public_file(url)
+        if path is not None:
+            mime_type = mimetypes.guess_type(path)[0]
+            return {"file_obj": open(path, "rb"), "mime_type": mime_type, "redirected_url": url}
+        policy.check(url)
+        return weasyprint.default_url_fetcher(url, **kwargs)
+
+    return fetch
+
+
+def _policy_fetcher_class():
+    if _state["fetcher_class"] is None:
+        from weasyprint import URLFetcher
+        from weasyprint.urls import URLFetcherResponse
+
+        class PolicyFetcher(URLFetcher):
+            def __init__(self, policy):
+                super().__init__(allowed_protocols=policy.protocols)
+                self.policy = policy
+
+            def fetch(self, url, headers=None):
+                path = self.policy.public_file(url)
+                if path is not None:
+                    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                    return URLFetcherResponse(url, open(path, "rb"), {"Content-Type": mime_type})
+                self.policy.check(url)
+                return super().fetch(url, headers)
+
+        _state["fetcher_class"] = PolicyFetcher
+    return _state["fetcher_class"]
+
+
+def _get_stylesheets(stylesheets):
+    """Parsed CSS objects for CSS strings, parsing each distinct string once."""
+    from weasyprint import CSS
+
+    state = _process_state()
+    cache = state["stylesheets"]
+    sheets = []
+    for css in stylesheets:
+        key = hashlib.md5(css.encode("utf-8")).hexdigest()
+        sheet = cache.get(key)
+        if sheet is None:
+            sheet = CSS(string=css, font_config=state["font_config"])
+            with _lock:
+                if len(cache) >= MAX_STYLESHEETS:
+                    cache.clear()
+                cache[key] = sheet
+        sheets.append(sheet)
+    return sheets
+
+
+def _process_state():
+    """Per-process WeasyPrint state, created on first use after a fork."""
+    if _state["pid"] != os.getpid():
+        with _lock:
+            if _state["pid"] != os.getpid():
+                from weasyprint.text.fonts import FontConfiguration
+
+                _state.update(
+                    font_config=FontConfiguration(),
+                    stylesheets={},
+                    images={},
+                    pid=os.getpid(),
+                )
+    return _state
@@ -0,0 +1,92 @@
+"""Compiled TipTap templates for variable substitution.
+
+A template's HTML is split once into literal segments and variable slots,
+with the page wrapper folded into the first and last segments, so filling
+in a record is a single join. Compiled templates are cached per process,
+keyed by the template's name and modified timestamp. No frappe imports
+here.
+"""
+import re
+from html import escape
+from pdf_suite.utils.lru import LRUCache
+
+# Variable chips inserted by the editor: <span data-variable="name" ...>{{name}}</span>
+VARIABLE_CHIP = re.compile(r'<span[^>]+data-variable="([^"]+)"[^>]*>.*?</span>', re.DOTALL)
+
+# Compiled templates kept per process (least recently used dropped first)
+MAX_COMPILED_TEMPLATES = 64
+
+DOCUMENT_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+</head>
+<body>
+"""
+
+DOCUMENT_TAIL = """</div>
+</body>
+</html>"""
+
+
+class CompiledTemplate:
+    """A template as literal segments around variable slots.
+
+    Args:
+        segments: Literal HTML, one more than there are slots
+        slots: Variable name of each slot, in document order
+    """
+
+    def __init__(self, segments, slots):
+        self.segments = tuple(segments)
+        self.slots = tuple(slots)
+
+    @property
+    def variables(self):
+        """Distinct variable names, in order of first use."""
+        return list(dict.fromkeys(self.slots))
+
+    def fill(self, values):
+        """Full HTML document with each slot replaced by str(values[name]) ("" if missing).
+
+        Values are HTML-escaped, so record data shows as text and cannot add
+        markup (images, links) to the document.
+        """
+        parts = [self.segments[0]]
+        for name, segment in zip(self.slots, self.segments[1:]):
+            parts.append(escape(str(values.get(name, ""))))
+            parts.append(segment)
+        return "".join(parts)
+
+
+def compile_template(html, background_url=None):
+    """Compile TipTap HTML into a CompiledTemplate.
+
+    Args:
+        html: Template body HTML with variable chips
+        background_url: Optional absolute or data: URL of the page background
+    """
+    # Background image goes on the page element so TEMPLATE_CSS stays shared
+    page_div = '<div class="page">'
+    if background_url:
+        page_div = '<div class="page" style="background-image: url(\'' + escape(background_url) + '\');">'
+
+    pieces = VARIABLE_CHIP.split(html or "")
+    segments = pieces[0::2]
+    segments[0] = DOCUMENT_HEAD + page_div + segments[0]
+    segments[-1] = segments[-1] + DOCUMENT_TAIL
+    return CompiledTemplate(segments, pieces[1::2])
+
+
+class TemplateCache(LRUCache):
+    """LRU cache of compiled templates, keyed by (site, name, modified)."""
+
+    def __init__(self, max_items=MAX_COMPILED_TEMPLATES):
+        super().__init__(max_items)
+
+    def invalidate(self, site, name):
+        """Drop every cached version of a template."""
+        self.discard_if(lambda key: key[:2] == (site, name))
+
+
+template_cache = TemplateCache()
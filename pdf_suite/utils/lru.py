@@ -0,0 +1,59 @@
+"""In-memory, thread-safe LRU cache shared by the per-process caches.
+
+No frappe imports here.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least recently used entries are dropped once a cap is exceeded.
+
+    Args:
+        max_items: Entries kept at most
+        max_bytes: Optional cap on the summed len() of the values (bytes
+            values), or None for no size cap
+    """
+
+    def __init__(self, max_items, max_bytes=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = value
+            self._bytes += self._size(value)
+            while self._items and (
+                len(self._items) > self.max_items
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._items)))
+
+    def discard_if(self, predicate):
+        """Drop every entry whose key matches `predicate`."""
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        self._bytes -= self._size(self._items.pop(key))
+
+    def _size(self, value):
+        return len(value) if self.max_bytes is not None else 0
@@ -0,0 +1,156 @@
+"""Tesseract engine pool for PDF Suite OCR.
+
+Engines are kept per worker process and keyed by language set, so language
+models are loaded once and reused across pages and requests. When tesserocr
+is not installed, recognition falls back to pytesseract (one subprocess per
+call).
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+# Idle engines kept per language set; extra engines created under load are ended
+MAX_IDLE_ENGINES = 2
+
+_pool = {}
+_pool_pid = None
+_pool_lock = threading.Lock()
+_has_tesserocr = None
+
+
+def normalize_language(language):
+    """Normalize a Tesseract language spec like "eng+ara" into a pool key."""
+    langs = []
+    for part in str(language or "eng").split("+"):
+        part = part.strip()
+        if part and part not in langs:
+            langs.append(part)
+    return "+".join(langs) or "eng"
+
+
+def has_engine_pool():
+    """Return True if the in-process tesserocr binding is available."""
+    global _has_tesserocr
+    if _has_tesserocr is None:
+        try:
+            import tesserocr  # noqa: F401
+            _has_tesserocr = True
+        except ImportError:
+            _has_tesserocr = False
+    return _has_tesserocr
+
+
+def engine_name():
+    """Name of the backend used by `recognize`."""
+    return "tesserocr" if has_engine_pool() else "pytesseract"
+
+
+@contextmanager
+def acquire_engine(language):
+    """Borrow a tesserocr engine for `language` from the per-process pool."""
+    import tesserocr
+
+    global _pool_pid
+    language = normalize_language(language)
+
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            # Engines inherited through fork belong to the parent process
+            _pool.clear()
+            _pool_pid = os.getpid()
+        idle = _pool.setdefault(language, [])
+        api = idle.pop() if idle else None
+
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=language, psm=tesserocr.PSM.AUTO)
+
+    healthy = False
+    try:
+        yield api
+        healthy = True
+    finally:
+        if healthy:
+            api.Clear()
+            with _pool_lock:
+                idle = _pool.setdefault(language, [])
+                if len(idle) < MAX_IDLE_ENGINES:
+                    idle.append(api)
+                    api = None
+        if api is not None:
+            api.End()
+
+
+def recognize(image, language="eng"):
+    """OCR a PIL image and return its text and word boxes.
+
+    Returns {"text", "words", "width", "height"} where each word is
+    {text, x0, top, x1, bottom, conf} in image pixels.
+    """
+    if has_engine_pool():
+        text, words = _recognize_tesserocr(image, language)
+    else:
+        text, words = _recognize_pytesseract(image, language)
+
+    return {
+        "text": text,
+        "words": words,
+        "width": image.size[0],
+        "height": image.size[1],
+    }
+
+
+def _recognize_tesserocr(image, language):
+    import tesserocr
+
+    level = tesserocr.RIL.WORD
+    words = []
+
+    with acquire_engine(language) as api:
+        api.SetImage(image)
+        api.Recognize()
+        text = api.GetUTF8Text() or ""
+
+        for item in tesserocr.iterate_level(api.GetIterator(), level):
+            word = item.GetUTF8Text(level)
+            box = item.BoundingBox(level)
+            if not word or not word.strip() or not box:
+                continue
+            x0, top, x1, bottom = box
+            words.append({
+                "text": word.strip(),
+                "x0": x0,
+                "top": top,
+                "x1": x1,
+                "bottom": bottom,
+                "conf": round(item.Confidence(level), 1),
+            })
+
+    return text, words
+
+
+def _recognize_pytesseract(image, language):
+    import pytesseract
+
+    data = pytesseract.image_to_data(
+        image, lang=normalize_language(language), output_type=pytesseract.Output.DICT
+    )
+
+    words = []
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        if not word or not word.strip():
+            continue
+        x0, top = data["left"][i], data["top"][i]
+        words.append({
+            "text": word.strip(),
+            "x0": x0,
+            "top": top,
+            "x1": x0 + data["width"][i],
+            "bottom": top + data["height"][i],
+            "conf": round(float(data["conf"][i]), 1),
+        })
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word.strip())
+
+    text = "\n".join(" ".join(line) for line in lines.values())
+    return text, words
@@ -0,0 +1,431 @@
+"""Pool of warm headless LibreOffice instances for office -> PDF conversion.
+
+Each instance is a long-lived `soffice` process with its own user profile,
+reached over a UNO pipe, so conversions skip LibreOffice startup and never
+share a profile (profiles are locked per instance and reused). Instances
+are health-checked before use, recycled after MAX_CONVERSIONS conversions
+or a failure, and handed out through a queue: callers wait for a free
+instance rather than starting more.
+
+The pool needs the LibreOffice Python bindings (`uno`, e.g. the
+python3-uno package) to be importable. Without them, conversions run the
+soffice command line, still with an isolated, reused profile per slot.
+"""
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+# Conversions an instance performs before it is restarted (bounds leaks)
+MAX_CONVERSIONS = 200
+
+# Seconds to wait for a new instance to accept UNO connections
+STARTUP_TIMEOUT = 30
+
+# Default per-document conversion limit, in seconds
+CONVERSION_TIMEOUT = 120
+
+# Shared, reusable user profiles; each is locked by one instance at a time
+PROFILE_ROOT = os.path.join(tempfile.gettempdir(), "pdf_suite_office_profiles")
+MAX_PROFILES = 64
+
+# LibreOffice export filter per document service
+PDF_FILTERS = (
+    ("com.sun.star.text.WebDocument", "writer_web_pdf_Export"),
+    ("com.sun.star.text.TextDocument", "writer_pdf_Export"),
+    ("com.sun.star.sheet.SpreadsheetDocument", "calc_pdf_Export"),
+    ("com.sun.star.presentation.PresentationDocument", "impress_pdf_Export"),
+    ("com.sun.star.drawing.DrawingDocument", "draw_pdf_Export"),
+)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_has_uno = None
+
+
+class ConversionError(Exception):
+    pass
+
+
+def has_uno():
+    """Return True if the LibreOffice UNO bindings are importable."""
+    global _has_uno
+    if _has_uno is None:
+        try:
+            import uno  # noqa: F401
+            _has_uno = True
+        except ImportError:
+            _has_uno = False
+    return _has_uno
+
+
+def get_pool(size=2):
+    """Return this process's pool, creating it with `size` slots on first use."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            # Forked: instances belong to the parent, start afresh
+            _pool, _pool_pid = None, os.getpid()
+        if _pool is None:
+            _pool = OfficePool(max(1, int(size)))
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def convert_to_pdf(input_path, output_dir, timeout=CONVERSION_TIMEOUT, pool_size=2):
+    """Convert an office document to PDF in `output_dir` and return the PDF path."""
+    return get_pool(pool_size).convert(input_path, output_dir, timeout)
+
+
+def convert_many(input_paths, output_dir, timeout=CONVERSION_TIMEOUT, pool_size=2, **kwargs):
+    """Convert many office documents to PDF (see OfficePool.convert_many)."""
+    return get_pool(pool_size).convert_many(input_paths, output_dir, timeout, **kwargs)
+
+
+class OfficePool:
+    """Fixed number of office slots shared through a FIFO queue."""
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.Queue()
+        for slot in range(size):
+            self._idle.put(OfficeInstance(slot))
+
+    def convert(self, input_path, output_dir, timeout=CONVERSION_TIMEOUT, wait=None):
+        """Convert one file, waiting up to `wait` seconds for a free slot."""
+        try:
+            instance = self._idle.get(timeout=wait if wait is not None else timeout)
+        except queue.Empty:
+            raise ConversionError("All LibreOffice instances are busy, try again later")
+
+        try:
+            return instance.convert(input_path, output_dir, timeout)
+        finally:
+            self._idle.put(instance)
+
+    def convert_many(self, input_paths, output_dir, timeout=CONVERSION_TIMEOUT, chunk_size=None, on_chunk=None):
+        """Convert many files, one chunk per free instance, chunks in parallel.
+
+        Inputs are linked into a staging directory under unique names, so
+        files sharing a name cannot overwrite each other's output.
+
+        Args:
+            input_paths: Files to convert
+            output_dir: Directory for the PDFs
+            timeout: Limit per document, in seconds
+            chunk_size: Files per chunk (default: spread evenly over the pool)
+            on_chunk: Called in the calling thread as on_chunk(indexes,
+                results) after each chunk, e.g. to record progress
+
+        Returns [(pdf_path or None, error or None)] in input order.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        stage_dir = tempfile.mkdtemp(prefix="inputs_", dir=output_dir)
+        staged = []
+        for i, input_path in enumerate(input_paths):
+            link = os.path.join(stage_dir, f"{i:05d}_{os.path.basename(input_path)}")
+            os.symlink(os.path.abspath(input_path), link)
+            staged.append(link)
+
+        count = len(staged)
+        chunk_size = max(1, int(chunk_size or -(-count // self.size)))
+        chunks = [list(range(start, min(start + chunk_size, count))) for start in range(0, count, chunk_size)]
+
+        def run(indexes):
+            instance = self._idle.get()
+            try:
+                return instance.convert_chunk([staged[i] for i in indexes], output_dir, timeout)
+            finally:
+                self._idle.put(instance)
+
+        results = [None] * count
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.size, len(chunks)) or 1) as executor:
+                futures = {executor.submit(run, indexes): indexes for indexes in chunks}
+                for future in as_completed(futures):
+                    indexes = futures[future]
+                    try:
+                        chunk_results = future.result()
+                    except Exception as e:
+                        chunk_results = [(None, str(e))] * len(indexes)
+                    for i, result in zip(indexes, chunk_results):
+                        results[i] = result
+                    if on_chunk:
+                        on_chunk(indexes, chunk_results)
+        finally:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+        return results
+
+    def shutdown(self):
+        while True:
+            try:
+                instance = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            instance.release()
+
+
+class OfficeInstance:
+    """One soffice process (or, without UNO, one CLI profile) in the pool."""
+
+    def __init__(self, slot):
+        self.slot = slot
+        # Unique among live instances, as a job may run its own pool beside the shared one
+        self.pipe_name = f"pdf_suite_{os.getpid()}_{slot}_{id(self):x}"
+        self.profile_dir = None
+        self.process = None
+        self.desktop = None
+        self.conversions = 0
+        self._profile_lock = None
+
+    def convert(self, input_path, output_dir, timeout):
+        if self.profile_dir is None:
+            self._claim_profile()
+        if not has_uno():
+            return self._convert_cli(input_path, output_dir, timeout)
+
+        if self.conversions >= MAX_CONVERSIONS or not self._healthy():
+            self.restart()
+
+        # A hung conversion cannot be interrupted over UNO; kill the process instead
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            self._kill()
+
+        watchdog = threading.Timer(timeout, on_timeout)
+        watchdog.start()
+        try:
+            output_path = self._convert_uno(input_path, output_dir)
+        except Exception as e:
+            self.stop()
+            if timed_out.is_set():
+                raise ConversionError(f"Conversion timed out ({timeout}s limit)")
+            raise ConversionError(f"Conversion failed: {e}")
+        finally:
+            watchdog.cancel()
+
+        self.conversions += 1
+        return output_path
+
+    def restart(self):
+        self.stop()
+        self.process = subprocess.Popen(
+            [
+                _soffice_binary(),
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--norestore",
+                "--nodefault",
+                "--nolockcheck",
+                f"-env:UserInstallation=file://{self.profile_dir}",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.desktop = self._connect()
+        self.conversions = 0
+
+    def stop(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._kill()
+            self.process = None
+
+    def release(self):
+        """Stop the instance and give its profile back to other processes."""
+        self.stop()
+        if self._profile_lock is not None:
+            self._profile_lock.close()
+            self._profile_lock = None
+        self.profile_dir = None
+
+    def _claim_profile(self):
+        """Lock a profile directory no other process is using.
+
+        Profiles live in a shared directory and are reused, so a worker that
+        restarts (or a forked job) finds an initialised profile instead of
+        paying LibreOffice's first-run setup again.
+        """
+        import fcntl
+
+        os.makedirs(PROFILE_ROOT, exist_ok=True)
+        for index in range(MAX_PROFILES):
+            lock = open(os.path.join(PROFILE_ROOT, f"{index}.lock"), "w")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock.close()
+                continue
+            self._profile_lock = lock
+            self.profile_dir = os.path.join(PROFILE_ROOT, str(index))
+            return
+        raise ConversionError("No free LibreOffice profile; too many concurrent converters")
+
+    def _kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+    def _healthy(self):
+        """The process is running and still answers UNO calls."""
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def _connect(self):
+        import uno
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(
+                    f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+                )
+                return context.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.frame.Desktop", context
+                )
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self._kill()
+                    raise ConversionError("LibreOffice did not start")
+                time.sleep(0.25)
+
+    def _convert_uno(self, input_path, output_dir):
+        import uno
+
+        output_path = _output_path(input_path, output_dir)
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)),
+            "_blank",
+            0,
+            _properties(Hidden=True, ReadOnly=True, UpdateDocMode=0),
+        )
+        if document is None:
+            raise ConversionError(f"Could not open {os.path.basename(input_path)}")
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                _properties(FilterName=_pdf_filter(document)),
+            )
+        finally:
+            document.close(True)
+        return output_path
+
+    def convert_chunk(self, input_paths, output_dir, timeout):
+        """Convert several files; returns [(pdf_path or None, error or None)].
+
+        Over UNO the files go one after another through this warm instance;
+        on the command line they are passed to a single soffice run.
+        """
+        if self.profile_dir is None:
+            self._claim_profile()
+
+        if has_uno():
+            results = []
+            for input_path in input_paths:
+                try:
+                    results.append((self.convert(input_path, output_dir, timeout), None))
+                except ConversionError as e:
+                    results.append((None, str(e)))
+            return results
+
+        error = None
+        try:
+            self._run_cli(input_paths, output_dir, timeout * len(input_paths))
+        except ConversionError as e:
+            # Files converted before the failure still have their output
+            error = str(e)
+
+        results = []
+        for input_path in input_paths:
+            output_path = _output_path(input_path, output_dir)
+            if os.path.exists(output_path):
+                results.append((output_path, None))
+            else:
+                results.append((None, error or "Conversion failed — no output PDF generated"))
+        return results
+
+    def _convert_cli(self, input_path, output_dir, timeout):
+        self._run_cli([input_path], output_dir, timeout)
+        output_path = _output_path(input_path, output_dir)
+        if not os.path.exists(output_path):
+            raise ConversionError("Conversion failed — no output PDF generated")
+        return output_path
+
+    def _run_cli(self, input_paths, output_dir, timeout):
+        try:
+            subprocess.run(
+                [
+                    _soffice_binary(),
+                    "--headless",
+                    "--norestore",
+                    "--nolockcheck",
+                    f"-env:UserInstallation=file://{self.profile_dir}",
+                    "--convert-to",
+                    "pdf",
+                    "--outdir",
+                    output_dir,
+                    *input_paths,
+                ],
+                check=True,
+                capture_output=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise ConversionError(f"Conversion timed out ({timeout}s limit)")
+        except subprocess.CalledProcessError as e:
+            raise ConversionError(f"Conversion failed: {e.stderr.decode(errors='replace')[-500:]}")
+        self.conversions += len(input_paths)
+
+
+def _output_path(input_path, output_dir):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(input_path))[0] + ".pdf")
+
+
+def _pdf_filter(document):
+    for service, filter_name in PDF_FILTERS:
+        if document.supportsService(service):
+            return filter_name
+    return "writer_pdf_Export"
+
+
+def _properties(**values):
+    from com.sun.star.beans import PropertyValue
+
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name, prop.Value = name, value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def _soffice_binary():
+    return shutil.which("soffice") or shutil.which("libreoffice") or "libreoffice"
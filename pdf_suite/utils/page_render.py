@@ -0,0 +1,107 @@
+"""Page image rendering for thumbnails and previews, cached on disk.
+
+Pages are rendered with pdftoppm at a few fixed zoom levels and stored in
+the "render" disk cache, keyed by file content hash, page and level, so a
+page is rendered once per level however often it is viewed.
+"""
+import os
+import shutil
+import subprocess
+import frappe
+from pdf_suite.utils.cache import get_disk_cache, hash_key
+from pdf_suite.utils.file_utils import get_content_hash, get_temp_dir
+
+# Bump when rendering settings change
+RENDER_VERSION = 1
+
+# Zoom level -> scale relative to the PDF's 72 points per inch
+ZOOM_LEVELS = {
+    "thumb": 0.25,
+    "small": 0.5,
+    "preview": 1.0,
+    "large": 2.0,
+}
+
+# Pages rendered per pdftoppm call
+RENDER_CHUNK_PAGES = 16
+
+
+def get_render_cache():
+    return get_disk_cache("render", max_mb=2048)
+
+
+def get_page_image(path, page, level="thumb"):
+    """Return PNG bytes of a page (1-based) at a zoom level, rendering on a miss."""
+    cache = get_render_cache()
+    key = _cache_key(get_content_hash(path), page, level)
+    data = cache.get(key)
+    if data is None:
+        render_pages(path, [page], level)
+        data = cache.get(key)
+    return data
+
+
+def render_pages(path, pages, level="thumb"):
+    """Render and cache pages (1-based) not already cached. Returns the count rendered."""
+    cache = get_render_cache()
+    content_hash = get_content_hash(path)
+    missing = [p for p in pages if not cache.contains(_cache_key(content_hash, p, level))]
+    if not missing:
+        return 0
+
+    dpi = round(72 * ZOOM_LEVELS[level])
+    temp_dir = get_temp_dir()
+    try:
+        for first, last in _runs(missing):
+            for start in range(first, last + 1, RENDER_CHUNK_PAGES):
+                end = min(start + RENDER_CHUNK_PAGES - 1, last)
+                subprocess.run(
+                    [
+                        "pdftoppm", "-png", "-r", str(dpi), "-f", str(start), "-l", str(end),
+                        path, os.path.join(temp_dir, "page"),
+                    ],
+                    check=True,
+                    capture_output=True,
+                )
+                for name in os.listdir(temp_dir):
+                    image_path = os.path.join(temp_dir, name)
+                    page = int(name.rsplit("-", 1)[1].split(".")[0])
+                    with open(image_path, "rb") as f:
+                        cache.set(_cache_key(content_hash, page, level), f.read())
+                    os.remove(image_path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return len(missing)
+
+
+def _runs(pages):
+    """Group sorted page numbers into (first, last) runs of consecutive pages."""
+    runs = []
+    for page in sorted(set(pages)):
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+    return [tuple(run) for run in runs]
+
+
+def _cache_key(content_hash, page, level):
+    return hash_key(RENDER_VERSION, content_hash, int(page), level)
+
+
+def on_file_insert(doc, method=None):
+    """Pre-render thumbnails for a newly uploaded PDF (File doc event).
+
+    Files saved by PDF Suite itself (results of merges, conversions, batch
+    jobs and so on) are skipped; they are rendered on first view instead.
+    """
+    if doc.flags.pdf_suite_output:
+        return
+    if not doc.file_url or os.path.splitext(doc.file_url)[1].lower() != ".pdf":
+        return
+    frappe.enqueue(
+        "pdf_suite.api.preview.prerender_thumbnails",
+        file_url=doc.file_url,
+        queue="short",
+        enqueue_after_commit=True,
+    )
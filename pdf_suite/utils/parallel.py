@@ -0,0 +1,48 @@
+"""Fan page-level PDF work out across a process pool.
+
+Each worker opens the file itself and handles a contiguous chunk of page
+indices, so only page numbers and results cross process boundaries. Pools
+use the "spawn" start method because forking a web or RQ worker would
+duplicate its open database and Redis connections; keep this module and the
+chunk functions it runs free of frappe imports.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+DEFAULT_CHUNK_SIZE = 25
+DEFAULT_MAX_WORKERS = 8
+
+
+def resolve_workers(workers=None, max_workers=None):
+    """Clamp a requested worker count to [1, max_workers] (default: CPU count)."""
+    max_workers = int(max_workers or DEFAULT_MAX_WORKERS)
+    cpus = os.cpu_count() or 1
+    if workers in (None, "", 0, "0"):
+        workers = cpus
+    return max(1, min(int(workers), cpus, max_workers))
+
+
+def map_page_chunks(func, path, pages, workers=1, chunk_size=None, **kwargs):
+    """Run `func(path, chunk, **kwargs)` over chunks of `pages`.
+
+    `func` must be a module-level function returning a list; the lists are
+    concatenated in page order. Runs in-process when one worker suffices.
+    """
+    chunk_size = max(1, int(chunk_size or DEFAULT_CHUNK_SIZE))
+    chunks = [pages[i : i + chunk_size] for i in range(0, len(pages), chunk_size)]
+    workers = min(int(workers or 1), len(chunks))
+
+    job = partial(func, path, **kwargs)
+    if workers <= 1:
+        results = map(job, chunks)
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(job, chunks))
+
+    merged = []
+    for chunk_result in results:
+        merged.extend(chunk_result)
+    return merged
@@ -0,0 +1,131 @@
+"""Run one pdf2docx conversion in a separate process.
+
+Started by convert.pdf_to_docx through `run_process`, with a memory limit
+and a private working directory: pdf2docx's multi-processing mode writes
+its intermediate files to the current directory, so concurrent conversions
+must not share one. No frappe imports here.
+
+Usage: python -m pdf_suite.utils.pdf2docx_runner '<json options>'
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# Seconds between memory checks of a running conversion
+MEMORY_POLL_INTERVAL = 0.5
+
+
+class MemoryLimitExceeded(Exception):
+    pass
+
+
+def run(path, output, start=0, end=None, pages=None, workers=1):
+    """Convert pages of `path` to `output` (0-based, `end` exclusive)."""
+    from functools import partial
+    from pdf2docx import Converter, converter
+
+    workers = max(1, int(workers))
+    settings = {}
+    if workers > 1 and not pages:
+        # pdf2docx sizes its pool by CPU count; hold it to the requested workers
+        converter.Pool = partial(converter.Pool, processes=workers)
+        settings = {"multi_processing": True, "cpu_count": workers}
+
+    cv = Converter(path)
+    try:
+        cv.convert(output, start=start, end=end, pages=pages, **settings)
+    finally:
+        cv.close()
+
+
+def run_process(options, work_dir, memory_mb, timeout):
+    """Run this module on `options` in `work_dir` and return (returncode, stderr).
+
+    The runner and its pdf2docx workers get their own process group, whose
+    total memory in use is checked every MEMORY_POLL_INTERVAL seconds; the
+    group is killed once it passes memory_mb. There is no address space
+    limit (RLIMIT_AS), because numpy, OpenBLAS and OpenCV reserve far more
+    virtual memory than they use. Memory is only checked where /proc exists
+    (Linux).
+
+    Raises MemoryLimitExceeded, or subprocess.TimeoutExpired after `timeout`
+    seconds.
+    """
+    import pdf_suite
+
+    env = dict(os.environ)
+    app_root = os.path.dirname(os.path.dirname(pdf_suite.__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [app_root, env.get("PYTHONPATH")]))
+
+    limit = int(memory_mb) * 1024 * 1024
+    deadline = time.monotonic() + timeout
+    with open(os.path.join(work_dir, "runner.log"), "w+b") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "pdf_suite.utils.pdf2docx_runner", json.dumps(options)],
+            cwd=work_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            start_new_session=True,
+        )
+        try:
+            while process.poll() is None:
+                if time.monotonic() > deadline:
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+                if _group_memory(process.pid) > limit:
+                    raise MemoryLimitExceeded(f"Conversion exceeded the memory limit ({memory_mb} MB)")
+                time.sleep(MEMORY_POLL_INTERVAL)
+        finally:
+            if process.poll() is None:
+                _kill_group(process)
+        log.seek(0)
+        return process.returncode, log.read().decode(errors="replace")
+
+
+def _group_memory(pgid):
+    """Memory in bytes used by the processes of a process group (0 without /proc)."""
+    if not os.path.isdir("/proc"):
+        return 0
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the parenthesised command: state ppid pgrp ...
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[2]) == pgid:
+                total += _process_memory(entry, page_size)
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def _process_memory(pid, page_size):
+    """Proportional set size of a process, so pages forked workers share count once."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Kernels before 4.14: resident size, counting shared pages per process
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * page_size
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+if __name__ == "__main__":
+    run(**json.loads(sys.argv[1]))
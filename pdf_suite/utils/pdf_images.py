@@ -0,0 +1,82 @@
+"""Find and export image XObjects in PDF pages.
+
+Images are found through page resources and, recursively, the resources of
+Form XObjects drawn on the page. JPEG and JPEG 2000 streams are exported as
+their encoded bytes; other images are decoded by pikepdf and written as PNG or
+TIFF. No frappe imports here.
+"""
+import io
+
+# Single-filter streams whose raw data is already a standalone image file
+PASSTHROUGH_FILTERS = {
+    "/DCTDecode": "jpg",
+    "/JPXDecode": "jp2",
+}
+
+
+def iter_page_images(page, visited=None):
+    """Yield (name, image_xobject) for every image drawn via a page's resources.
+
+    Form XObjects are searched recursively. `visited` (a set of objgen keys)
+    skips objects already seen, so pass one set across pages to yield images
+    shared between pages only once.
+    """
+    visited = set() if visited is None else visited
+    yield from _walk(page.obj.get("/Resources"), visited)
+
+
+def _walk(resources, visited):
+    if resources is None:
+        return
+    for name, xobject in resources.get("/XObject", {}).items():
+        key = xobject.objgen
+        if key != (0, 0):
+            if key in visited:
+                continue
+            visited.add(key)
+
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            yield str(name), xobject
+        elif subtype == "/Form":
+            yield from _walk(xobject.get("/Resources"), visited)
+
+
+def image_info(name, xobject):
+    """Metadata for an image XObject."""
+    return {
+        "name": name,
+        "width": int(xobject.get("/Width", 0)),
+        "height": int(xobject.get("/Height", 0)),
+        "color_space": str(xobject.get("/ColorSpace", "")),
+        "filter": "+".join(_filters(xobject)),
+    }
+
+
+def export_image(xobject):
+    """Return (extension, bytes) for an image XObject.
+
+    DCTDecode/JPXDecode streams are copied without decoding. Anything else,
+    including JPEGs wrapped in extra filters, goes through pikepdf, which
+    raises UnsupportedImageTypeError for formats it cannot reconstruct.
+    """
+    import pikepdf
+
+    filters = _filters(xobject)
+    if len(filters) == 1 and filters[0] in PASSTHROUGH_FILTERS:
+        return PASSTHROUGH_FILTERS[filters[0]], xobject.read_raw_bytes()
+
+    buffer = io.BytesIO()
+    extension = pikepdf.PdfImage(xobject).extract_to(stream=buffer)
+    return extension.lstrip("."), buffer.getvalue()
+
+
+def _filters(xobject):
+    import pikepdf
+
+    value = xobject.get("/Filter")
+    if value is None:
+        return []
+    if isinstance(value, pikepdf.Array):
+        return [str(f) for f in value]
+    return [str(value)]
@@ -1,16 +1,53 @@
 """Shared PDF utilities for PDF Suite."""
 import os
+import frappe
 import pikepdf
 from pdf_suite.utils.file_utils import get_file_path
+from pdf_suite.utils.parallel import resolve_workers
 
 
 def get_page_count(file_url):
     """Get page count of a PDF."""
-    path = get_file_path(file_url)
+    return count_pages(get_file_path(file_url))
+
+
+def count_pages(path):
+    """Get page count of a PDF on disk."""
     with pikepdf.open(path) as pdf:
         return len(pdf.pages)
 
 
+def parse_page_numbers(page_numbers, total_pages):
+    """Parse page numbers string into list of 0-indexed page numbers."""
+    if not page_numbers:
+        return list(range(total_pages))
+
+    if isinstance(page_numbers, list):
+        return [int(p) - 1 for p in page_numbers]
+
+    pages = []
+    for part in str(page_numbers).split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-", 1)
+            pages.extend(range(int(start) - 1, int(end)))
+        else:
+            pages.append(int(part) - 1)
+
+    return sorted(set(pages))
+
+
+def valid_pages(path, page_numbers):
+    """Parse page_numbers and drop pages outside the document."""
+    total = count_pages(path)
+    return [p for p in parse_page_numbers(page_numbers, total) if 0 <= p < total]
+
+
+def get_workers(workers=None):
+    """Clamp a requested worker count to the CPU count and pdf_suite_max_workers site config."""
+    return resolve_workers(workers, frappe.conf.get("pdf_suite_max_workers"))
+
+
 def get_pdf_metadata(file_url):
     """Get PDF metadata (title, author, pages, file size, etc.)."""
     path = get_file_path(file_url)
@@ -40,6 +77,49 @@ def get_pdf_metadata(file_url):
     return metadata
 
 
+def paint_rectangles(pdf, rects_by_page, color=(1, 1, 1)):
+    """Paint filled rectangles on top of page content, in place.
+
+    Each page's existing content is wrapped in q/Q (one shared stream
+    object) so its graphics state cannot leak, then a small content stream
+    with the rectangles is appended. No overlay PDFs are built.
+
+    Args:
+        pdf: Open pikepdf.Pdf
+        rects_by_page: {page index (0-based): [(x, y, width, height), ...]}
+            in points from the lower-left corner of the page's MediaBox
+        color: RGB fill and stroke color, components 0-1
+
+    Returns the number of pages painted.
+    """
+    save_state = None
+    rgb = " ".join(_num(c) for c in color)
+    painted = 0
+    for index, rects in sorted(rects_by_page.items()):
+        if not rects or not 0 <= index < len(pdf.pages):
+            continue
+        if save_state is None:
+            save_state = pikepdf.Stream(pdf, b"q\n")
+
+        page = pdf.pages[index]
+        box = page.mediabox
+        x0, y0 = float(box[0]), float(box[1])
+        ops = [f"\nQ q {rgb} rg {rgb} RG"]
+        for x, y, w, h in rects:
+            ops.append(f"{_num(x0 + x)} {_num(y0 + y)} {_num(w)} {_num(h)} re B")
+        ops.append("Q")
+
+        page.contents_add(save_state, prepend=True)
+        page.contents_add(pikepdf.Stream(pdf, "\n".join(ops).encode("ascii")))
+        painted += 1
+    return painted
+
+
+def _num(value):
+    """Format a number for a content stream."""
+    return f"{float(value):.3f}".rstrip("0").rstrip(".") or "0"
+
+
 def _human_size(size_bytes):
     """Convert bytes to human readable string."""
     for unit in ["B", "KB", "MB", "GB"]:
@@ -0,0 +1,301 @@
+"""Table detection for bordered (ruled) tables using NumPy.
+
+An alternative to pdfplumber's table finder for pages drawn with many line
+segments, such as bordered financial statements. Ruling lines and rect
+edges are loaded into arrays, snapped to shared coordinates and merged
+with vectorised operations; connected groups of horizontal and vertical
+rulings become tables, and characters are assigned to cells by binning
+their centres against the grid. Output matches pdfplumber's
+`extract_tables`: a list of tables, each a list of rows, with None for
+cells covered by a merged cell. Tables without drawn borders are not found.
+No frappe imports here.
+"""
+
+# Same meaning and defaults as pdfplumber's table settings
+SNAP_TOLERANCE = 3
+JOIN_TOLERANCE = 3
+INTERSECTION_TOLERANCE = 3
+EDGE_MIN_LENGTH = 3
+
+# Horizontal gap, as a fraction of font size, read as a space between characters
+SPACE_GAP = 0.25
+
+
+def extract_tables(page):
+    """Return the bordered tables on a pdfplumber page, pdfplumber-style."""
+    horizontal, vertical = _page_rulings(page)
+    if len(horizontal) < 2 or len(vertical) < 2:
+        return []
+
+    horizontal = _merge(_snap(horizontal, 0), 0)
+    vertical = _merge(_snap(vertical, 0), 0)
+    horizontal = horizontal[horizontal[:, 2] - horizontal[:, 1] >= EDGE_MIN_LENGTH]
+    vertical = vertical[vertical[:, 2] - vertical[:, 1] >= EDGE_MIN_LENGTH]
+    if len(horizontal) < 2 or len(vertical) < 2:
+        return []
+
+    # touches[i, j]: horizontal ruling i crosses or meets vertical ruling j
+    tol = INTERSECTION_TOLERANCE
+    touches = (
+        (vertical[None, :, 0] >= horizontal[:, None, 1] - tol)
+        & (vertical[None, :, 0] <= horizontal[:, None, 2] + tol)
+        & (horizontal[:, None, 0] >= vertical[None, :, 1] - tol)
+        & (horizontal[:, None, 0] <= vertical[None, :, 2] + tol)
+    )
+
+    chars = _char_arrays(page.chars)
+    tables = []
+    for h_index, v_index in _components(touches):
+        if len(h_index) < 2 or len(v_index) < 2:
+            continue
+        table = _build_table(horizontal[h_index], vertical[v_index], chars)
+        if table:
+            tables.append((float(horizontal[h_index, 0].min()), float(vertical[v_index, 0].min()), table))
+
+    # Reading order: top to bottom, then left to right
+    tables.sort(key=lambda t: (round(t[0]), t[1]))
+    return [table for _, _, table in tables]
+
+
+def _page_rulings(page):
+    """Collect horizontal (y, x0, x1) and vertical (x, top, bottom) segments."""
+    import numpy as np
+
+    h, v = [], []
+    for line in page.lines:
+        if abs(line["top"] - line["bottom"]) <= SNAP_TOLERANCE:
+            h.append(((line["top"] + line["bottom"]) / 2, line["x0"], line["x1"]))
+        elif abs(line["x0"] - line["x1"]) <= SNAP_TOLERANCE:
+            v.append(((line["x0"] + line["x1"]) / 2, line["top"], line["bottom"]))
+
+    for rect in page.rects:
+        x0, x1, top, bottom = rect["x0"], rect["x1"], rect["top"], rect["bottom"]
+        if bottom - top <= SNAP_TOLERANCE:
+            h.append(((top + bottom) / 2, x0, x1))
+        elif x1 - x0 <= SNAP_TOLERANCE:
+            v.append(((x0 + x1) / 2, top, bottom))
+        else:
+            h.extend([(top, x0, x1), (bottom, x0, x1)])
+            v.extend([(x0, top, bottom), (x1, top, bottom)])
+
+    as_array = lambda rows: np.array(rows, dtype=np.float64).reshape(-1, 3)
+    return as_array(h), as_array(v)
+
+
+def _snap(segments, axis):
+    """Snap coordinate `axis` of each segment to the mean of its cluster."""
+    snapped = segments.copy()
+    snapped[:, axis] = _cluster_means(segments[:, axis])
+    return snapped
+
+
+def _cluster_means(values):
+    """Replace values by the mean of their cluster (gaps over SNAP_TOLERANCE split clusters)."""
+    import numpy as np
+
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    starts = np.concatenate(([True], np.diff(sorted_values) > SNAP_TOLERANCE))
+    cluster = np.cumsum(starts) - 1
+    means = np.bincount(cluster, weights=sorted_values) / np.bincount(cluster)
+
+    result = np.empty_like(values)
+    result[order] = means[cluster]
+    return result
+
+
+def _merge(segments, axis):
+    """Join collinear segments that overlap or are within JOIN_TOLERANCE."""
+    import numpy as np
+
+    position = segments[:, axis]
+    order = np.lexsort((segments[:, 1], position))
+    segments = segments[order]
+    position = segments[:, axis]
+
+    # Running maximum end point within each line, then split where a gap opens
+    line = np.concatenate(([0], np.cumsum(np.diff(position) != 0)))
+    offset = line * (segments[:, 2].max() - segments[:, 1].min() + 10 * JOIN_TOLERANCE + 1)
+    running_end = np.maximum.accumulate(segments[:, 2] + offset) - offset
+    new_line = np.concatenate(([True], line[1:] != line[:-1]))
+    gap = np.concatenate(([True], segments[1:, 1] > running_end[:-1] + JOIN_TOLERANCE))
+    starts = np.flatnonzero(new_line | gap)
+
+    ends = np.maximum.reduceat(segments[:, 2], starts)
+    return np.column_stack((position[starts], segments[starts, 1], ends))
+
+
+def _components(touches):
+    """Group rulings into tables: connected components of the touch matrix."""
+    import numpy as np
+
+    n_h, n_v = touches.shape
+    h_label = np.arange(n_h)
+    big = n_h
+    while True:
+        v_label = np.where(touches, h_label[:, None], big).min(axis=0)
+        new_h = np.minimum(h_label, np.where(touches, v_label[None, :], big).min(axis=1))
+        if np.array_equal(new_h, h_label):
+            break
+        h_label = new_h
+
+    components = []
+    for label in np.unique(h_label):
+        h_index = np.flatnonzero(h_label == label)
+        v_index = np.flatnonzero(v_label == label)
+        components.append((h_index, v_index))
+    return components
+
+
+def _build_table(horizontal, vertical, chars):
+    """Lay a grid over one group of rulings and fill it with text."""
+    import numpy as np
+
+    ys = np.unique(horizontal[:, 0])
+    xs = np.unique(vertical[:, 0])
+    n_rows, n_cols = len(ys) - 1, len(xs) - 1
+    if n_rows < 1 or n_cols < 1:
+        return None
+
+    tol = INTERSECTION_TOLERANCE
+    y_mid = (ys[:-1] + ys[1:]) / 2
+    x_mid = (xs[:-1] + xs[1:]) / 2
+
+    # v_wall[k, r]: a vertical ruling at xs[k] spans the middle of row r
+    spans = (vertical[:, None, 1] <= y_mid[None, :] + tol) & (vertical[:, None, 2] >= y_mid[None, :] - tol)
+    v_wall = np.zeros((len(xs), n_rows), dtype=bool)
+    np.logical_or.at(v_wall, np.searchsorted(xs, vertical[:, 0]), spans)
+
+    # h_wall[k, c]: a horizontal ruling at ys[k] spans the middle of column c
+    spans = (horizontal[:, None, 1] <= x_mid[None, :] + tol) & (horizontal[:, None, 2] >= x_mid[None, :] - tol)
+    h_wall = np.zeros((len(ys), n_cols), dtype=bool)
+    np.logical_or.at(h_wall, np.searchsorted(ys, horizontal[:, 0]), spans)
+
+    # Grid rows/columns no ruling passes through lie outside the table outline
+    row_used = v_wall.any(axis=0)
+    col_used = h_wall.any(axis=0)
+
+    # Merged cells: a grid cell belongs to its left neighbour when there is no
+    # wall between them, and to the cell above when there is no ruling between
+    owner = np.arange(n_rows * n_cols).reshape(n_rows, n_cols)
+    for c in range(1, n_cols):
+        joined = ~v_wall[c]
+        owner[joined, c] = owner[joined, c - 1]
+    for r in range(1, n_rows):
+        joined = ~h_wall[r] & (owner[r] == np.arange(r * n_cols, (r + 1) * n_cols))
+        owner[r, joined] = owner[r - 1, joined]
+    flat = owner.ravel()
+    while True:
+        resolved = flat[flat]
+        if np.array_equal(resolved, flat):
+            break
+        flat = resolved
+    owner = flat.reshape(n_rows, n_cols)
+
+    texts = _cell_texts(chars, xs, ys, owner)
+
+    if len(np.unique(owner[np.ix_(row_used, col_used)])) < 2:
+        # Like pdfplumber, a single enclosed cell is not a table
+        return None
+
+    rows = []
+    for r in range(n_rows):
+        if not row_used[r]:
+            continue
+        row = []
+        for c in range(n_cols):
+            if not col_used[c]:
+                continue
+            cell = owner[r, c]
+            row.append(texts.get(int(cell), "") if cell == r * n_cols + c else None)
+        rows.append(row)
+    return rows
+
+
+def _char_arrays(chars):
+    import numpy as np
+
+    chars = [c for c in chars if c.get("upright", True)]
+    return {
+        "text": [c["text"] for c in chars],
+        "x0": np.array([c["x0"] for c in chars], dtype=np.float64),
+        "x1": np.array([c["x1"] for c in chars], dtype=np.float64),
+        "top": np.array([c["top"] for c in chars], dtype=np.float64),
+        "bottom": np.array([c["bottom"] for c in chars], dtype=np.float64),
+        "size": np.array([c.get("size") or 0 for c in chars], dtype=np.float64),
+    }
+
+
+def _cell_texts(chars, xs, ys, owner):
+    """Bin character centres into grid cells and build each cell's text."""
+    import numpy as np
+
+    if not len(chars["text"]):
+        return {}
+
+    cx = (chars["x0"] + chars["x1"]) / 2
+    cy = (chars["top"] + chars["bottom"]) / 2
+    col = np.searchsorted(xs, cx) - 1
+    row = np.searchsorted(ys, cy) - 1
+    index = np.flatnonzero((col >= 0) & (col < owner.shape[1]) & (row >= 0) & (row < owner.shape[0]))
+    if not len(index):
+        return {}
+
+    cell = owner[row[index], col[index]]
+    line = _cluster_means(chars["top"][index])
+    order = np.lexsort((chars["x0"][index], line, cell))
+    index, cell, line = index[order], cell[order], line[order]
+    x0, x1, size = chars["x0"][index], chars["x1"][index], chars["size"][index]
+
+    texts = {}
+    parts = []
+    for i, char_index in enumerate(index):
+        if i and cell[i] != cell[i - 1]:
+            texts[int(cell[i - 1])] = "".join(parts).strip()
+            parts = []
+        elif i and line[i] != line[i - 1]:
+            parts.append("\n")
+        elif i and x0[i] - x1[i - 1] > SPACE_GAP * (size[i] or 10):
+            parts.append(" ")
+        parts.append(chars["text"][char_index])
+    texts[int(cell[-1])] = "".join(parts).strip()
+    return texts
+
+
+def compare_engines(path, max_pages=None):
+    """Time pdfplumber's table finder against `extract_tables` on one PDF.
+
+    Page objects are parsed once up front (timed as parse_ms) so the engine
+    timings cover table detection only. matching_pages counts pages where
+    both engines return identical tables.
+    """
+    import time
+    import pdfplumber
+
+    stats = {"pages": 0, "parse_ms": 0.0, "pdfplumber_ms": 0.0, "lines_ms": 0.0,
+             "pdfplumber_tables": 0, "lines_tables": 0, "matching_pages": 0}
+
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            start = time.perf_counter()
+            # pdfplumber parses page objects lazily and caches them; touch
+            # them here so neither engine's timing includes the parse
+            for attr in ("chars", "lines", "rects"):
+                getattr(page, attr)
+            stats["parse_ms"] += (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            expected = page.extract_tables()
+            stats["pdfplumber_ms"] += (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            found = extract_tables(page)
+            stats["lines_ms"] += (time.perf_counter() - start) * 1000
+
+            stats["pages"] += 1
+            stats["pdfplumber_tables"] += len(expected)
+            stats["lines_tables"] += len(found)
+            stats["matching_pages"] += int(expected == found)
+            page.close()
+
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in stats.items()}
@@ -0,0 +1,232 @@
+"""Per-page full-text index over PDF text, stored as SQLite FTS5 in the site directory.
+
+Each indexed file gets a row id; page rows in the FTS table use
+`file_id << PAGE_BITS | page` as their rowid, so a file's pages can be
+replaced or removed with a rowid range instead of a full-table scan. A
+file is marked complete once text for all of its pages has been indexed,
+so indexing a page subset does not stop a later full index.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import frappe
+from pdf_suite.utils.file_utils import get_content_hash
+
+INDEX_FILE = "pdf_suite_search.sqlite3"
+
+# Up to ~1M pages per file in the rowid encoding
+PAGE_BITS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_files (
+    id INTEGER PRIMARY KEY,
+    file_url TEXT NOT NULL UNIQUE,
+    content_hash TEXT,
+    source TEXT,
+    indexed_at REAL,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+    page UNINDEXED,
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_initialized = set()
+
+
+@contextmanager
+def connect():
+    """Open the current site's index, creating it on first use."""
+    path = frappe.get_site_path("private", INDEX_FILE)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            _initialized.add(path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def index_document(file_url, path, pages, source="extract", complete=False):
+    """Add or refresh page text for a file.
+
+    Args:
+        file_url: File URL the text belongs to
+        path: Local path of that file (its content hash detects changes)
+        pages: List of {page, text} with 1-based page numbers; pages not
+            listed or without text keep their existing text unless the file
+            content changed
+        source: Where the text came from ("extract", "ocr"); extracted text
+            only fills pages missing from an OCR index of the same content
+        complete: `pages` covers every page of the file
+    """
+    content_hash = get_content_hash(path)
+
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT id, content_hash, source, complete FROM indexed_files WHERE file_url = ?", (file_url,)
+        ).fetchone()
+
+        # Pages without text add nothing to search, and must not blank out
+        # text indexed earlier (e.g. OCR text of a scanned page)
+        rows = [(int(p["page"]), p["text"]) for p in pages if (p.get("text") or "").strip()]
+        keep_ocr = False
+
+        if row:
+            file_id = row[0]
+            if row[1] != content_hash:
+                _delete_pages(conn, file_id)
+            else:
+                # Extracted text never replaces OCR text of the same content
+                keep_ocr = row[2] == "ocr" and source != "ocr"
+                complete = complete or bool(row[3])
+            if not keep_ocr:
+                conn.execute(
+                    "UPDATE indexed_files SET content_hash = ?, source = ?, indexed_at = ?, complete = ? "
+                    "WHERE id = ?",
+                    (content_hash, source, time.time(), int(complete), file_id),
+                )
+        else:
+            file_id = conn.execute(
+                "INSERT INTO indexed_files (file_url, content_hash, source, indexed_at, complete) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (file_url, content_hash, source, time.time(), int(complete)),
+            ).lastrowid
+
+        rows = [(_rowid(file_id, page), page, text) for page, text in rows]
+        if keep_ocr:
+            existing = {
+                r[0] for r in conn.execute(
+                    "SELECT rowid FROM page_text WHERE rowid >= ? AND rowid < ?",
+                    (_rowid(file_id, 0), _rowid(file_id + 1, 0)),
+                )
+            }
+            rows = [r for r in rows if r[0] not in existing]
+        conn.executemany("DELETE FROM page_text WHERE rowid = ?", [(r[0],) for r in rows])
+        conn.executemany("INSERT INTO page_text (rowid, page, text) VALUES (?, ?, ?)", rows)
+
+
+def get_indexed_hash(file_url):
+    """Return the content hash a file was indexed with, or None."""
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT content_hash FROM indexed_files WHERE file_url = ?", (file_url,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def is_indexed(file_url, content_hash):
+    """Return True if all pages of a file are indexed at `content_hash`."""
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT content_hash, complete FROM indexed_files WHERE file_url = ?", (file_url,)
+        ).fetchone()
+    return bool(row) and row[0] == content_hash and bool(row[1])
+
+
+def remove_document(file_url):
+    """Drop a file and all of its pages from the index."""
+    with connect() as conn:
+        row = conn.execute("SELECT id FROM indexed_files WHERE file_url = ?", (file_url,)).fetchone()
+        if row:
+            _delete_pages(conn, row[0])
+            conn.execute("DELETE FROM indexed_files WHERE id = ?", (row[0],))
+
+
+def search(query, limit=20, offset=0):
+    """Search page text. Returns a list of {file_url, page, snippet, score}."""
+    fts_query = to_fts_query(query)
+    if not fts_query:
+        return []
+
+    with connect() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT f.file_url, p.page,
+                   snippet(page_text, 1, '<mark>', '</mark>', '…', 16),
+                   bm25(page_text) AS score
+            FROM page_text p
+            JOIN indexed_files f ON f.id = (p.rowid >> {PAGE_BITS})
+            WHERE page_text MATCH ?
+            ORDER BY score
+            LIMIT ? OFFSET ?
+            """,
+            (fts_query, int(limit), int(offset)),
+        ).fetchall()
+
+    return [
+        {"file_url": r[0], "page": r[1], "snippet": r[2], "score": round(-r[3], 4)}
+        for r in rows
+    ]
+
+
+def to_fts_query(query):
+    """Quote each search term so user input cannot break FTS5 query syntax.
+
+    A trailing `*` on a term is kept as a prefix search.
+    """
+    terms = []
+    for term in str(query or "").split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def on_file_update(doc, method=None):
+    """Re-index an already indexed PDF when its content changes (File doc event)."""
+    if not _is_pdf(doc) or not doc.content_hash:
+        return
+    try:
+        indexed_hash = get_indexed_hash(doc.file_url)
+    except sqlite3.Error:
+        return
+    if indexed_hash and indexed_hash != doc.content_hash:
+        frappe.enqueue(
+            "pdf_suite.api.search.index_pdf",
+            file_url=doc.file_url,
+            queue="long",
+            enqueue_after_commit=True,
+        )
+
+
+def on_file_trash(doc, method=None):
+    """Remove a deleted PDF from the index (File doc event)."""
+    if not _is_pdf(doc):
+        return
+    try:
+        remove_document(doc.file_url)
+    except sqlite3.Error as e:
+        frappe.log_error(f"search index removal error: {e}")
+
+
+def _migrate(conn):
+    """Add columns missing from an index created by an older version."""
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(indexed_files)")}
+    if "complete" not in columns:
+        # Older indexes did not record coverage; treat them as partial
+        conn.execute("ALTER TABLE indexed_files ADD COLUMN complete INTEGER NOT NULL DEFAULT 0")
+
+
+def _delete_pages(conn, file_id):
+    conn.execute(
+        "DELETE FROM page_text WHERE rowid >= ? AND rowid < ?",
+        (_rowid(file_id, 0), _rowid(file_id + 1, 0)),
+    )
+
+
+def _rowid(file_id, page):
+    return (file_id << PAGE_BITS) | page
+
+
+def _is_pdf(doc):
+    return bool(doc.file_url) and os.path.splitext(doc.file_url)[1].lower() == ".pdf"
@@ -0,0 +1,353 @@
+"""Stamp every page of a PDF with a shared Form XObject.
+
+A stamp is drawn by a render function for a given visible page size and
+imported once per distinct size as a Form XObject. Each page references
+that form through a small content snippet, itself shared by all pages with
+the same box and rotation, so output growth does not depend on the page
+count. Rendering in the page's visible size keeps stamps in place on
+Letter, A3 and rotated pages. No frappe imports here.
+"""
+import io
+import re
+import secrets
+import string
+from pdf_suite.utils.lru import LRUCache
+
+# Text stamp anchor -> (horizontal, vertical) alignment on the visible page
+TEXT_POSITIONS = {
+    "top-left": ("left", "top"),
+    "top-center": ("center", "top"),
+    "top-right": ("right", "top"),
+    "bottom-left": ("left", "bottom"),
+    "bottom-center": ("center", "bottom"),
+    "bottom-right": ("right", "bottom"),
+}
+
+# Helvetica cap height, as a fraction of the font size
+CAP_HEIGHT = 0.718
+
+# Fields a page-number template may use; page, total and number also take a
+# short integer format spec such as 07d
+TEMPLATE_FIELDS = ("page", "total", "number", "bates")
+TEMPLATE_SPEC = re.compile(r"0?\d{1,2}d")
+
+# Widest zero-padded Bates number
+MAX_BATES_DIGITS = 20
+
+# Rendered stamps kept per process (least recently used dropped first)
+MAX_CACHED_STAMPS = 128
+MAX_CACHED_STAMP_BYTES = 64 * 1024 * 1024
+
+
+class PageStamper:
+    """Add a stamp to pages of an open PDF.
+
+    Args:
+        pdf: Open pikepdf.Pdf
+        render: Function (width, height) -> bytes of a one-page PDF of that
+            size holding the stamp
+        overlay: Draw over the page content instead of under it
+    """
+
+    def __init__(self, pdf, render, overlay=False):
+        self.pdf = pdf
+        self.render = render
+        self.overlay = overlay
+        # Random per run, so stamping a stamped file never reuses a name
+        self.prefix = "/Stamp" + secrets.token_hex(3)
+        self._forms = {}
+        self._snippets = {}
+        self._save_state = None
+
+    @property
+    def variants(self):
+        return len(self._forms)
+
+    def stamp(self, page):
+        import pikepdf
+
+        box = tuple(round(float(v), 3) for v in page.cropbox)
+        rotate = int(page.obj.get("/Rotate", 0)) % 360
+        name, snippet = self._snippet(box, rotate)
+
+        resources = page.obj.get("/Resources")
+        if resources is None:
+            page.obj.Resources = resources = pikepdf.Dictionary()
+        if "/XObject" not in resources:
+            resources.XObject = pikepdf.Dictionary()
+        resources.XObject[name] = self._forms[_visible_size(box, rotate)][1]
+
+        if self.overlay:
+            if self._save_state is None:
+                self._save_state = pikepdf.Stream(self.pdf, b"q\n")
+            page.contents_add(self._save_state, prepend=True)
+            page.contents_add(snippet)
+        else:
+            page.contents_add(snippet, prepend=True)
+
+    def _snippet(self, box, rotate):
+        """Name of the form and the shared content stream placing it on a page box."""
+        import pikepdf
+
+        key = (box, rotate)
+        if key not in self._snippets:
+            name = self._form(_visible_size(box, rotate))
+            matrix = " ".join(_num(v) for v in _placement(box, rotate))
+            ops = f"\n{'Q ' if self.overlay else ''}q {matrix} cm {name} Do Q\n"
+            self._snippets[key] = (name, pikepdf.Stream(self.pdf, ops.encode("ascii")))
+        return self._snippets[key]
+
+    def _form(self, size):
+        """Name of the stamp form for a visible page size, rendering it on first use."""
+        import pikepdf
+
+        if size not in self._forms:
+            with pikepdf.open(io.BytesIO(self.render(*size))) as stamp_pdf:
+                form = self.pdf.copy_foreign(stamp_pdf.pages[0].as_form_xobject())
+            self._forms[size] = (f"{self.prefix}n{len(self._forms)}", form)
+        return self._forms[size][0]
+
+
+class TextStamper:
+    """Write a line of per-page text (page or Bates numbers) over page content.
+
+    All pages share one Helvetica font dictionary (a standard font, so
+    nothing is embedded) and each page gets a content stream of a few
+    operators, so no canvas is built per page.
+
+    Args:
+        pdf: Open pikepdf.Pdf
+        font_size: Text size in points
+        position: One of TEXT_POSITIONS
+        margin: Distance from the page edges in points
+        color: RGB components 0-1
+    """
+
+    def __init__(self, pdf, font_size=10, position="bottom-right", margin=28, color=(0, 0, 0)):
+        import pikepdf
+
+        if position not in TEXT_POSITIONS:
+            raise ValueError(f"Unknown position: {position}")
+        self.pdf = pdf
+        self.font_size = float(font_size)
+        self.align, self.valign = TEXT_POSITIONS[position]
+        self.margin = float(margin)
+        self.color = " ".join(_num(c) for c in color)
+        self.font_name = "/StampFont" + secrets.token_hex(3)
+        self.font = pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Font,
+            Subtype=pikepdf.Name.Type1,
+            BaseFont=pikepdf.Name.Helvetica,
+            Encoding=pikepdf.Name.WinAnsiEncoding,
+        ))
+        self._save_state = pikepdf.Stream(pdf, b"q\n")
+
+    def stamp(self, page, text):
+        import pikepdf
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        box = tuple(float(v) for v in page.cropbox)
+        rotate = int(page.obj.get("/Rotate", 0)) % 360
+        width, height = _visible_size(box, rotate)
+
+        encoded = text.encode("cp1252", errors="replace")
+        text_width = stringWidth(encoded.decode("cp1252"), "Helvetica", self.font_size)
+        if self.align == "left":
+            x = self.margin
+        elif self.align == "right":
+            x = width - self.margin - text_width
+        else:
+            x = (width - text_width) / 2
+        y = self.margin if self.valign == "bottom" else height - self.margin - self.font_size * CAP_HEIGHT
+
+        resources = page.obj.get("/Resources")
+        if resources is None:
+            page.obj.Resources = resources = pikepdf.Dictionary()
+        if "/Font" not in resources:
+            resources.Font = pikepdf.Dictionary()
+        resources.Font[self.font_name] = self.font
+
+        matrix = " ".join(_num(v) for v in _placement(box, rotate))
+        ops = (
+            f"\nQ q {matrix} cm BT {self.font_name} {_num(self.font_size)} Tf {self.color} rg "
+            f"1 0 0 1 {_num(x)} {_num(y)} Tm "
+        ).encode("ascii") + _pdf_string(encoded) + b" Tj ET Q\n"
+        page.contents_add(self._save_state, prepend=True)
+        page.contents_add(pikepdf.Stream(self.pdf, ops))
+
+
+def stamp_numbers(path, output_path, template="Page {page} of {total}", bates_start=1, bates_prefix="",
+                  bates_digits=6, **style):
+    """Stamp numbered text on every page of a PDF file and save it to `output_path`.
+
+    Template fields: {page} and {total} count pages within this file;
+    {bates} is bates_prefix plus the zero-padded {number}, which starts at
+    bates_start, so a batch continues numbering by passing each file the
+    number after the previous file's last page. `style` goes to TextStamper.
+    Runs in worker processes, so it must stay free of frappe.
+
+    Returns the number of pages stamped.
+    """
+    import pikepdf
+
+    check_template(template)
+    bates_digits = int(bates_digits)
+    if not 1 <= bates_digits <= MAX_BATES_DIGITS:
+        raise ValueError(f"Bates digits must be between 1 and {MAX_BATES_DIGITS}")
+
+    with pikepdf.open(path) as pdf:
+        stamper = TextStamper(pdf, **style)
+        total = len(pdf.pages)
+        for index, page in enumerate(pdf.pages):
+            number = int(bates_start) + index
+            stamper.stamp(page, template.format(
+                page=index + 1,
+                total=total,
+                number=number,
+                bates=f"{bates_prefix}{number:0{bates_digits}d}",
+            ))
+        pdf.save(output_path)
+    return total
+
+
+def check_template(template):
+    """Raise ValueError unless a stamp template only uses the known fields.
+
+    Fields must be bare names ({page}, not {page.real}, {page[0]} or
+    {page!r}); a format spec is limited to TEMPLATE_SPEC, so a template
+    cannot ask for huge padding.
+    """
+    try:
+        fields = [(field, spec, conversion) for _text, field, spec, conversion in string.Formatter().parse(template)]
+    except ValueError as e:
+        raise ValueError(f"Invalid stamp template {template!r}: {e}") from e
+
+    for field, spec, conversion in fields:
+        if field is None:
+            continue
+        if field not in TEMPLATE_FIELDS:
+            raise ValueError(f"Invalid stamp template {template!r}: unknown field {{{field}}}")
+        if conversion:
+            raise ValueError(f"Invalid stamp template {template!r}: conversion !{conversion} not allowed")
+        if spec and (field == "bates" or not TEMPLATE_SPEC.fullmatch(spec)):
+            raise ValueError(f"Invalid stamp template {template!r}: format {spec!r} not allowed for {{{field}}}")
+
+
+def text_style(position="bottom-center", font_size=10, margin=28, color="#000000"):
+    """TextStamper keyword arguments from request values (color as hex)."""
+    return {
+        "position": position,
+        "font_size": float(font_size),
+        "margin": float(margin),
+        "color": hex_to_rgb(color),
+    }
+
+
+def hex_to_rgb(hex_color):
+    """RGB components 0-1 of a "#rrggbb" color."""
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i : i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def stamp_pages(pdf, render, pages=None, overlay=False):
+    """Stamp `pages` (0-based indices, default all) of an open PDF.
+
+    Returns the number of distinct stamp variants rendered.
+    """
+    stamper = PageStamper(pdf, render, overlay)
+    indices = range(len(pdf.pages)) if pages is None else pages
+    for index in indices:
+        stamper.stamp(pdf.pages[index])
+    return stamper.variants
+
+
+# Rendered stamp PDFs, keyed by stamp options and page size
+_stamp_cache = LRUCache(MAX_CACHED_STAMPS, MAX_CACHED_STAMP_BYTES)
+
+
+def cached_render(key, render):
+    """Wrap a render function so each (key, page size) is rendered once per process.
+
+    `key` must identify everything the stamp depends on (normalized options
+    and, for images, the image content hash).
+    """
+
+    def wrapper(width, height):
+        size_key = (key, round(width, 2), round(height, 2))
+        data = _stamp_cache.get(size_key)
+        if data is None:
+            data = render(width, height)
+            _stamp_cache.set(size_key, data)
+        return data
+
+    return wrapper
+
+
+def render_text_stamp(width, height, text, font_size=60, opacity=0.15, rotation=45, color=(0.53, 0.53, 0.53)):
+    """One-page PDF with text centered and rotated on a width x height page."""
+    from reportlab.lib.colors import Color
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+    c.setFillColor(Color(*color, alpha=float(opacity)))
+    c.setFont("Helvetica-Bold", int(font_size))
+    c.translate(width / 2, height / 2)
+    c.rotate(int(rotation))
+    c.drawCentredString(0, 0, text)
+    c.save()
+    return buffer.getvalue()
+
+
+def render_image_stamp(width, height, image, opacity=0.2, position="center", margin=40):
+    """One-page PDF with an image placed on a width x height page.
+
+    The image (a path or a reportlab ImageReader) is drawn at half its
+    pixel size, centered or in the top-right or bottom-left corner.
+    """
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    reader = image if isinstance(image, ImageReader) else ImageReader(image)
+    img_width, img_height = reader.getSize()
+    w, h = img_width / 2, img_height / 2
+
+    if position == "top-right":
+        x, y = width - w - margin, height - h - margin
+    elif position == "bottom-left":
+        x, y = margin, margin
+    else:
+        x, y = (width - w) / 2, (height - h) / 2
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+    c.setFillAlpha(float(opacity))
+    c.drawImage(reader, x, y, width=w, height=h, mask="auto")
+    c.save()
+    return buffer.getvalue()
+
+
+def _visible_size(box, rotate):
+    width, height = box[2] - box[0], box[3] - box[1]
+    return (height, width) if rotate in (90, 270) else (width, height)
+
+
+def _placement(box, rotate):
+    """Matrix from the visible page (origin bottom-left) to the page's user space."""
+    x0, y0, x1, y1 = box
+    if rotate == 90:
+        return (0, 1, -1, 0, x1, y0)
+    if rotate == 180:
+        return (-1, 0, 0, -1, x1, y1)
+    if rotate == 270:
+        return (0, -1, 1, 0, x0, y1)
+    return (1, 0, 0, 1, x0, y0)
+
+
+def _pdf_string(raw):
+    """A PDF literal string for raw bytes."""
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _num(value):
+    return f"{float(value):.3f}".rstrip("0").rstrip(".") or "0"
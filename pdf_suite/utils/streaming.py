@@ -0,0 +1,78 @@
+"""Streaming HTTP responses for large PDF Suite results.
+
+Whitelisted methods can return these werkzeug responses directly. The body
+is generated while the response is being sent, after Frappe has torn down
+the request, so the iterables passed in must not use frappe.local, the
+database or the Redis cache.
+"""
+import json
+import zipfile
+from werkzeug.wrappers import Response
+
+# Entries in these formats are stored in ZIPs rather than deflated
+STORED_EXTENSIONS = {"jpg", "jpeg", "jp2", "png", "zip", "pdf"}
+
+
+def ndjson_response(records, filename=None):
+    """Stream an iterable of dicts as newline-delimited JSON."""
+
+    def generate():
+        for record in records:
+            yield (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode()
+
+    return _streamed(generate(), "application/x-ndjson", filename)
+
+
+def _streamed(body, mimetype, filename=None):
+    response = Response(body, mimetype=mimetype, direct_passthrough=True)
+    if filename:
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    # Stop nginx from buffering the whole stream before sending it on
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def zip_response(entries, filename):
+    """Stream (name, bytes) pairs as a ZIP archive, built while it is sent."""
+    return _streamed(iter_zip(entries), "application/zip", filename)
+
+
+def iter_zip(entries):
+    """Yield the bytes of a ZIP archive of (name, bytes) entries as it is written.
+
+    Already-compressed formats are stored; everything else is deflated.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries:
+            compress = (
+                zipfile.ZIP_STORED
+                if name.rsplit(".", 1)[-1].lower() in STORED_EXTENSIONS
+                else zipfile.ZIP_DEFLATED
+            )
+            archive.writestr(name, data, compress_type=compress)
+            yield from buffer.drain()
+    yield from buffer.drain()
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable file object that hands written bytes back in chunks."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
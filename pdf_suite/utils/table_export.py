@@ -0,0 +1,290 @@
+"""Columnar export of extracted tables (typed CSV, Parquet, Arrow IPC).
+
+Exports take two passes over the per-page extraction results. The first
+pass (`TablePlanner.add_page`) finds logical tables: it detects header
+rows, joins tables that continue onto the next page, and infers a type for
+each column. The second pass (`TablePlanner.rows_for_page`) converts each
+page's rows to those types for the writers. Both passes read one page at a
+time, so memory does not grow with the size of the document.
+
+Parquet and Arrow output need the optional `pyarrow` package.
+"""
+import csv
+import re
+from datetime import date, datetime
+
+# Export format -> file extension
+FORMATS = {
+    "csv": "csv",
+    "parquet": "parquet",
+    "arrow": "arrow",
+}
+
+# One optional sign, before or after the currency symbol ("-$5", "$-5")
+_NUMBER = re.compile(r"^([-+]?[$€£]?|[$€£][-+])(\d{1,3}(,\d{3})+|\d+)(\.\d+)?$")
+_DATE_FORMATS = ("%Y-%m-%d", "%d %b %Y", "%d-%b-%Y", "%d %B %Y", "%b %d, %Y")
+
+
+class TablePlanner:
+    """Finds logical tables in per-page pdfplumber tables and converts their rows."""
+
+    def __init__(self):
+        self.tables = []
+        # (page, index on page) -> (logical table, header rows to skip)
+        self._segments = {}
+        self._open = None
+
+    def add_page(self, item):
+        """First pass: register the tables of one {page, tables} entry."""
+        page = item["page"]
+        last = None
+
+        for index, raw in enumerate(item["tables"]):
+            rows = _clean_rows(raw)
+            if not rows:
+                continue
+
+            table, skip = self._continuation(page, rows) if last is None else (None, 0)
+            if table is None:
+                table = self._new_table(page, rows)
+                skip = 1 if table["has_header"] else 0
+
+            table["pages"].append(page)
+            self._segments[(page, index)] = (table, skip)
+            for row in rows[skip:]:
+                _update_types(table, row)
+                table["row_count"] += 1
+            last = table
+
+        self._open = (last, page) if last is not None else None
+
+    def finish(self):
+        """Return the logical tables found, with final column names and types."""
+        for table in self.tables:
+            table["types"] = [_column_type(kinds) for kinds in table.pop("_kinds")]
+        return self.tables
+
+    def rows_for_page(self, item):
+        """Second pass: yield (table, typed rows) for one page entry."""
+        page = item["page"]
+        for index, raw in enumerate(item["tables"]):
+            segment = self._segments.get((page, index))
+            if not segment:
+                continue
+            table, skip = segment
+            types = table["types"]
+            rows = [
+                [page] + [convert_value(value, types[i]) for i, value in enumerate(_pad(row, table["width"]))]
+                for row in _clean_rows(raw)[skip:]
+            ]
+            yield table, rows
+
+    def _continuation(self, page, rows):
+        """Match the first table on a page to the last table of the page before."""
+        if not self._open:
+            return None, 0
+        table, open_page = self._open
+        if open_page != page - 1 or _width(rows) != table["width"]:
+            return None, 0
+
+        if table["has_header"] and rows[0] == table["header_row"]:
+            # Header repeated at the top of the page
+            return table, 1
+        if _looks_like_header(rows):
+            return None, 0
+        return table, 0
+
+    def _new_table(self, page, rows):
+        width = _width(rows)
+        has_header = _looks_like_header(rows)
+        header = _pad(rows[0], width) if has_header else [""] * width
+        table = {
+            "index": len(self.tables),
+            "first_page": page,
+            "pages": [],
+            "width": width,
+            "has_header": has_header,
+            "header_row": rows[0] if has_header else None,
+            "columns": ["page"] + _column_names(header),
+            "row_count": 0,
+            "_kinds": [set() for _ in range(width)],
+        }
+        self.tables.append(table)
+        return table
+
+
+def parse_value(value):
+    """Return (type, parsed value) for a cleaned cell string."""
+    number = _parse_number(value)
+    if number is not None:
+        return ("int" if isinstance(number, int) else "float"), number
+    parsed = _parse_date(value)
+    if parsed is not None:
+        return "date", parsed
+    return "string", value
+
+
+def convert_value(value, column_type):
+    """Convert a cleaned cell to a column type (None for blanks)."""
+    if value == "":
+        return None
+    if column_type == "string":
+        return value
+    if column_type == "date":
+        return _parse_date(value)
+    number = _parse_number(value)
+    return float(number) if column_type == "float" else number
+
+
+def open_writer(fmt, path, table):
+    """Return a writer for one logical table in `fmt` (see FORMATS)."""
+    if fmt == "csv":
+        return CsvTableWriter(path, table)
+    return ArrowTableWriter(path, table, fmt)
+
+
+class CsvTableWriter:
+    """Writes typed rows as CSV: numbers unformatted, dates as ISO 8601, blanks for nulls."""
+
+    def __init__(self, path, table):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(table["columns"])
+
+    def write_rows(self, rows):
+        self._writer.writerows(
+            [["" if v is None else v.isoformat() if isinstance(v, date) else v for v in row] for row in rows]
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowTableWriter:
+    """Writes typed rows as Parquet or Arrow IPC, one record batch per call."""
+
+    def __init__(self, path, table, fmt):
+        import pyarrow as pa
+
+        arrow_types = {"int": pa.int64(), "float": pa.float64(), "date": pa.date32(), "string": pa.string()}
+        self._schema = pa.schema(
+            [("page", pa.int32())]
+            + [(name, arrow_types[t]) for name, t in zip(table["columns"][1:], table["types"])]
+        )
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write_rows(self, rows):
+        import pyarrow as pa
+
+        if not rows:
+            return
+        columns = [list(column) for column in zip(*rows)]
+        self._writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+            schema=self._schema,
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+def _clean_rows(raw):
+    """Normalise cells to single-line strings and drop blank rows."""
+    rows = []
+    for row in raw or []:
+        cells = [" ".join(str(cell).split()) if cell is not None else "" for cell in row]
+        if any(cells):
+            rows.append(cells)
+    return rows
+
+
+def _width(rows):
+    return max(len(row) for row in rows)
+
+
+def _pad(row, width):
+    return list(row) + [""] * (width - len(row))
+
+
+def _looks_like_header(rows):
+    """Return True if the first row is a header.
+
+    That is a row of non-empty text labels over at least one column whose
+    values below are all numbers or dates (e.g. "Amount" over amounts).
+    Tables of text only are treated as having no header.
+    """
+    first = rows[0]
+    if not all(first) or any(parse_value(cell)[0] != "string" for cell in first):
+        return False
+    body = rows[1:]
+    if not body:
+        return False
+    for i in range(len(first)):
+        column = [row[i] for row in body if i < len(row) and row[i]]
+        if column and all(parse_value(cell)[0] != "string" for cell in column):
+            return True
+    return False
+
+
+def _column_names(header):
+    names, seen = [], {"page"}
+    for i, label in enumerate(header, start=1):
+        name = label or f"column_{i}"
+        base, n = name, 2
+        while name in seen:
+            name, n = f"{base}_{n}", n + 1
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _update_types(table, row):
+    for i, value in enumerate(_pad(row, table["width"])):
+        kinds = table["_kinds"][i]
+        if value and "string" not in kinds:
+            kinds.add(parse_value(value)[0])
+
+
+def _column_type(kinds):
+    """Narrowest type that fits every kind of value seen in a column."""
+    if kinds and kinds <= {"int"}:
+        return "int"
+    if kinds and kinds <= {"int", "float"}:
+        return "float"
+    if kinds == {"date"}:
+        return "date"
+    return "string"
+
+
+def _parse_number(value):
+    text = value.replace(" ", "")
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    if text.endswith("-") and text[:-1] and text[-2].isdigit():
+        # Trailing minus, as on some bank statements
+        negative, text = True, text[:-1]
+    if not _NUMBER.match(text) or (negative and text[0] in "+-"):
+        return None
+
+    text = text.replace(",", "").replace("$", "").replace("€", "").replace("£", "")
+    digits = text.lstrip("+-").split(".")[0]
+    if (len(digits) > 1 and digits.startswith("0")) or len(digits) > 18:
+        # Zero-padded codes and long identifiers are not quantities
+        return None
+    number = float(text) if "." in text else int(text)
+    return -number if negative else number
+
+
+def _parse_date(value):
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
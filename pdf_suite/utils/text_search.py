@@ -0,0 +1,226 @@
+"""Multi-pattern search over page character streams, for redaction.
+
+Literal terms are compiled into one Aho-Corasick automaton (pyahocorasick,
+when installed; otherwise one alternation regex) and regular expressions
+are compiled once, so each page's text is scanned once per pattern set
+rather than once per term. Both report the same matches: scanning left to
+right, the longest term starting at a position, with no overlaps. Match
+spans are mapped back to character boxes from the "chars" extraction kind.
+
+Patterns come from users and run on the web worker, so they are length
+limited, may not nest variable-length quantifiers (e.g. "(a+)+"), and are
+run with the `regex` module under a time budget shared by all patterns of
+a matcher, which stops other slow cases such as "(a|aa)*$" or ".*.*.*x".
+No frappe imports here.
+"""
+import re
+import time
+
+# Vertical offset (points) within which two character boxes are on one line
+LINE_TOLERANCE = 3
+
+# Longest regular expression accepted, in characters
+MAX_PATTERN_LENGTH = 200
+
+# Seconds all regular expressions of one matcher may spend matching, in total
+PATTERN_TIME_BUDGET = 10
+
+
+class PatternMatcher:
+    """Find literal terms and regular expressions in text.
+
+    Args:
+        terms: Literal strings; whitespace inside a term matches any
+            single whitespace character in the page text
+        patterns: Regular expression strings (Python syntax)
+        case_sensitive: Match case exactly (default: ignore case)
+        time_budget: Seconds the patterns may spend matching over the
+            matcher's lifetime; find raises ValueError once it is spent
+    """
+
+    def __init__(self, terms=(), patterns=(), case_sensitive=False, time_budget=PATTERN_TIME_BUDGET):
+        self.case_sensitive = case_sensitive
+        self.time_budget = time_budget
+        # Normalized term -> term as given, for reporting
+        self._labels = {}
+        for term in terms:
+            if term and term.strip():
+                key = _normalize_space(term)
+                self._labels[key if case_sensitive else key.lower()] = term
+        self.terms = list(self._labels)
+        flags = 0 if case_sensitive else re.IGNORECASE
+        self.patterns = []
+        for pattern in patterns:
+            if not pattern:
+                continue
+            self.patterns.append((pattern, compile_pattern(pattern, flags)))
+        if not self.terms and not self.patterns:
+            raise ValueError("No search terms or patterns given")
+        self._literals = _compile_literals(self.terms)
+
+    def find(self, text):
+        """Yield (start, end, label) for every match; label is the term or pattern."""
+        if self._literals:
+            literal_text = _normalize_space(text)
+            if not self.case_sensitive:
+                literal_text = _lower_same_length(literal_text)
+            for start, end, term in self._literals(literal_text):
+                yield start, end, self._labels[term]
+        for label, compiled in self.patterns:
+            started = time.monotonic()
+            try:
+                spans = [m.span() for m in compiled.finditer(text, timeout=max(self.time_budget, 0.001))]
+            except TimeoutError:
+                raise ValueError(f"Pattern {label!r} took too long to match; simplify it") from None
+            finally:
+                self.time_budget -= time.monotonic() - started
+            for start, end in spans:
+                if end > start:
+                    yield start, end, label
+
+
+def compile_pattern(pattern, flags=0):
+    """Compile a user-supplied regular expression, rejecting risky ones with ValueError.
+
+    The pattern is checked with Python's own parser (so the syntax is that
+    of `re`) and compiled with the `regex` module, whose matching takes a
+    timeout.
+    """
+    import regex
+
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise ValueError(f"Pattern longer than {MAX_PATTERN_LENGTH} characters: {pattern[:40]!r}...")
+    try:
+        parsed = _sre_parse().parse(pattern, flags)
+    except re.error as e:
+        raise ValueError(f"Invalid pattern {pattern!r}: {e}") from e
+    if _nested_repeat(parsed, inside_repeat=False):
+        raise ValueError(f"Pattern {pattern!r} nests variable-length repeats (like (a+)+); simplify it")
+    return regex.compile(pattern, flags)
+
+
+def match_boxes(page, matcher):
+    """Run `matcher` over a "chars" page result.
+
+    Returns (boxes, counts): boxes are (x, y, width, height) in PDF points
+    from the page's lower-left corner, one per line a match covers; counts
+    maps each term or pattern to its number of matches.
+    """
+    text, chars = page["text"], page["boxes"]
+    height = page["height"]
+    boxes = []
+    counts = {}
+    for start, end, label in matcher.find(text):
+        counts[label] = counts.get(label, 0) + 1
+        for x0, top, x1, bottom in _line_boxes(chars[start:end]):
+            boxes.append((x0, height - bottom, x1 - x0, bottom - top))
+    return boxes, counts
+
+
+def _line_boxes(chars):
+    """Union character boxes into one box per text line."""
+    lines = []
+    for box in chars:
+        if box is None:
+            continue
+        x0, top, x1, bottom = box
+        last = lines[-1] if lines else None
+        if last and abs(top - last[1]) <= LINE_TOLERANCE:
+            last[0] = min(last[0], x0)
+            last[1] = min(last[1], top)
+            last[2] = max(last[2], x1)
+            last[3] = max(last[3], bottom)
+        else:
+            lines.append([x0, top, x1, bottom])
+    return lines
+
+
+def _sre_parse():
+    try:
+        from re import _parser
+        return _parser
+    except ImportError:  # Python < 3.11
+        import sre_parse
+        return sre_parse
+
+
+def _nested_repeat(items, inside_repeat):
+    """True if a variable-length repeat contains another one (parsed pattern items)."""
+    constants = _sre_parse()
+    repeats = {constants.MAX_REPEAT, constants.MIN_REPEAT}
+    if hasattr(constants, "POSSESSIVE_REPEAT"):
+        repeats.add(constants.POSSESSIVE_REPEAT)
+    for op, value in items:
+        if op in repeats:
+            low, high, sub = value
+            variable = low != high
+            if variable and inside_repeat:
+                return True
+            if _nested_repeat(sub, inside_repeat or variable):
+                return True
+        elif op is constants.BRANCH:
+            if any(_nested_repeat(branch, inside_repeat) for branch in value[1]):
+                return True
+        elif op is constants.SUBPATTERN:
+            if _nested_repeat(value[-1], inside_repeat):
+                return True
+        elif op is getattr(constants, "ATOMIC_GROUP", None):
+            if _nested_repeat(value, inside_repeat):
+                return True
+        elif op in (constants.ASSERT, constants.ASSERT_NOT):
+            if _nested_repeat(value[1], inside_repeat):
+                return True
+    return False
+
+
+def _compile_literals(terms):
+    """Return a function yielding (start, end, term) for all literal matches."""
+    if not terms:
+        return None
+    try:
+        import ahocorasick
+    except ImportError:
+        ahocorasick = None
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for term in terms:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+
+        def find(text):
+            # The automaton reports every (overlapping) occurrence; keep what
+            # the regex below would match: leftmost, then longest, no overlaps
+            found = sorted(
+                ((end - len(term) + 1, -len(term), term) for end, term in automaton.iter(text)),
+            )
+            last_end = 0
+            for start, negative_length, term in found:
+                if start >= last_end:
+                    last_end = start - negative_length
+                    yield start, last_end, term
+
+        return find
+
+    # Longest first, so a term that prefixes another does not shadow it
+    ordered = sorted(terms, key=len, reverse=True)
+    regex = re.compile("|".join(re.escape(term) for term in ordered))
+
+    def find(text):
+        for match in regex.finditer(text):
+            yield match.start(), match.end(), match.group()
+
+    return find
+
+
+def _normalize_space(text):
+    """Replace each whitespace character with a space, keeping offsets."""
+    return re.sub(r"\s", " ", text)
+
+
+def _lower_same_length(text):
+    """Lower-case text without changing its length (so offsets still map to boxes)."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
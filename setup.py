@@ -13,11 +13,12 @@ setup(
         "pikepdf>=8.0.0",
         "pdfplumber>=0.10.0",
         "reportlab>=4.0",
-        "fpdf2>=2.7.0",
         "pytesseract>=0.3.10",
         "pdf2docx>=0.5.8",
         "python-docx>=1.0.0",
         "Pillow>=10.0.0",
+        "numpy>=1.24",
+        "regex>=2023.0",
         "weasyprint>=62.0",
     ],
 )